@@ -0,0 +1,486 @@
+"""
+Backtest Core Module
+
+Simulation kernel shared by MomentumBacktest and OOSBacktestEngine.
+DailyEventLoop walks the price panel bar by bar, fires rebalance events as
+their dates are reached and marks the portfolio to market on every bar into
+a preallocated NumPy array. BacktestKernel runs the momentum rotation on top
+of it; the engines only differ in the hooks they plug in (parameter-lock
+check, rebalance calendar, minimum history and output sink). Independent
+module that can be tested separately.
+"""
+
+import logging
+import numpy as np
+import pandas as pd
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+# Add paths to import our modules
+sys.path.append('src/portfolio')
+sys.path.append('strategies/scenario_based')
+sys.path.append('utils')
+
+from portfolio_manager import PortfolioManager
+from momentum_calculator import MomentumCalculator
+from price_panel import PricePanel, frame_prefix
+from instrumentation import Instrumentation
+from structured_logging import get_logger
+
+
+logger = get_logger('backtest')
+
+
+def frames_up_to_date(etf_data: Dict[str, pd.DataFrame], target_date: pd.Timestamp,
+                      min_history: int = 1) -> Dict[str, pd.DataFrame]:
+    """
+    Get ETF data up to a specific date (no future data leakage).
+
+    Args:
+        etf_data (Dict): Data for each ETF
+        target_date (pd.Timestamp): Target date
+        min_history (int): Skip symbols with fewer rows than this
+
+    Returns:
+        Dict: Slices (not copies) of each ETF's data up to and including target_date
+    """
+    data_subset = {}
+
+    for symbol, data in etf_data.items():
+        subset = frame_prefix(data, target_date)
+        if len(subset) >= max(min_history, 1):
+            data_subset[symbol] = subset
+
+    return data_subset
+
+
+class DailyEventLoop:
+    """Marks a PortfolioManager to market on every panel bar while rebalancing."""
+
+    def __init__(self, panel: PricePanel, portfolio: PortfolioManager):
+        """
+        Initialize the event loop.
+
+        Args:
+            panel (PricePanel): Aligned price panel
+            portfolio (PortfolioManager): Portfolio traded by the rebalance handler
+        """
+        self.panel = panel
+        self.portfolio = portfolio
+
+    def mark_to_market(self, position: int) -> float:
+        """
+        Portfolio value at a bar from the current holdings.
+
+        Args:
+            position (int): Column position of the bar
+
+        Returns:
+            float: Cash plus the held position at its last price on or before the bar
+        """
+        portfolio = self.portfolio
+        if portfolio.current_position is None:
+            return portfolio.current_cash
+
+        row = self.panel.symbol_index.get(portfolio.current_position)
+        if row is None or position < self.panel.first_bar[row]:
+            return portfolio.portfolio_value
+
+        price = self.panel.closes[row, min(position, self.panel.last_bar[row])]
+        return portfolio.current_cash + portfolio.current_shares * price
+
+    def run(self, start_position: int, end_position: int, rebalance_dates: List[pd.Timestamp],
+            on_rebalance: Callable[[int, pd.Timestamp, int], None]) -> Dict:
+        """
+        Simulate every bar between two positions.
+
+        Rebalance events fire in calendar order on the first bar at or after
+        the panel column they resolve to (their as-of column), before that
+        bar is marked. Events resolving before start_position fire ahead of
+        the first bar; events after end_position are not reached.
+
+        Args:
+            start_position (int): First bar of the equity curve
+            end_position (int): Last bar of the equity curve (inclusive)
+            rebalance_dates (List[pd.Timestamp]): Rebalancing dates
+            on_rebalance (Callable): Handler called as on_rebalance(index, rebalance_date, position)
+
+        Returns:
+            Dict: positions, dates (pd.DatetimeIndex), daily_values (np.ndarray)
+                and daily_returns (np.ndarray aligned with dates[1:]; 0 after a
+                non-positive value)
+        """
+        start_position = max(start_position, 0)
+        n_days = max(end_position - start_position + 1, 0)
+        daily_values = np.empty(n_days)
+
+        event_positions = self.panel.date_positions(pd.DatetimeIndex(rebalance_dates)) if rebalance_dates else []
+        n_events = len(event_positions)
+        event = 0
+
+        for day in range(n_days):
+            position = start_position + day
+
+            while event < n_events and event_positions[event] <= position:
+                on_rebalance(event, rebalance_dates[event], int(event_positions[event]))
+                event += 1
+
+            daily_values[day] = self.mark_to_market(position)
+
+        positions = np.arange(start_position, start_position + n_days)
+        previous = daily_values[:-1]
+
+        # One return per day after the first, so returns stay aligned with dates[1:]
+        daily_returns = np.divide(daily_values[1:], previous, out=np.ones_like(previous),
+                                  where=previous > 0) - 1
+
+        return {
+            "positions": positions,
+            "dates": pd.to_datetime(self.panel.dates[positions], utc=True),
+            "daily_values": daily_values,
+            "daily_returns": daily_returns
+        }
+
+
+class RebalanceSink:
+    """
+    Output hook of BacktestKernel.
+
+    Collects rebalance records into a history list and reports progress to
+    the 'momentum.backtest' logger: INFO for each rebalance (plain text on
+    stdout unless utils/structured_logging.configure_logging says otherwise),
+    DEBUG for the ranking listing. Messages are only built when the logger
+    would emit them; quiet sinks (benchmarks, parameter studies) only collect.
+    """
+
+    def __init__(self, history: Optional[List[Dict]] = None, label: str = 'Rebalance',
+                 verbose: bool = True):
+        """
+        Initialize the sink.
+
+        Args:
+            history (List[Dict]): List the records are appended to (default: new list)
+            label (str): Prefix of the per-rebalance progress lines
+            verbose (bool): Log progress
+        """
+        self.history = history if history is not None else []
+        self.label = label
+        self.verbose = verbose
+        self.date_label = None
+
+    def emits(self, level: int = logging.INFO) -> bool:
+        """Whether progress at this level would be emitted."""
+        return self.verbose and logger.isEnabledFor(level)
+
+    def parameters_validated(self):
+        """Report a passed parameter-lock check."""
+        if self.emits():
+            logger.info("Parameter validation passed - using frozen parameters from in-sample period",
+                        extra={'event': 'parameters_validated'})
+
+    def schedule(self, rebalance_dates: List[pd.Timestamp]):
+        """Report the rebalance calendar."""
+        if self.emits():
+            logger.info(f"\n{self.label} schedule: {len(rebalance_dates)} dates",
+                        extra={'event': 'schedule', 'label': self.label, 'rebalances': len(rebalance_dates)})
+
+    def rebalance_started(self, index: int, rebalance_date: pd.Timestamp):
+        """Report the start of a rebalance."""
+        if self.emits():
+            self.date_label = rebalance_date.strftime('%Y-%m-%d')
+            logger.info(f"\n--- {self.label} {index+1}: {self.date_label} ---",
+                        extra={'event': 'rebalance_started', 'label': self.label, 'index': index + 1,
+                               'date': self.date_label})
+
+    def rebalance_skipped(self, reason: str):
+        """Report a rebalance skipped for lack of data."""
+        if self.emits():
+            logger.info(f"  {reason}, skipping...",
+                        extra={'event': 'rebalance_skipped', 'date': self.date_label, 'reason': reason})
+
+    def rankings(self, top_etf: str, top_score: float, rankings: List):
+        """Report the momentum leader and the computed rankings."""
+        if self.emits():
+            logger.info(f"  Top ETF: {top_etf} (score: {top_score:.4f})",
+                        extra={'event': 'top_etf', 'date': self.date_label, 'symbol': top_etf,
+                               'score': float(top_score)})
+
+        # Only the leader unless full rankings were requested
+        if self.emits(logging.DEBUG):
+            for rank, (symbol, score) in enumerate(rankings, 1):
+                logger.debug(f"    {rank}. {symbol}: {score:.4f}",
+                             extra={'event': 'ranking', 'date': self.date_label, 'rank': rank,
+                                    'symbol': symbol, 'score': float(score)})
+
+    def record(self, rebalance_record: Dict, error: Optional[str] = None):
+        """
+        Store a rebalance record.
+
+        Args:
+            rebalance_record (Dict): Record built by the kernel
+            error (str): Rebalancing error, if the trade failed
+        """
+        if rebalance_record['rebalance_success']:
+            if self.emits():
+                value = rebalance_record['portfolio_value_after']
+                logger.info(f"  Rebalanced successfully to {rebalance_record['selected_etf']}\n"
+                            f"  Portfolio value: ${value:,.2f}",
+                            extra={'event': 'rebalanced', 'date': rebalance_record['date'],
+                                   'symbol': rebalance_record['selected_etf'], 'portfolio_value': value})
+        elif self.emits(logging.WARNING):
+            logger.warning(f"  Rebalancing failed: {error or 'Unknown error'}",
+                           extra={'event': 'rebalance_failed', 'date': rebalance_record['date'],
+                                  'symbol': rebalance_record['selected_etf'], 'error': error})
+
+        self.history.append(rebalance_record)
+
+
+class BacktestKernel:
+    """
+    Single-ETF momentum rotation over a PricePanel, marked to market daily.
+
+    Hooks:
+        calendar: calendar(start_date, end_date) -> rebalancing dates
+        parameter_check: parameter_check() -> bool, called once before the
+            run; a False result aborts it
+        sink: RebalanceSink receiving progress and rebalance records
+        instrumentation: Instrumentation timing the equity_curve,
+            momentum_scoring and rebalancing stages (disabled by default)
+    """
+
+    def __init__(self, panel: PricePanel, momentum_calculator: MomentumCalculator,
+                 portfolio: PortfolioManager,
+                 calendar: Callable[[str, str], List[pd.Timestamp]],
+                 min_history: int = 1, top_k: Optional[int] = 1,
+                 parameter_check: Optional[Callable[[], bool]] = None,
+                 sink: Optional[RebalanceSink] = None,
+                 record_fields: Optional[Dict] = None,
+                 instrumentation: Optional[Instrumentation] = None):
+        """
+        Initialize the kernel.
+
+        Args:
+            panel (PricePanel): Aligned price panel
+            momentum_calculator (MomentumCalculator): Scores the visible data
+            portfolio (PortfolioManager): Portfolio traded at each rebalance
+            calendar (Callable): Rebalance calendar hook
+            min_history (int): Skip symbols with fewer bars than this at a rebalance
+            top_k (int): Rank only the best k ETFs (None ranks every ETF)
+            parameter_check (Callable): Parameter-lock hook
+            sink (RebalanceSink): Output hook (default: verbose sink)
+            record_fields (Dict): Extra fields added to every rebalance record
+            instrumentation (Instrumentation): Stage timing hook (default: disabled)
+        """
+        self.panel = panel
+        self.momentum_calculator = momentum_calculator
+        self.portfolio = portfolio
+        self.calendar = calendar
+        self.min_history = min_history
+        self.top_k = top_k
+        self.parameter_check = parameter_check
+        self.sink = sink if sink is not None else RebalanceSink()
+        self.record_fields = record_fields or {}
+        self.instrumentation = instrumentation if instrumentation is not None else Instrumentation()
+
+    def run(self, start_date, end_date) -> Dict:
+        """
+        Simulate the strategy between two dates.
+
+        Args:
+            start_date: First day of the equity curve
+            end_date: Last day of the equity curve
+
+        Returns:
+            Dict: rebalance_dates, dates, daily_values, daily_returns (np.ndarray),
+                end_position and final_portfolio_value, or an error
+        """
+        if self.parameter_check is not None:
+            if not self.parameter_check():
+                return {"error": "Parameter validation failed - parameters have been modified"}
+            self.sink.parameters_validated()
+
+        rebalance_dates = self.calendar(start_date, end_date)
+        self.sink.schedule(rebalance_dates)
+
+        panel = self.panel
+        start_position = panel.date_position(pd.to_datetime(start_date, utc=True) - pd.Timedelta(1, 'ns')) + 1
+        end_position = panel.date_position(pd.to_datetime(end_date, utc=True))
+
+        # Rebalance stages nest inside the equity-curve stage
+        with self.instrumentation.stage('equity_curve'):
+            daily = DailyEventLoop(panel, self.portfolio).run(
+                start_position, end_position, rebalance_dates, self.process_rebalance)
+        self.instrumentation.count('bars', len(daily["daily_values"]))
+
+        return {
+            "rebalance_dates": rebalance_dates,
+            "dates": daily["dates"],
+            "daily_values": daily["daily_values"],
+            "daily_returns": daily["daily_returns"],
+            "end_position": end_position,
+            "final_portfolio_value": self.portfolio.update_portfolio_value_from_panel(panel, end_position)
+        }
+
+    def process_rebalance(self, i: int, rebalance_date: pd.Timestamp, position: int):
+        """
+        Rebalance to the top momentum ETF (event handler for DailyEventLoop).
+
+        Args:
+            i (int): Index of the rebalance date
+            rebalance_date (pd.Timestamp): Scheduled rebalancing date
+            position (int): Panel column of the last bar on or before the date
+        """
+        sink = self.sink
+        instrumentation = self.instrumentation
+        sink.rebalance_started(i, rebalance_date)
+        instrumentation.count('rebalance_events')
+
+        # Only data up to the rebalance date is visible (read-only view, no future data)
+        with instrumentation.stage('momentum_scoring'):
+            snapshot = self.panel.snapshot(position)
+            momentum_analysis = self.momentum_calculator.calculate_snapshot_momentum(
+                snapshot, min_history=self.min_history, top_k=self.top_k)
+
+        if not momentum_analysis['etf_analyses']:
+            instrumentation.count('rebalances_skipped')
+            sink.rebalance_skipped("No data available for this date")
+            return
+
+        if not momentum_analysis['rankings']:
+            instrumentation.count('rebalances_skipped')
+            sink.rebalance_skipped("No valid momentum rankings")
+            return
+
+        top_etf = momentum_analysis['top_etf']
+        top_score = momentum_analysis['rankings'][0][1]
+        sink.rankings(top_etf, top_score, momentum_analysis['rankings'])
+
+        date_label = rebalance_date.strftime('%Y-%m-%d')
+        with instrumentation.stage('rebalancing'):
+            # Update portfolio value before rebalancing
+            portfolio_value_before = self.portfolio.update_portfolio_value_from_panel(self.panel, position)
+            rebalance_result = self.portfolio.rebalance_to_etf(top_etf, snapshot.prices(), date_label)
+            if rebalance_result['success']:
+                portfolio_value_after = self.portfolio.update_portfolio_value_from_panel(self.panel, position)
+
+        rebalance_record = {
+            "date": date_label,
+            "selected_etf": top_etf,
+            "momentum_score": top_score,
+            "portfolio_value_before": portfolio_value_before,
+            "rebalance_success": rebalance_result['success'],
+            "rankings": momentum_analysis['rankings'],
+            **self.record_fields
+        }
+
+        if rebalance_result['success']:
+            instrumentation.count('trades', sum(action != "no_change" for action in rebalance_result['actions']))
+            rebalance_record["portfolio_value_after"] = portfolio_value_after
+
+        sink.record(rebalance_record, rebalance_result.get('error'))
+
+
+def benchmark_backtest_kernel(n_symbols: int = 50, n_days: int = 2520, repeats: int = 3,
+                              seed: int = 42) -> Dict:
+    """
+    Time the kernel in both engine modes on a synthetic panel.
+
+    In-sample mode uses MomentumBacktest's hooks (6-month warmup calendar,
+    no minimum history); out-of-sample mode uses OOSBacktestEngine's
+    (calendar from the start date, 30-bar minimum history, parameter check
+    before the run). Output goes to a quiet sink.
+
+    Args:
+        n_symbols (int): Number of synthetic symbols
+        n_days (int): Number of trading days
+        repeats (int): Runs per mode (the fastest is reported)
+        seed (int): Random seed for the synthetic prices
+
+    Returns:
+        Dict: Per-mode seconds, rebalance count and milliseconds per rebalance and per day
+    """
+    sys.path.append('backtesting')
+    from vectorized_backtest import monthly_rebalance_dates
+
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2015-01-01', periods=n_days, freq='B', tz='UTC')
+    etf_data = {}
+    for i in range(n_symbols):
+        # Stagger listing dates so short-history rules are exercised
+        start = int(rng.integers(0, n_days // 3))
+        closes = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.01, n_days - start)))
+        etf_data[f"SYM{i}"] = pd.DataFrame({'Date': dates[start:], 'Close': closes})
+    panel = PricePanel.from_frames(etf_data)
+
+    modes = {
+        'in_sample': {'warmup_months': 6, 'min_history': 1, 'parameter_check': None},
+        'out_of_sample': {'warmup_months': 0, 'min_history': 30, 'parameter_check': lambda: True}
+    }
+    start_date, end_date = dates[0].strftime('%Y-%m-%d'), dates[-1].strftime('%Y-%m-%d')
+
+    results = {"symbols": n_symbols, "days": n_days}
+    for mode, hooks in modes.items():
+        best = float('inf')
+        for _ in range(repeats):
+            kernel = BacktestKernel(
+                panel, MomentumCalculator(), PortfolioManager(100000, 0.001),
+                calendar=lambda start, end, warmup=hooks['warmup_months']: monthly_rebalance_dates(start, end, warmup),
+                min_history=hooks['min_history'], parameter_check=hooks['parameter_check'],
+                sink=RebalanceSink(verbose=False))
+            started = time.perf_counter()
+            run = kernel.run(start_date, end_date)
+            best = min(best, time.perf_counter() - started)
+
+        rebalances = len(kernel.sink.history)
+        results[mode] = {
+            "seconds": best,
+            "rebalances": rebalances,
+            "ms_per_rebalance": best * 1000 / max(rebalances, 1),
+            "ms_per_day": best * 1000 / max(len(run["daily_values"]), 1)
+        }
+
+    return results
+
+
+def test_backtest_core():
+    """Test the daily event loop against the segment-valued vectorized backtest."""
+
+    print("Testing Backtest Core...")
+
+    sys.path.append('backtesting')
+    from momentum_backtest import MomentumBacktest
+    from vectorized_backtest import VectorizedBacktest
+
+    start_date, end_date = '2023-06-01', '2025-07-18'
+
+    backtest = MomentumBacktest(etf_symbols=['SPY', 'QQQ', 'IWM'])
+    results = backtest.run_backtest(start_date, end_date)
+    if "error" in results:
+        print(f"Backtest failed: {results['error']}")
+        return False
+
+    vectorized = VectorizedBacktest(backtest.get_price_panel()).run([30, 90, 180], [0.5, 0.3, 0.2], start_date, end_date)
+
+    daily_values = backtest.daily_portfolio_values
+    print(f"\nDaily values recorded: {len(daily_values)}")
+    print(f"Matches vectorized equity curve: {np.allclose(daily_values, vectorized['equity_curve'], rtol=0, atol=1e-6)}")
+    print(f"Last daily value equals final value: {daily_values[-1] == results['final_portfolio_value']}")
+
+    matches = np.allclose(daily_values, vectorized['equity_curve'], rtol=0, atol=1e-6)
+    aligned = len(results['daily_returns']) == len(daily_values) - 1
+    print(f"One daily return per day after the first: {aligned}")
+
+    benchmark = benchmark_backtest_kernel()
+    print(f"\nKernel benchmark ({benchmark['symbols']} symbols x {benchmark['days']} days):")
+    for mode in ['in_sample', 'out_of_sample']:
+        timing = benchmark[mode]
+        print(f"  {mode}: {timing['seconds']:.3f}s, {timing['rebalances']} rebalances "
+              f"({timing['ms_per_rebalance']:.2f} ms each, {timing['ms_per_day']:.3f} ms/day)")
+
+    return matches and aligned
+
+
+if __name__ == "__main__":
+    # Run test when script is executed directly
+    test_backtest_core()
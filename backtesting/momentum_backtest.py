@@ -6,7 +6,6 @@ Combines all previous components into a complete backtesting framework.
 """
 
 import pandas as pd
-import numpy as np
 from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
 import sys
@@ -17,11 +16,15 @@ sys.path.append('src/data_providers')
 sys.path.append('src/portfolio')
 sys.path.append('strategies/scenario_based')
 sys.path.append('utils')
+sys.path.append('backtesting')
 
 from etf_data_fetcher import ETFDataFetcher
 from portfolio_manager import PortfolioManager
 from momentum_calculator import MomentumCalculator
 from data_validator import DataValidator
+from price_panel import PricePanel
+from backtest_core import BacktestKernel, RebalanceSink, frames_up_to_date
+from instrumentation import Instrumentation
 
 
 class MomentumBacktest:
@@ -30,7 +33,10 @@ class MomentumBacktest:
     def __init__(self, etf_symbols=['SPY', 'QQQ', 'IWM'], 
                  initial_capital=100000, 
                  transaction_cost_pct=0.001,
-                 rebalance_frequency='monthly'):
+                 rebalance_frequency='monthly',
+                 refresh_data=False,
+                 full_rankings=False,
+                 instrumentation=None):
         """
         Initialize backtest engine.
         
@@ -39,23 +45,34 @@ class MomentumBacktest:
             initial_capital (float): Starting capital
             transaction_cost_pct (float): Transaction cost percentage
             rebalance_frequency (str): How often to rebalance ('monthly')
+            refresh_data (bool): Incrementally fetch bars missing from local storage
+            full_rankings (bool): Rank every ETF at each rebalance instead of
+                selecting only the leader with a partial sort
+            instrumentation (Instrumentation): Per-stage timing and allocation
+                capture written to logs/ (default: disabled)
         """
         self.etf_symbols = etf_symbols
         self.initial_capital = initial_capital
         self.transaction_cost_pct = transaction_cost_pct
         self.rebalance_frequency = rebalance_frequency
+        self.refresh_data = refresh_data
+        self.full_rankings = full_rankings
         
         # Initialize components
         self.data_fetcher = ETFDataFetcher()
         self.validator = DataValidator()
         self.momentum_calculator = MomentumCalculator()
         self.portfolio = PortfolioManager(initial_capital, transaction_cost_pct)
+        self.instrumentation = instrumentation if instrumentation is not None else Instrumentation(label='momentum_backtest')
         
         # Results storage
         self.backtest_results = {}
         self.daily_portfolio_values = []
+        self.daily_dates = None
         self.rebalance_history = []
         self.etf_data = {}
+        self.price_panel = None
+        self._panel_source = None
     
     def load_etf_data(self, start_date, end_date):
         """
@@ -70,19 +87,31 @@ class MomentumBacktest:
         """
         print(f"Loading ETF data from {start_date} to {end_date}...")
         
+        loaded_data = {}
         for symbol in self.etf_symbols:
             print(f"  Loading {symbol}...")
             
-            # Try to load from file first
-            data = self.data_fetcher.load_data_from_csv(symbol)
+            # Append any bars newer than the stored history
+            if self.refresh_data:
+                fetch_end = (pd.to_datetime(end_date) + timedelta(days=1)).strftime('%Y-%m-%d')
+                self.data_fetcher.update_etf_data(symbol, fetch_end, start_date)
             
-            # If no data or insufficient data, fetch from API
-            if data.empty:
-                print(f"    Fetching {symbol} from API...")
-                data = self.data_fetcher.fetch_and_save_etf_data(symbol, start_date, end_date)
+            # Try to load from local storage first
+            loaded_data[symbol] = self.data_fetcher.load_data(symbol)
+        
+        # Download every symbol missing from storage in one concurrent batch
+        missing_symbols = [symbol for symbol, data in loaded_data.items() if data.empty]
+        if missing_symbols:
+            print(f"    Fetching {', '.join(missing_symbols)} from API...")
+            fetched_data, _ = self.data_fetcher.fetch_many(missing_symbols, start_date, end_date, save=True)
+            loaded_data.update(fetched_data)
+        
+        for symbol in self.etf_symbols:
+            data = loaded_data[symbol]
             
             # Validate data
-            validation = self.validator.validate_etf_data(data, symbol)
+            with self.instrumentation.stage('data_validation'):
+                validation = self.validator.validate_etf_data(data, symbol)
             if validation['overall_status'] == 'error':
                 print(f"    ERROR: Invalid data for {symbol}")
                 return False
@@ -101,8 +130,27 @@ class MomentumBacktest:
             self.etf_data[symbol] = filtered_data.sort_values('Date')
             print(f"    Loaded {len(filtered_data)} days of {symbol} data")
         
+        # Align all symbols into one panel for position-based lookups
+        self.price_panel = PricePanel.from_frames(self.etf_data)
+        self._panel_source = self.etf_data
+        
         return True
     
+    def get_price_panel(self):
+        """
+        Get the aligned price panel for the loaded ETF data.
+        
+        Builds the panel on first use when etf_data was assigned directly.
+        
+        Returns:
+            PricePanel: Aligned price panel
+        """
+        if self.price_panel is None or self._panel_source is not self.etf_data:
+            self.price_panel = PricePanel.from_frames(self.etf_data)
+            self._panel_source = self.etf_data
+        
+        return self.price_panel
+    
     def get_rebalance_dates(self, start_date, end_date):
         """
         Generate list of rebalancing dates.
@@ -137,19 +185,8 @@ class MomentumBacktest:
         Returns:
             dict: Dictionary with symbol: price pairs
         """
-        prices = {}
-        
-        for symbol, data in self.etf_data.items():
-            # Find closest date (on or before target date)
-            available_dates = data[data['Date'] <= target_date]
-            
-            if len(available_dates) == 0:
-                continue  # No data available for this date
-            
-            closest_data = available_dates.iloc[-1]
-            prices[symbol] = closest_data['Close']
-        
-        return prices
+        panel = self.get_price_panel()
+        return panel.prices_at(panel.date_position(target_date))
     
     def get_data_up_to_date(self, target_date):
         """
@@ -161,15 +198,20 @@ class MomentumBacktest:
         Returns:
             dict: Dictionary with symbol: DataFrame pairs
         """
-        data_subset = {}
-        
-        for symbol, data in self.etf_data.items():
-            # Get all data up to and including target date
-            subset = data[data['Date'] <= target_date].copy()
-            if len(subset) > 0:
-                data_subset[symbol] = subset
+        return frames_up_to_date(self.etf_data, target_date)
+    
+    def get_data_view_up_to_date(self, target_date):
+        """
+        Get a read-only, zero-copy view of ETF data up to a specific date.
         
-        return data_subset
+        Args:
+            target_date (pd.Timestamp): Target date
+            
+        Returns:
+            PanelSnapshot: Panel view that rejects access after target_date
+        """
+        panel = self.get_price_panel()
+        return panel.snapshot(panel.date_position(target_date))
     
     def run_backtest(self, start_date, end_date):
         """
@@ -188,71 +230,28 @@ class MomentumBacktest:
         print(f"Initial Capital: ${self.initial_capital:,.2f}")
         print(f"Transaction Cost: {self.transaction_cost_pct*100:.2f}%")
         
+        self.instrumentation.start()
+        
         # Load data
-        if not self.load_etf_data(start_date, end_date):
+        with self.instrumentation.stage('data_loading'):
+            loaded = self.load_etf_data(start_date, end_date)
+        if not loaded:
+            self.instrumentation.stop()
             return {"error": "Failed to load ETF data"}
         
-        # Get rebalancing dates
-        rebalance_dates = self.get_rebalance_dates(start_date, end_date)
-        print(f"\\nRebalancing on {len(rebalance_dates)} dates")
-        
-        # Run backtest
-        for i, rebalance_date in enumerate(rebalance_dates):
-            print(f"\\n--- Rebalance {i+1}: {rebalance_date.strftime('%Y-%m-%d')} ---")
-            
-            # Get data up to rebalance date
-            current_data = self.get_data_up_to_date(rebalance_date)
-            
-            # Calculate momentum scores
-            momentum_analysis = self.momentum_calculator.calculate_multi_etf_momentum(current_data)
-            
-            if not momentum_analysis['rankings']:
-                print("  No valid momentum rankings, skipping...")
-                continue
-            
-            # Get top ETF
-            top_etf = momentum_analysis['top_etf']
-            top_score = momentum_analysis['rankings'][0][1]
-            
-            print(f"  Top ETF: {top_etf} (score: {top_score:.4f})")
-            
-            # Print all rankings
-            for rank, (symbol, score) in enumerate(momentum_analysis['rankings'], 1):
-                print(f"    {rank}. {symbol}: {score:.4f}")
-            
-            # Get current prices
-            current_prices = self.get_prices_on_date(rebalance_date)
-            
-            # Update portfolio value before rebalancing
-            portfolio_value_before = self.portfolio.update_portfolio_value(current_prices)
-            
-            # Rebalance to top ETF
-            rebalance_result = self.portfolio.rebalance_to_etf(
-                top_etf, current_prices, rebalance_date.strftime('%Y-%m-%d'))
-            
-            # Record rebalancing
-            rebalance_record = {
-                "date": rebalance_date.strftime('%Y-%m-%d'),
-                "selected_etf": top_etf,
-                "momentum_score": top_score,
-                "portfolio_value_before": portfolio_value_before,
-                "rebalance_success": rebalance_result['success'],
-                "rankings": momentum_analysis['rankings']
-            }
-            
-            if rebalance_result['success']:
-                portfolio_value_after = self.portfolio.update_portfolio_value(current_prices)
-                rebalance_record["portfolio_value_after"] = portfolio_value_after
-                print(f"  Rebalanced successfully to {top_etf}")
-                print(f"  Portfolio value: ${portfolio_value_after:,.2f}")
-            else:
-                print(f"  Rebalancing failed: {rebalance_result.get('error', 'Unknown error')}")
-            
-            self.rebalance_history.append(rebalance_record)
+        # Run backtest: rebalance on schedule and mark to market every day
+        kernel = BacktestKernel(
+            self.get_price_panel(), self.momentum_calculator, self.portfolio,
+            calendar=self.get_rebalance_dates,
+            top_k=None if self.full_rankings else 1,
+            sink=RebalanceSink(self.rebalance_history),
+            instrumentation=self.instrumentation)
+        run = kernel.run(start_date, end_date)
+        self.daily_dates = run["dates"]
+        self.daily_portfolio_values = run["daily_values"]
         
         # Calculate final results
-        final_prices = self.get_prices_on_date(pd.to_datetime(end_date, utc=True))
-        final_portfolio_value = self.portfolio.update_portfolio_value(final_prices)
+        final_portfolio_value = run["final_portfolio_value"]
         
         self.backtest_results = {
             "start_date": start_date,
@@ -262,9 +261,17 @@ class MomentumBacktest:
             "total_return": (final_portfolio_value / self.initial_capital - 1) * 100,
             "rebalance_count": len(self.rebalance_history),
             "transaction_summary": self.portfolio.get_transaction_summary(),
-            "final_position": self.portfolio.get_current_position()
+            "final_position": self.portfolio.get_current_position(),
+            "daily_returns": run["daily_returns"].tolist()
         }
         
+        # Per-stage breakdown into logs/ when instrumentation is enabled
+        report_path = self.instrumentation.finish()
+        if report_path:
+            self.instrumentation.print_report()
+            print(f"Instrumentation report written to {report_path}")
+            self.backtest_results["instrumentation_report"] = report_path
+        
         return self.backtest_results
     
     def print_backtest_summary(self):
@@ -328,7 +335,19 @@ def test_momentum_backtest():
     # Print results
     backtest.print_backtest_summary()
     
-    return True
+    # Instrumented rerun: per-stage time and allocation breakdown
+    import tempfile
+    with tempfile.TemporaryDirectory() as log_dir:
+        instrumented = MomentumBacktest(
+            etf_symbols=['SPY', 'QQQ', 'IWM'],
+            instrumentation=Instrumentation(trace_memory=True, log_dir=log_dir, label='momentum_backtest')
+        )
+        instrumented_results = instrumented.run_backtest(start_date, end_date)
+    
+    same = instrumented_results['final_portfolio_value'] == results['final_portfolio_value']
+    print(f"Instrumented run matches: {same}")
+    
+    return same
 
 
 if __name__ == "__main__":
@@ -12,6 +12,7 @@ from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
 import sys
 import os
+from functools import partial
 from typing import Dict, List, Tuple, Optional
 
 # Add paths to import our modules
@@ -27,21 +28,34 @@ from momentum_calculator import MomentumCalculator
 from data_validator import DataValidator
 from data_split_manager import DataSplitManager
 from oos_validator import OutOfSampleValidator
+from price_panel import PricePanel
+from backtest_core import BacktestKernel, RebalanceSink, frames_up_to_date
+from instrumentation import Instrumentation
 
 
 class OOSBacktestEngine:
     """Runs out-of-sample backtest with frozen parameters."""
     
-    def __init__(self, frozen_parameters: Dict, initial_capital: float = 100000):
+    # Minimum bars a symbol needs before it is scored (monthly momentum)
+    MIN_HISTORY_DAYS = 30
+    
+    def __init__(self, frozen_parameters: Dict, initial_capital: float = 100000,
+                 full_rankings: bool = False, instrumentation: Optional[Instrumentation] = None):
         """
         Initialize OOS backtest engine with frozen parameters.
         
         Args:
             frozen_parameters (Dict): Strategy parameters that cannot be changed
             initial_capital (float): Starting capital for backtest
+            full_rankings (bool): Rank every ETF at each rebalance instead of
+                selecting only the leader with a partial sort
+            instrumentation (Instrumentation): Per-stage timing and allocation
+                capture written to logs/ (default: disabled)
         """
         self.frozen_parameters = frozen_parameters.copy()
         self.initial_capital = initial_capital
+        self.full_rankings = full_rankings
+        self.instrumentation = instrumentation if instrumentation is not None else Instrumentation(label='oos_backtest')
         
         # Create parameter lock
         self.oos_validator = OutOfSampleValidator()
@@ -61,8 +75,27 @@ class OOSBacktestEngine:
         # Results storage
         self.oos_results = {}
         self.daily_portfolio_values = []
+        self.daily_dates = None
         self.rebalance_history = []
         self.parameter_validation_log = []
+        self.price_panel = None
+        self._panel_source = None
+    
+    def get_price_panel(self, oos_data: Dict[str, pd.DataFrame]) -> PricePanel:
+        """
+        Get the aligned price panel for a data dictionary, building it once.
+        
+        Args:
+            oos_data (Dict): Data for each ETF
+            
+        Returns:
+            PricePanel: Aligned price panel
+        """
+        if self.price_panel is None or self._panel_source is not oos_data:
+            self.price_panel = PricePanel.from_frames(oos_data)
+            self._panel_source = oos_data
+        
+        return self.price_panel
     
     def validate_parameters_unchanged(self, current_parameters: Dict) -> bool:
         """
@@ -111,84 +144,35 @@ class OOSBacktestEngine:
             'etf_symbols': list(oos_data.keys())
         }
         
-        if not self.validate_parameters_unchanged(current_params):
-            return {"error": "Parameter validation failed - parameters have been modified"}
-        
-        print(f"Parameter validation passed - using frozen parameters from in-sample period")
-        
-        # Get rebalancing dates for OOS period
-        rebalance_dates = self.get_oos_rebalance_dates(start_date, end_date)
-        print(f"OOS rebalancing on {len(rebalance_dates)} dates")
-        
-        # Track daily portfolio values
         self.daily_portfolio_values = []
         self.rebalance_history = []
-        
-        # Run OOS backtest
-        for i, rebalance_date in enumerate(rebalance_dates):
-            print(f"\n--- OOS Rebalance {i+1}: {rebalance_date.strftime('%Y-%m-%d')} ---")
-            
-            # Get data up to rebalance date (no future data)
-            current_data = self.get_data_up_to_date(oos_data, rebalance_date)
-            
-            if not current_data:
-                print("  No data available for this date, skipping...")
-                continue
-            
-            # Calculate momentum scores using FROZEN parameters
-            momentum_analysis = self.momentum_calculator.calculate_multi_etf_momentum(current_data)
-            
-            if not momentum_analysis['rankings']:
-                print("  No valid momentum rankings, skipping...")
-                continue
-            
-            # Get top ETF
-            top_etf = momentum_analysis['top_etf']
-            top_score = momentum_analysis['rankings'][0][1]
-            
-            print(f"  Top ETF: {top_etf} (score: {top_score:.4f})")
-            
-            # Print all rankings
-            for rank, (symbol, score) in enumerate(momentum_analysis['rankings'], 1):
-                print(f"    {rank}. {symbol}: {score:.4f}")
-            
-            # Get current prices
-            current_prices = self.get_prices_on_date(oos_data, rebalance_date)
-            
-            # Update portfolio value before rebalancing
-            portfolio_value_before = self.portfolio.update_portfolio_value(current_prices)
-            
-            # Rebalance to top ETF using FROZEN parameters
-            rebalance_result = self.portfolio.rebalance_to_etf(
-                top_etf, current_prices, rebalance_date.strftime('%Y-%m-%d'))
-            
-            # Record rebalancing
-            rebalance_record = {
-                "date": rebalance_date.strftime('%Y-%m-%d'),
-                "selected_etf": top_etf,
-                "momentum_score": top_score,
-                "portfolio_value_before": portfolio_value_before,
-                "rebalance_success": rebalance_result['success'],
-                "rankings": momentum_analysis['rankings'],
-                "oos_period": True  # Flag to identify OOS decisions
-            }
-            
-            if rebalance_result['success']:
-                portfolio_value_after = self.portfolio.update_portfolio_value(current_prices)
-                rebalance_record["portfolio_value_after"] = portfolio_value_after
-                print(f"  Rebalanced successfully to {top_etf}")
-                print(f"  Portfolio value: ${portfolio_value_after:,.2f}")
-            else:
-                print(f"  Rebalancing failed: {rebalance_result.get('error', 'Unknown error')}")
-            
-            self.rebalance_history.append(rebalance_record)
-        
-        # Calculate final OOS results
-        final_prices = self.get_prices_on_date(oos_data, pd.to_datetime(end_date, utc=True))
-        final_portfolio_value = self.portfolio.update_portfolio_value(final_prices)
-        
-        # Calculate daily returns for the OOS period
-        daily_returns = self.calculate_oos_daily_returns(oos_data, start_date, end_date)
+        self.instrumentation.start()
+        
+        # Align the OOS frames into the price panel
+        with self.instrumentation.stage('data_loading'):
+            panel = self.get_price_panel(oos_data)
+        
+        # Run OOS backtest behind the parameter lock: rebalance on schedule and mark to market every day
+        kernel = BacktestKernel(
+            panel, self.momentum_calculator, self.portfolio,
+            calendar=self.get_oos_rebalance_dates,
+            min_history=self.MIN_HISTORY_DAYS,
+            top_k=None if self.full_rankings else 1,
+            parameter_check=partial(self.validate_parameters_unchanged, current_params),
+            sink=RebalanceSink(self.rebalance_history, label='OOS Rebalance'),
+            record_fields={"oos_period": True},  # Flag to identify OOS decisions
+            instrumentation=self.instrumentation)
+        run = kernel.run(start_date, end_date)
+        if "error" in run:
+            self.instrumentation.stop()
+            return run
+        
+        self.daily_dates = run["dates"]
+        self.daily_portfolio_values = run["daily_values"]
+        final_portfolio_value = run["final_portfolio_value"]
+        
+        # Daily returns from the marked-to-market equity curve
+        daily_returns = run["daily_returns"].tolist()
         
         self.oos_results = {
             "backtest_type": "out_of_sample",
@@ -206,6 +190,13 @@ class OOSBacktestEngine:
             "rebalance_history": self.rebalance_history
         }
         
+        # Per-stage breakdown into logs/ when instrumentation is enabled
+        report_path = self.instrumentation.finish()
+        if report_path:
+            self.instrumentation.print_report()
+            print(f"Instrumentation report written to {report_path}")
+            self.oos_results["instrumentation_report"] = report_path
+        
         return self.oos_results
     
     def get_oos_rebalance_dates(self, start_date: str, end_date: str) -> List[pd.Timestamp]:
@@ -242,18 +233,23 @@ class OOSBacktestEngine:
         Returns:
             Dict: Data subset up to target date
         """
-        data_subset = {}
+        # For OOS testing, we need all available historical data plus OOS data up to target date
+        return frames_up_to_date(oos_data, target_date, self.MIN_HISTORY_DAYS)
+    
+    def get_data_view_up_to_date(self, oos_data: Dict[str, pd.DataFrame],
+                                 target_date: pd.Timestamp):
+        """
+        Get a read-only, zero-copy view of ETF data up to a specific date.
         
-        for symbol, data in oos_data.items():
-            # Get all data up to and including target date
-            subset = data[data['Date'] <= target_date].copy()
+        Args:
+            oos_data (Dict): OOS data for each ETF
+            target_date (pd.Timestamp): Target date
             
-            # Need sufficient data for momentum calculation
-            # For OOS testing, we need all available historical data plus OOS data up to target date
-            if len(subset) >= 30:  # Minimum for monthly momentum
-                data_subset[symbol] = subset
-        
-        return data_subset
+        Returns:
+            PanelSnapshot: Panel view that rejects access after target_date
+        """
+        panel = self.get_price_panel(oos_data)
+        return panel.snapshot(panel.date_position(target_date))
     
     def get_prices_on_date(self, oos_data: Dict[str, pd.DataFrame], 
                           target_date: pd.Timestamp) -> Dict[str, float]:
@@ -267,60 +263,39 @@ class OOSBacktestEngine:
         Returns:
             Dict: Prices for each ETF
         """
-        prices = {}
-        
-        for symbol, data in oos_data.items():
-            # Find closest date (on or before target date)
-            available_dates = data[data['Date'] <= target_date]
-            
-            if len(available_dates) == 0:
-                continue
-            
-            closest_data = available_dates.iloc[-1]
-            prices[symbol] = closest_data['Close']
-        
-        return prices
+        panel = self.get_price_panel(oos_data)
+        return panel.prices_at(panel.date_position(target_date))
     
     def calculate_oos_daily_returns(self, oos_data: Dict[str, pd.DataFrame], 
                                    start_date: str, end_date: str) -> List[float]:
         """
         Calculate daily portfolio returns for OOS period.
         
+        Uses the equity curve marked to market by the last run, so each day
+        is valued with the holdings actually held on that day.
+        
         Args:
-            oos_data (Dict): OOS data for each ETF
+            oos_data (Dict): OOS data for each ETF (kept for compatibility)
             start_date (str): Start date
             end_date (str): End date
             
         Returns:
             List[float]: Daily returns
         """
-        # Get all trading dates in OOS period
-        all_dates = set()
-        for data in oos_data.values():
-            dates = data[(data['Date'] >= start_date) & (data['Date'] <= end_date)]['Date']
-            all_dates.update(dates)
-        
-        trading_dates = sorted(list(all_dates))
-        
-        if len(trading_dates) < 2:
+        if self.daily_dates is None:
             return []
         
-        # Calculate daily portfolio values
-        daily_values = []
+        in_period = ((self.daily_dates >= pd.to_datetime(start_date, utc=True)) &
+                     (self.daily_dates <= pd.to_datetime(end_date, utc=True)))
+        daily_values = np.asarray(self.daily_portfolio_values)[in_period]
         
-        for date in trading_dates:
-            prices = self.get_prices_on_date(oos_data, date)
-            portfolio_value = self.portfolio.update_portfolio_value(prices)
-            daily_values.append(portfolio_value)
+        if len(daily_values) < 2:
+            return []
         
-        # Calculate daily returns
-        daily_returns = []
-        for i in range(1, len(daily_values)):
-            if daily_values[i-1] > 0:
-                ret = (daily_values[i] / daily_values[i-1]) - 1
-                daily_returns.append(ret)
+        previous = daily_values[:-1]
+        daily_returns = daily_values[1:][previous > 0] / previous[previous > 0] - 1
         
-        return daily_returns
+        return daily_returns.tolist()
     
     def ensure_no_parameter_fitting(self) -> Dict:
         """
@@ -435,9 +410,9 @@ def test_oos_backtest_engine():
     
     # Load ETF data
     fetcher = ETFDataFetcher()
-    spy_data = fetcher.load_data_from_csv('SPY')
-    qqq_data = fetcher.load_data_from_csv('QQQ')
-    iwm_data = fetcher.load_data_from_csv('IWM')
+    spy_data = fetcher.load_data('SPY')
+    qqq_data = fetcher.load_data('QQQ')
+    iwm_data = fetcher.load_data('IWM')
     
     if spy_data.empty:
         print("No ETF data found. Run data fetcher first.")
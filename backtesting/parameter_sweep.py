@@ -0,0 +1,391 @@
+"""
+Parameter Sweep Module
+
+Grid and random search over momentum periods, weights and transaction
+costs on the in-sample split. Every configuration runs through
+VectorizedBacktest against one shared LookbackReturnCache, and batches of
+configurations are spread across cores with a process pool. Independent
+module that can be tested separately.
+"""
+
+import pandas as pd
+import numpy as np
+import json
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import combinations, product
+import os
+import sys
+import time
+from typing import Dict, List, Optional
+
+# Add paths to import our modules
+sys.path.append('utils')
+sys.path.append('backtesting')
+
+from price_panel import PricePanel
+from vectorized_backtest import VectorizedBacktest, LookbackReturnCache, monthly_rebalance_dates
+
+
+def weight_grid(n_periods: int, step: float = 0.1, min_weight: float = 0.0) -> List[List[float]]:
+    """
+    All weight vectors on a grid that sum to 1.0.
+
+    Args:
+        n_periods (int): Number of weights per vector
+        step (float): Grid spacing
+        min_weight (float): Smallest weight allowed for any period
+
+    Returns:
+        List[List[float]]: Weight vectors
+    """
+    units = int(round(1.0 / step))
+    min_units = int(np.ceil(min_weight / step - 1e-9))
+    vectors = []
+
+    for split in product(range(min_units, units + 1), repeat=n_periods - 1):
+        last = units - sum(split)
+        if last >= min_units:
+            vectors.append([round(u * step, 10) for u in split + (last,)])
+
+    return vectors
+
+
+def period_grid(candidates: List[int], n_periods: int = 3) -> List[List[int]]:
+    """
+    All ascending lookback-period combinations drawn from candidate lengths.
+
+    Args:
+        candidates (List[int]): Candidate lookbacks in days
+        n_periods (int): Periods per combination
+
+    Returns:
+        List[List[int]]: Period combinations
+    """
+    return [list(combo) for combo in combinations(sorted(set(candidates)), n_periods)]
+
+
+def grid_configurations(period_sets: List[List[int]], weight_sets: List[List[float]],
+                        cost_levels: List[float]) -> List[Dict]:
+    """
+    Full cartesian grid of sweep configurations.
+
+    Args:
+        period_sets (List[List[int]]): Period combinations
+        weight_sets (List[List[float]]): Weight vectors (same length as the periods)
+        cost_levels (List[float]): Transaction cost percentages
+
+    Returns:
+        List[Dict]: Configurations with config_id, periods, weights, transaction_cost_pct
+    """
+    configs = []
+
+    for periods, weights, cost in product(period_sets, weight_sets, cost_levels):
+        if len(periods) != len(weights):
+            continue
+        configs.append({
+            "config_id": len(configs),
+            "periods": list(periods),
+            "weights": list(weights),
+            "transaction_cost_pct": cost
+        })
+
+    return configs
+
+
+def random_configurations(n_configs: int, period_candidates: List[int], n_periods: int = 3,
+                          cost_levels: List[float] = (0.001,), weight_step: float = 0.05,
+                          seed: int = 42) -> List[Dict]:
+    """
+    Random sample of sweep configurations.
+
+    Weights are drawn from a flat Dirichlet and snapped to weight_step so
+    they still sum to 1.0 and pass MomentumCalculator validation.
+
+    Args:
+        n_configs (int): Number of configurations
+        period_candidates (List[int]): Candidate lookbacks in days
+        n_periods (int): Periods per configuration
+        cost_levels (List[float]): Transaction cost percentages to sample from
+        weight_step (float): Weight grid spacing
+        seed (int): Random seed
+
+    Returns:
+        List[Dict]: Configurations with config_id, periods, weights, transaction_cost_pct
+    """
+    rng = np.random.default_rng(seed)
+    candidates = np.array(sorted(set(period_candidates)))
+    units = int(round(1.0 / weight_step))
+    configs = []
+
+    for config_id in range(n_configs):
+        periods = np.sort(rng.choice(candidates, n_periods, replace=False))
+
+        # Snap to the grid, then hand the rounding remainder to the largest weight
+        weight_units = np.floor(rng.dirichlet(np.ones(n_periods)) * units).astype(int)
+        weight_units[np.argmax(weight_units)] += units - weight_units.sum()
+
+        configs.append({
+            "config_id": config_id,
+            "periods": [int(p) for p in periods],
+            "weights": [round(u * weight_step, 10) for u in weight_units],
+            "transaction_cost_pct": float(rng.choice(cost_levels))
+        })
+
+    return configs
+
+
+def equity_metrics(equity: np.ndarray) -> Dict:
+    """
+    Headline metrics for a daily equity curve.
+
+    Definitions follow PerformanceComparator.calculate_performance_metrics.
+
+    Args:
+        equity (np.ndarray): Daily portfolio values
+
+    Returns:
+        Dict: annualized_volatility, annualized_sharpe and max_drawdown_pct
+    """
+    if len(equity) < 2:
+        return {"annualized_volatility": 0.0, "annualized_sharpe": 0.0, "max_drawdown_pct": 0.0}
+
+    returns = equity[1:] / equity[:-1] - 1
+    volatility = np.std(returns, ddof=1) if len(returns) > 1 else 0.0
+    sharpe = np.mean(returns) / volatility if volatility > 0 else 0.0
+
+    running_max = np.maximum.accumulate(equity)
+    max_drawdown = np.min((equity - running_max) / running_max)
+
+    return {
+        "annualized_volatility": volatility * np.sqrt(252),
+        "annualized_sharpe": sharpe * np.sqrt(252),
+        "max_drawdown_pct": max_drawdown * 100
+    }
+
+
+def evaluate_configuration(backtest: VectorizedBacktest, config: Dict,
+                           start_date, end_date, rebalance_dates) -> Dict:
+    """
+    Run one configuration and flatten its results into a table row.
+
+    Args:
+        backtest (VectorizedBacktest): Backtest sharing the sweep's return cache
+        config (Dict): Configuration from grid_configurations/random_configurations
+        start_date: Start of the in-sample period
+        end_date: End of the in-sample period
+        rebalance_dates (list): Shared rebalancing calendar
+
+    Returns:
+        Dict: Configuration, metrics and run time in seconds
+    """
+    start = time.perf_counter()
+    results = backtest.run(config["periods"], config["weights"], start_date, end_date,
+                           rebalance_dates=rebalance_dates,
+                           transaction_cost_pct=config["transaction_cost_pct"])
+    metrics = equity_metrics(results["equity_curve"])
+    elapsed = time.perf_counter() - start
+
+    summary = results["transaction_summary"]
+    return {
+        "config_id": config["config_id"],
+        "periods": json.dumps(config["periods"]),
+        "weights": json.dumps(config["weights"]),
+        "transaction_cost_pct": config["transaction_cost_pct"],
+        "final_portfolio_value": results["final_portfolio_value"],
+        "total_return_pct": results["total_return"],
+        **metrics,
+        "rebalance_count": results["rebalance_count"],
+        "total_transactions": summary["total_transactions"],
+        "total_transaction_costs": summary.get("total_transaction_costs", 0.0),
+        "seconds": elapsed
+    }
+
+
+# Per-process backtest, built once by the pool initializer
+_worker_backtest = None
+
+
+def _init_worker(panel: PricePanel, initial_capital: float, min_history: int):
+    """Receive the panel once per worker process and build its return cache."""
+    global _worker_backtest
+    _worker_backtest = VectorizedBacktest(panel, initial_capital, min_history=min_history)
+
+
+def _run_batch(configs: List[Dict], start_date, end_date, rebalance_dates) -> List[Dict]:
+    """Evaluate a batch of configurations inside a worker process."""
+    return [evaluate_configuration(_worker_backtest, config, start_date, end_date, rebalance_dates)
+            for config in configs]
+
+
+class ParameterSweep:
+    """Evaluates many momentum configurations over one in-sample price panel."""
+
+    def __init__(self, panel: PricePanel, initial_capital: float = 100000,
+                 min_history: int = 1, max_workers: Optional[int] = None,
+                 batch_size: int = 100):
+        """
+        Initialize the sweep.
+
+        Args:
+            panel (PricePanel): In-sample price panel
+            initial_capital (float): Starting capital for every configuration
+            min_history (int): Skip symbols with fewer bars than this at a rebalance
+            max_workers (int): Worker processes (default: CPU count, 1 runs in-process)
+            batch_size (int): Configurations sent to a worker per task
+        """
+        self.panel = panel
+        self.initial_capital = initial_capital
+        self.min_history = min_history
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self._return_cache = None
+
+    @property
+    def return_cache(self) -> LookbackReturnCache:
+        """Return cache for the in-process path, built on first use (workers build their own)."""
+        if self._return_cache is None:
+            self._return_cache = LookbackReturnCache(self.panel)
+        return self._return_cache
+
+    @classmethod
+    def from_frames(cls, in_sample_data: Dict[str, pd.DataFrame], **kwargs) -> 'ParameterSweep':
+        """
+        Build a sweep from the in-sample split produced by DataSplitManager.
+
+        Args:
+            in_sample_data (Dict): Symbol -> in-sample DataFrame
+            **kwargs: Passed to ParameterSweep
+
+        Returns:
+            ParameterSweep: Sweep over the aligned in-sample panel
+        """
+        return cls(PricePanel.from_frames(in_sample_data), **kwargs)
+
+    def run(self, configs: List[Dict], start_date=None, end_date=None,
+            output_path: Optional[str] = None, rebalance_dates=None) -> pd.DataFrame:
+        """
+        Evaluate every configuration.
+
+        Args:
+            configs (List[Dict]): Configurations to evaluate
+            start_date: Start of the in-sample period (default: first panel date)
+            end_date: End of the in-sample period (default: last panel date)
+            output_path (str): Write the results table to this CSV path
+            rebalance_dates (list): Rebalancing dates (default: monthly after a 6-month warmup)
+
+        Returns:
+            pd.DataFrame: One row per configuration with metrics and per-configuration timing
+        """
+        panel = self.panel
+        start_date = panel.timestamp(0) if start_date is None else pd.to_datetime(start_date, utc=True)
+        end_date = panel.timestamp(len(panel) - 1) if end_date is None else pd.to_datetime(end_date, utc=True)
+        if rebalance_dates is None:
+            rebalance_dates = monthly_rebalance_dates(start_date, end_date)
+
+        workers = min(self.max_workers, max(1, len(configs) // self.batch_size))
+        print(f"Sweeping {len(configs)} configurations on {workers} worker(s)...")
+
+        start = time.perf_counter()
+        if workers == 1:
+            backtest = VectorizedBacktest(panel, self.initial_capital,
+                                          return_cache=self.return_cache, min_history=self.min_history)
+            rows = [evaluate_configuration(backtest, config, start_date, end_date, rebalance_dates)
+                    for config in configs]
+        else:
+            batches = [configs[i:i + self.batch_size] for i in range(0, len(configs), self.batch_size)]
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(panel, self.initial_capital, self.min_history)) as executor:
+                futures = [executor.submit(_run_batch, batch, start_date, end_date, rebalance_dates)
+                           for batch in batches]
+                rows = [row for future in futures for row in future.result()]
+        elapsed = time.perf_counter() - start
+
+        results = pd.DataFrame(rows).sort_values('config_id').reset_index(drop=True)
+        print(f"Sweep finished in {elapsed:.2f}s ({elapsed / max(len(configs), 1) * 1000:.2f} ms per configuration)")
+
+        if output_path:
+            os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+            results.to_csv(output_path, index=False)
+            print(f"Results written to {output_path}")
+
+        return results
+
+    @staticmethod
+    def best_parameters(results: pd.DataFrame, metric: str = 'annualized_sharpe',
+                        configs: Optional[List[Dict]] = None) -> Dict:
+        """
+        Strategy parameters of the best configuration by a metric.
+
+        Args:
+            results (pd.DataFrame): Table returned by run (or read back from its CSV)
+            metric (str): Column to maximize
+            configs (List[Dict]): Configurations passed to run; the best row is
+                looked up by config_id (default: decode the JSON columns)
+
+        Returns:
+            Dict: periods, weights and transaction_cost_pct of the best row
+        """
+        best = results.loc[results[metric].idxmax()]
+        if configs is not None:
+            config = next(config for config in configs if config["config_id"] == best["config_id"])
+            periods, weights = config["periods"], config["weights"]
+        else:
+            periods, weights = (json.loads(value) if isinstance(value, str) else value
+                                for value in (best["periods"], best["weights"]))
+
+        return {
+            "periods": [int(p) for p in periods],
+            "weights": [float(w) for w in weights],
+            "transaction_cost_pct": float(best["transaction_cost_pct"])
+        }
+
+
+def test_parameter_sweep():
+    """Test function to verify the parameter sweep works correctly."""
+
+    print("Testing Parameter Sweep...")
+
+    sys.path.append('src/data_providers')
+    from etf_data_fetcher import ETFDataFetcher
+    from data_split_manager import DataSplitManager
+
+    fetcher = ETFDataFetcher()
+    etf_data = {symbol: fetcher.load_data(symbol) for symbol in ['SPY', 'QQQ', 'IWM']}
+    if any(data.empty for data in etf_data.values()):
+        print("Missing ETF data. Run data fetcher first.")
+        return False
+
+    in_sample_data, _ = DataSplitManager().split_multiple_etfs(etf_data, '2025-01-01')
+    sweep = ParameterSweep.from_frames(in_sample_data)
+
+    periods = period_grid([21, 42, 63, 90, 126, 180], 3)
+    weights = weight_grid(3, step=0.1, min_weight=0.1)
+    configs = grid_configurations(periods, weights, [0.0005, 0.001, 0.002])
+    print(f"Grid: {len(periods)} period sets x {len(weights)} weight sets x 3 costs = {len(configs)}")
+
+    output_path = f"logs/parameter_sweep_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    results = sweep.run(configs, output_path=output_path)
+
+    print(f"\nTop 5 configurations by annualized Sharpe:")
+    print(results.nlargest(5, 'annualized_sharpe')[
+        ['periods', 'weights', 'transaction_cost_pct', 'total_return_pct', 'annualized_sharpe', 'max_drawdown_pct']
+    ].to_string(index=False))
+    best = ParameterSweep.best_parameters(results, configs=configs)
+    print(f"\nBest parameters: {best}")
+    print(f"Read back from CSV: {ParameterSweep.best_parameters(pd.read_csv(output_path)) == best}")
+    print(f"Median time per configuration: {results['seconds'].median() * 1000:.2f} ms")
+
+    # The pool path leaves the parent's return cache unbuilt and agrees with in-process runs
+    pooled = ParameterSweep(sweep.panel, max_workers=2, batch_size=20)
+    pooled_results = pooled.run(configs[:40])
+    metrics = ['total_return_pct', 'annualized_sharpe']
+    same = pooled_results[metrics].equals(results[metrics].iloc[:40].reset_index(drop=True))
+    print(f"Pooled run matches, parent cache unbuilt: {same and pooled._return_cache is None}")
+
+    return len(results) == len(configs) and same and pooled._return_cache is None
+
+
+if __name__ == "__main__":
+    # Run test when script is executed directly
+    test_parameter_sweep()
@@ -0,0 +1,254 @@
+"""
+Scenario Replay Engine Module
+
+Re-runs the momentum strategy on stressed versions of the loaded price
+panel and collects one row of metrics per scenario. Scenarios are pulled
+lazily from any iterable (for example scenario_grid) and shocked one at a
+time inside worker processes that share a single read-only copy of the
+historical panel, so a 10,000-scenario sweep never holds more than a few
+price paths in memory. Independent module that can be tested separately.
+"""
+
+import itertools
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+# Add paths to import our modules
+sys.path.append('utils')
+sys.path.append('backtesting')
+sys.path.append('backtesting/scenarios')
+
+from price_panel import PricePanel
+from shared_panel import SharedPricePanel, attach_price_panel
+from vectorized_backtest import VectorizedBacktest, monthly_rebalance_dates
+from parameter_sweep import evaluate_configuration
+from scenario_library import StressScenario, library_scenarios
+
+
+DEFAULT_STRATEGY_PARAMETERS = {
+    'periods': [30, 90, 180],
+    'weights': [0.5, 0.3, 0.2],
+    'transaction_cost_pct': 0.001
+}
+
+METRIC_COLUMNS = ['final_portfolio_value', 'total_return_pct', 'annualized_volatility',
+                  'annualized_sharpe', 'max_drawdown_pct', 'rebalance_count',
+                  'total_transactions', 'total_transaction_costs']
+
+
+def replay_scenario(panel: PricePanel, scenario: StressScenario, scenario_id: int,
+                    strategy_parameters: Dict, initial_capital: float, start_date, end_date,
+                    rebalance_dates: List, min_history: int = 1) -> Dict:
+    """
+    Shock the panel with one scenario and run the strategy on it.
+
+    Args:
+        panel (PricePanel): Historical panel (not modified)
+        scenario (StressScenario): Scenario to apply
+        scenario_id (int): Row id of the scenario
+        strategy_parameters (Dict): periods, weights and transaction_cost_pct
+        initial_capital (float): Starting capital
+        start_date: First date of the equity curve
+        end_date: Last date of the backtest
+        rebalance_dates (List): Rebalancing calendar
+        min_history (int): Skip symbols with fewer bars than this at a rebalance
+
+    Returns:
+        Dict: Scenario id, name, description and metrics
+    """
+    backtest = VectorizedBacktest(scenario.apply(panel), initial_capital, min_history=min_history)
+    row = evaluate_configuration(backtest, {'config_id': scenario_id, **strategy_parameters},
+                                 start_date, end_date, rebalance_dates)
+
+    return {
+        'scenario_id': scenario_id,
+        'scenario': scenario.name,
+        'description': scenario.describe(),
+        **{column: row[column] for column in METRIC_COLUMNS},
+        'seconds': row['seconds']
+    }
+
+
+# Per-process panel attached to shared memory by the pool initializer
+_worker_panel = None
+_worker_blocks = None
+
+
+def _attach_worker(descriptor: Dict):
+    """Attach to the shared historical panel once per worker process."""
+    global _worker_panel, _worker_blocks
+    _worker_panel, _worker_blocks = attach_price_panel(descriptor)
+
+
+def _replay_batch(specs: List[Dict], strategy_parameters: Dict, initial_capital: float,
+                  start_date, end_date, rebalance_dates: List, min_history: int) -> List[Dict]:
+    """Replay a batch of declarative scenarios inside a worker process."""
+    return [replay_scenario(_worker_panel, StressScenario.from_dict(spec), spec['scenario_id'],
+                            strategy_parameters, initial_capital, start_date, end_date,
+                            rebalance_dates, min_history)
+            for spec in specs]
+
+
+class ScenarioReplayEngine:
+    """Runs the momentum strategy on every scenario of a stress test."""
+
+    def __init__(self, panel: PricePanel, strategy_parameters: Optional[Dict] = None,
+                 initial_capital: float = 100000, start_date=None, end_date=None,
+                 min_history: int = 1, max_workers: Optional[int] = None, batch_size: int = 50):
+        """
+        Initialize the engine.
+
+        Args:
+            panel (PricePanel): Historical panel the scenarios shock
+            strategy_parameters (Dict): periods, weights and transaction_cost_pct
+                (default: the strategy's standard parameters)
+            initial_capital (float): Starting capital
+            start_date: First date of the equity curve (default: first panel date)
+            end_date: Last date of the backtest (default: last panel date)
+            min_history (int): Skip symbols with fewer bars than this at a rebalance
+            max_workers (int): Worker processes (default: CPU count, 1 runs in-process)
+            batch_size (int): Scenarios sent to a worker at a time
+        """
+        self.panel = panel
+        self.strategy_parameters = {key: (strategy_parameters or DEFAULT_STRATEGY_PARAMETERS)[key]
+                                    for key in DEFAULT_STRATEGY_PARAMETERS}
+        self.initial_capital = initial_capital
+        self.start_date = panel.timestamp(0) if start_date is None else pd.to_datetime(start_date, utc=True)
+        self.end_date = panel.timestamp(len(panel) - 1) if end_date is None else pd.to_datetime(end_date, utc=True)
+        self.rebalance_dates = monthly_rebalance_dates(self.start_date, self.end_date)
+        self.min_history = min_history
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+
+    @classmethod
+    def from_frames(cls, etf_data: Dict[str, pd.DataFrame], **kwargs) -> 'ScenarioReplayEngine':
+        """
+        Build an engine from a dictionary of ETF DataFrames.
+
+        Args:
+            etf_data (Dict): Historical data for each ETF
+            **kwargs: Passed to ScenarioReplayEngine
+
+        Returns:
+            ScenarioReplayEngine: Engine over the aligned panel
+        """
+        return cls(PricePanel.from_frames(etf_data), **kwargs)
+
+    def replay(self, scenario: StressScenario, scenario_id: int = 0) -> Dict:
+        """
+        Run the strategy on one scenario in this process.
+
+        Args:
+            scenario (StressScenario): Scenario to apply
+            scenario_id (int): Row id of the scenario
+
+        Returns:
+            Dict: Scenario metrics row
+        """
+        return replay_scenario(self.panel, scenario, scenario_id, self.strategy_parameters,
+                               self.initial_capital, self.start_date, self.end_date,
+                               self.rebalance_dates, self.min_history)
+
+    def run(self, scenarios: Optional[Iterable[StressScenario]] = None,
+            output_path: Optional[str] = None) -> pd.DataFrame:
+        """
+        Replay every scenario and build the scenario x metric table.
+
+        Scenarios are consumed lazily in batches; at most two batches per
+        worker are in flight at any time.
+
+        Args:
+            scenarios (Iterable[StressScenario]): Scenarios (default: the scenario library)
+            output_path (str): Optional CSV path for the table
+
+        Returns:
+            pd.DataFrame: One row per scenario, baseline (unshocked history)
+                first, with returns relative to the baseline
+        """
+        scenarios = iter(library_scenarios() if scenarios is None else scenarios)
+        baseline = self.replay(StressScenario('baseline', []), 0)
+
+        specs = ({**scenario.to_dict(), 'scenario_id': scenario_id}
+                 for scenario_id, scenario in enumerate(scenarios, 1))
+        batches = iter(lambda: list(itertools.islice(specs, self.batch_size)), [])
+        args = (self.strategy_parameters, self.initial_capital, self.start_date, self.end_date,
+                self.rebalance_dates, self.min_history)
+
+        print(f"Replaying scenarios on {self.max_workers} worker(s)...")
+        start = time.perf_counter()
+        rows = [baseline]
+        if self.max_workers == 1:
+            for batch in batches:
+                rows.extend(self.replay(StressScenario.from_dict(spec), spec['scenario_id']) for spec in batch)
+        else:
+            with SharedPricePanel(self.panel) as shared:
+                with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_attach_worker,
+                                         initargs=(shared.descriptor,)) as executor:
+                    pending = set()
+                    for batch in batches:
+                        pending.add(executor.submit(_replay_batch, batch, *args))
+                        if len(pending) >= 2 * self.max_workers:
+                            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                            rows.extend(row for future in done for row in future.result())
+                    rows.extend(row for future in pending for row in future.result())
+        elapsed = time.perf_counter() - start
+
+        results = pd.DataFrame(rows).sort_values('scenario_id').reset_index(drop=True)
+        results['return_vs_baseline_pct'] = results['total_return_pct'] - baseline['total_return_pct']
+        results['drawdown_vs_baseline_pct'] = results['max_drawdown_pct'] - baseline['max_drawdown_pct']
+
+        print(f"Replayed {len(results) - 1:,} scenarios in {elapsed:.2f}s "
+              f"({elapsed / max(len(results) - 1, 1) * 1000:.2f} ms per scenario)")
+
+        if output_path:
+            os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+            results.to_csv(output_path, index=False)
+            print(f"Results written to {output_path}")
+
+        return results
+
+
+def test_replay_engine():
+    """Test function to verify the scenario replay engine works correctly."""
+
+    print("Testing Scenario Replay Engine...")
+
+    sys.path.append('src/data_providers')
+    from etf_data_fetcher import ETFDataFetcher
+    from scenario_library import scenario_grid
+
+    fetcher = ETFDataFetcher()
+    etf_data = {symbol: fetcher.load_data(symbol) for symbol in ['SPY', 'QQQ', 'IWM']}
+    if any(data.empty for data in etf_data.values()):
+        print("Missing ETF data. Run data fetcher first.")
+        return False
+
+    engine = ScenarioReplayEngine.from_frames(etf_data, max_workers=1)
+    library = engine.run()
+    print(library[['scenario', 'total_return_pct', 'annualized_sharpe', 'max_drawdown_pct',
+                   'rebalance_count', 'return_vs_baseline_pct']].round(2).to_string(index=False))
+
+    # Lazily generated grid, in parallel over the shared panel
+    grid = scenario_grid(drop_pcts=range(5, 55, 5), durations=[1, 5, 20, 60],
+                         starts=range(-400, -40, 40), symbol_sets=[None, ['SPY'], ['QQQ'], ['IWM']])
+    parallel = ScenarioReplayEngine.from_frames(etf_data, max_workers=2).run(grid)
+    print(f"\nGrid: {len(parallel) - 1} scenarios, worst return {parallel['total_return_pct'].min():.2f}%, "
+          f"worst drawdown {parallel['max_drawdown_pct'].min():.2f}%")
+
+    # Parallel rows must match the in-process replay
+    check = engine.replay(StressScenario.from_dict(
+        {'name': 'check', 'shocks': [{'type': 'drawdown', 'drop_pct': 30, 'days': 20, 'start': -200}]}))
+    match = parallel.loc[parallel['scenario'] == 'drawdown_30pct_20d_all_at_-200', 'final_portfolio_value'].iloc[0]
+    print(f"Parallel replay matches in-process: {match == check['final_portfolio_value']}")
+
+    return match == check['final_portfolio_value']
+
+
+if __name__ == "__main__":
+    # Run test when script is executed directly
+    test_replay_engine()
@@ -0,0 +1,365 @@
+"""
+Scenario Library Module
+
+Declarative stress-scenario definitions for the momentum strategy. A shock
+describes one change to historical closes (a drawdown over N days, a
+volatility regime, a gap-down open); a scenario is a named list of shocks
+that can be written as a plain dictionary, stored in the library below or
+generated lazily by scenario_grid. Applying a scenario returns a shocked
+copy of a PricePanel and never modifies the original. Independent module
+that can be tested separately.
+"""
+
+import itertools
+import sys
+import warnings
+from typing import Dict, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+sys.path.append('utils')
+
+from price_panel import PricePanel
+
+
+class PriceShock:
+    """
+    Base class of shocks applied to a panel's close matrix.
+
+    Args common to every shock:
+        start: First shocked bar, as a date string or a column position
+            (negative positions count from the last bar)
+        symbols: Symbols hit by the shock (default: every symbol)
+    """
+
+    shock_type = None
+
+    def __init__(self, start: Union[str, int], symbols: Optional[Sequence[str]] = None):
+        self.start = start
+        self.symbols = list(symbols) if symbols is not None else None
+
+    def start_position(self, panel: PricePanel) -> int:
+        """
+        Column of the first shocked bar.
+
+        Args:
+            panel (PricePanel): Panel the shock is applied to
+
+        Returns:
+            int: Column position
+        """
+        if isinstance(self.start, (int, np.integer)):
+            position = int(self.start) if self.start >= 0 else len(panel) + int(self.start)
+        else:
+            position = panel.date_position(pd.to_datetime(self.start, utc=True) - pd.Timedelta(1, 'ns')) + 1
+        return min(max(position, 0), len(panel) - 1)
+
+    def rows(self, panel: PricePanel) -> np.ndarray:
+        """Panel rows of the shocked symbols (unknown symbols are ignored)."""
+        if self.symbols is None:
+            return np.arange(len(panel.symbols))
+        return np.array([panel.symbol_index[symbol] for symbol in self.symbols
+                         if symbol in panel.symbol_index], dtype=np.int64)
+
+    def apply(self, closes: np.ndarray, panel: PricePanel):
+        """
+        Shock a close matrix in place.
+
+        Args:
+            closes (np.ndarray): Copy of the panel closes, symbols x dates
+            panel (PricePanel): Panel the closes belong to (dates and symbols)
+        """
+        raise NotImplementedError
+
+    def parameters(self) -> Dict:
+        """Shock-specific parameters for to_dict."""
+        raise NotImplementedError
+
+    def to_dict(self) -> Dict:
+        """
+        Declarative form of the shock.
+
+        Returns:
+            Dict: {'type': ..., 'start': ..., 'symbols': ..., **parameters}
+        """
+        spec = {'type': self.shock_type, 'start': self.start, **self.parameters()}
+        if self.symbols is not None:
+            spec['symbols'] = self.symbols
+        return spec
+
+    def describe(self) -> str:
+        """Short human-readable description."""
+        target = '/'.join(self.symbols) if self.symbols else 'all'
+        details = ', '.join(f"{key}={value}" for key, value in self.parameters().items())
+        return f"{self.shock_type}({details}) on {target} at {self.start}"
+
+
+class Drawdown(PriceShock):
+    """Prices fall by drop_pct over days bars and stay at the lower level afterwards."""
+
+    shock_type = 'drawdown'
+
+    def __init__(self, drop_pct: float, days: int, start: Union[str, int],
+                 symbols: Optional[Sequence[str]] = None):
+        """
+        Args:
+            drop_pct (float): Total decline in percent (20 = -20%)
+            days (int): Bars over which the decline is spread (geometrically)
+            start: First shocked bar
+            symbols: Symbols hit by the shock (default: every symbol)
+        """
+        super().__init__(start, symbols)
+        self.drop_pct = drop_pct
+        self.days = max(int(days), 1)
+
+    def parameters(self) -> Dict:
+        return {'drop_pct': self.drop_pct, 'days': self.days}
+
+    def apply(self, closes: np.ndarray, panel: PricePanel):
+        start = self.start_position(panel)
+        rows = self.rows(panel)
+        end = min(start + self.days, closes.shape[1])
+
+        final_factor = 1 - self.drop_pct / 100
+        ramp = final_factor ** (np.arange(1, end - start + 1) / self.days)
+
+        closes[rows[:, None], np.arange(start, end)] *= ramp
+        closes[rows, end:] *= final_factor
+
+
+class GapDown(Drawdown):
+    """Prices open gap_pct lower on one bar and never recover the gap."""
+
+    shock_type = 'gap_down'
+
+    def __init__(self, gap_pct: float, start: Union[str, int],
+                 symbols: Optional[Sequence[str]] = None):
+        """
+        Args:
+            gap_pct (float): Size of the gap in percent
+            start: Bar of the gap
+            symbols: Symbols hit by the shock (default: every symbol)
+        """
+        super().__init__(gap_pct, 1, start, symbols)
+        self.gap_pct = gap_pct
+
+    def parameters(self) -> Dict:
+        return {'gap_pct': self.gap_pct}
+
+
+class VolatilityRegime(PriceShock):
+    """
+    Daily moves are scaled by multiplier over days bars.
+
+    Log returns inside the window keep their mean and have their deviations
+    from it multiplied; prices after the window continue from the new level
+    with their original returns.
+    """
+
+    shock_type = 'volatility'
+
+    def __init__(self, multiplier: float, days: int, start: Union[str, int],
+                 symbols: Optional[Sequence[str]] = None):
+        """
+        Args:
+            multiplier (float): Volatility multiplier (3 = three times the moves)
+            days (int): Length of the regime in bars
+            start: First bar of the regime
+            symbols: Symbols hit by the shock (default: every symbol)
+        """
+        super().__init__(start, symbols)
+        self.multiplier = multiplier
+        self.days = max(int(days), 1)
+
+    def parameters(self) -> Dict:
+        return {'multiplier': self.multiplier, 'days': self.days}
+
+    def apply(self, closes: np.ndarray, panel: PricePanel):
+        start = max(self.start_position(panel), 1)
+        rows = self.rows(panel)
+        end = min(start + self.days, closes.shape[1])
+        if end <= start or len(rows) == 0:
+            return
+
+        with np.errstate(divide='ignore', invalid='ignore'), warnings.catch_warnings():
+            # Symbols not trading in the window have all-NaN returns
+            warnings.simplefilter('ignore', RuntimeWarning)
+            log_prices = np.log(closes[rows, start - 1:end])
+            returns = np.diff(log_prices, axis=1)
+            mean = np.nanmean(returns, axis=1, keepdims=True)
+            scaled = mean + self.multiplier * (returns - mean)
+            shocked = log_prices[:, :1] + np.cumsum(scaled, axis=1)
+
+        shift = np.exp(shocked[:, -1] - log_prices[:, -1])
+        window = (rows[:, None], np.arange(start, end))
+        closes[window] = np.where(np.isfinite(shocked), np.exp(shocked), closes[window])
+        closes[rows, end:] *= np.where(np.isfinite(shift), shift, 1.0)[:, None]
+
+
+SHOCK_TYPES = {shock.shock_type: shock for shock in (Drawdown, GapDown, VolatilityRegime)}
+
+
+def shock_from_dict(spec: Dict) -> PriceShock:
+    """
+    Build a shock from its declarative form.
+
+    Args:
+        spec (Dict): Shock definition with a 'type' key (see SHOCK_TYPES)
+
+    Returns:
+        PriceShock: Shock instance
+    """
+    spec = dict(spec)
+    shock_type = spec.pop('type', None)
+    if shock_type not in SHOCK_TYPES:
+        raise ValueError(f"Unknown shock type '{shock_type}'. Use one of {sorted(SHOCK_TYPES)}")
+    return SHOCK_TYPES[shock_type](**spec)
+
+
+class StressScenario:
+    """Named combination of shocks applied in order."""
+
+    def __init__(self, name: str, shocks: List[PriceShock]):
+        """
+        Args:
+            name (str): Scenario name
+            shocks (List[PriceShock]): Shocks applied in order
+        """
+        self.name = name
+        self.shocks = shocks
+
+    @classmethod
+    def from_dict(cls, spec: Dict) -> 'StressScenario':
+        """
+        Build a scenario from {'name': ..., 'shocks': [shock dicts]}.
+
+        Args:
+            spec (Dict): Scenario definition
+
+        Returns:
+            StressScenario: Scenario instance
+        """
+        return cls(spec['name'], [shock_from_dict(shock) for shock in spec['shocks']])
+
+    def to_dict(self) -> Dict:
+        """
+        Declarative (picklable, JSON-serializable) form of the scenario.
+
+        Returns:
+            Dict: {'name': ..., 'shocks': [...]}
+        """
+        return {'name': self.name, 'shocks': [shock.to_dict() for shock in self.shocks]}
+
+    def describe(self) -> str:
+        """Short human-readable description."""
+        return '; '.join(shock.describe() for shock in self.shocks)
+
+    def apply(self, panel: PricePanel) -> PricePanel:
+        """
+        Shocked copy of a panel.
+
+        Args:
+            panel (PricePanel): Historical panel (not modified)
+
+        Returns:
+            PricePanel: Panel with shocked closes (other fields are dropped)
+        """
+        closes = panel.closes.copy()
+        for shock in self.shocks:
+            shock.apply(closes, panel)
+
+        return PricePanel(panel.symbols, panel.dates, {'Close': closes}, panel.first_bar, panel.last_bar,
+                          panel.bar_ordinals)
+
+
+# Library of standard scenarios, placed relative to the end of the panel
+SCENARIO_LIBRARY = [
+    {'name': 'market_crash', 'shocks': [{'type': 'drawdown', 'drop_pct': 35, 'days': 25, 'start': -250}]},
+    {'name': 'slow_bear_market', 'shocks': [{'type': 'drawdown', 'drop_pct': 25, 'days': 120, 'start': -300}]},
+    {'name': 'flash_gap_down', 'shocks': [{'type': 'gap_down', 'gap_pct': 10, 'start': -200}]},
+    {'name': 'volatility_spike', 'shocks': [{'type': 'volatility', 'multiplier': 3, 'days': 40, 'start': -250}]},
+    {'name': 'tech_selloff', 'shocks': [{'type': 'drawdown', 'drop_pct': 30, 'days': 60, 'start': -200,
+                                         'symbols': ['QQQ']}]},
+    {'name': 'small_cap_gap', 'shocks': [{'type': 'gap_down', 'gap_pct': 8, 'start': -150, 'symbols': ['IWM']}]},
+    {'name': 'gap_then_turbulence', 'shocks': [{'type': 'gap_down', 'gap_pct': 7, 'start': -220},
+                                               {'type': 'volatility', 'multiplier': 2.5, 'days': 60, 'start': -219}]}
+]
+
+
+def library_scenarios() -> List[StressScenario]:
+    """
+    Scenarios of SCENARIO_LIBRARY.
+
+    Returns:
+        List[StressScenario]: Library scenarios
+    """
+    return [StressScenario.from_dict(spec) for spec in SCENARIO_LIBRARY]
+
+
+def scenario_grid(drop_pcts: Sequence[float], durations: Sequence[int], starts: Sequence[Union[str, int]],
+                  symbol_sets: Sequence[Optional[Sequence[str]]] = (None,)) -> Iterator[StressScenario]:
+    """
+    Lazily generate drawdown scenarios over a parameter grid.
+
+    Scenarios are yielded one at a time, so a sweep over tens of thousands
+    of combinations never holds them (or their price paths) all at once.
+
+    Args:
+        drop_pcts (Sequence[float]): Total declines in percent
+        durations (Sequence[int]): Decline lengths in bars
+        starts (Sequence): Start dates or column positions
+        symbol_sets (Sequence): Symbol lists hit by the shock (None = all)
+
+    Yields:
+        StressScenario: One scenario per combination
+    """
+    for drop_pct, days, start, symbols in itertools.product(drop_pcts, durations, starts, symbol_sets):
+        target = '_'.join(symbols) if symbols else 'all'
+        yield StressScenario(f"drawdown_{drop_pct}pct_{days}d_{target}_at_{start}",
+                             [Drawdown(drop_pct, days, start, symbols)])
+
+
+def test_scenario_library():
+    """Test function to verify scenarios shock panels correctly."""
+
+    print("Testing Scenario Library...")
+
+    dates = pd.date_range('2024-01-01', periods=300, freq='B', tz='UTC')
+    rng = np.random.default_rng(0)
+    etf_data = {symbol: pd.DataFrame({'Date': dates, 'Close': 100 * np.exp(rng.normal(0, 0.01, len(dates)).cumsum())})
+                for symbol in ['SPY', 'QQQ', 'IWM']}
+    panel = PricePanel.from_frames(etf_data)
+    original = panel.closes.copy()
+
+    for scenario in library_scenarios():
+        shocked = scenario.apply(panel)
+        change = shocked.closes[:, -1] / panel.closes[:, -1] - 1
+        print(f"  {scenario.name:22s} final price change: {', '.join(f'{c:+.1%}' for c in change)}")
+
+    # Drawdown reaches exactly the requested decline and leaves later returns unchanged
+    crash = StressScenario.from_dict(SCENARIO_LIBRARY[0]).apply(panel)
+    ratio = crash.closes / panel.closes
+    print(f"\nCrash ratio after window: {ratio[0, -1]:.4f} (expected 0.6500)")
+    print(f"Original panel untouched: {np.array_equal(original, panel.closes)}")
+
+    # Volatility regime scales moves inside the window only
+    vol = StressScenario.from_dict(SCENARIO_LIBRARY[3]).apply(panel)
+    window = slice(len(panel) - 250, len(panel) - 210)
+    before = np.diff(np.log(panel.closes[0, window])).std()
+    after = np.diff(np.log(vol.closes[0, window])).std()
+    print(f"Volatility in window: {before:.4f} -> {after:.4f} (x{after / before:.2f})")
+
+    # Round trip through the declarative form
+    spec = StressScenario.from_dict(SCENARIO_LIBRARY[-1]).to_dict()
+    print(f"Round trip: {spec == SCENARIO_LIBRARY[-1]}")
+
+    grid = scenario_grid([10, 20, 30], [1, 20], [-200, -100])
+    print(f"Lazy grid, first scenario: {next(grid).name}")
+
+    return np.isclose(ratio[0, -1], 0.65) and np.array_equal(original, panel.closes)
+
+
+if __name__ == "__main__":
+    # Run test when script is executed directly
+    test_scenario_library()
@@ -0,0 +1,402 @@
+"""
+Vectorized Backtest Module
+
+Fast single-ETF momentum rotation over an aligned PricePanel.
+Momentum scores for every rebalance date are read from precomputed
+lookback-return arrays, so one configuration costs a few array operations
+plus one PortfolioManager trade per rebalance instead of a full
+MomentumBacktest run. Independent module that can be tested separately.
+"""
+
+import pandas as pd
+import numpy as np
+from dateutil.relativedelta import relativedelta
+import sys
+import time
+from typing import Dict, List, Optional
+
+# Add paths to import our modules
+sys.path.append('src/portfolio')
+sys.path.append('strategies/scenario_based')
+sys.path.append('utils')
+
+from portfolio_manager import PortfolioManager
+from momentum_calculator import MomentumCalculator, top_k_indices
+from price_panel import PricePanel
+
+
+def monthly_rebalance_dates(start_date, end_date, warmup_months: int = 6) -> List[pd.Timestamp]:
+    """
+    Generate monthly rebalancing dates (same calendar as MomentumBacktest).
+
+    Args:
+        start_date: Start date of the backtest
+        end_date: End date of the backtest
+        warmup_months (int): Months skipped at the start to build momentum history
+
+    Returns:
+        List[pd.Timestamp]: Rebalancing dates
+    """
+    rebalance_dates = []
+    current_date = pd.to_datetime(start_date, utc=True) + relativedelta(months=warmup_months)
+    end_dt = pd.to_datetime(end_date, utc=True)
+
+    while current_date <= end_dt:
+        rebalance_dates.append(current_date)
+        current_date = current_date + relativedelta(months=1)
+
+    return rebalance_dates
+
+
+class LookbackReturnCache:
+    """
+    Per-period return matrices for a PricePanel, computed once and shared.
+
+    Every (periods, weights) configuration of a sweep draws its scores from
+    the same period arrays, so a period is only ever divided through once.
+    """
+
+    def __init__(self, panel: PricePanel):
+        """
+        Initialize the cache.
+
+        Args:
+            panel (PricePanel): Aligned price panel
+        """
+        self.panel = panel
+        self._prices = panel.bar_matrix().T
+        self._calculator = MomentumCalculator()
+        self._returns = {}
+
+    def returns(self, period: int) -> np.ndarray:
+        """
+        Period returns for every own bar and symbol (bars x symbols).
+
+        Row i of a column is the symbol's i-th bar; panel.bar_ordinals maps
+        a date to the bar in effect.
+
+        Args:
+            period (int): Lookback in bars
+
+        Returns:
+            np.ndarray: Read-only return matrix (NaN where no return exists)
+        """
+        if period not in self._returns:
+            matrix = self._calculator.calculate_return_matrix(self._prices, period)
+            matrix.flags.writeable = False
+            self._returns[period] = matrix
+
+        return self._returns[period]
+
+    def warm(self, periods) -> None:
+        """Precompute the return matrices for a collection of periods."""
+        for period in sorted(set(periods)):
+            self.returns(period)
+
+    def momentum_scores(self, periods: List[int], weights: List[float]) -> np.ndarray:
+        """
+        Weighted momentum scores for every own bar and symbol.
+
+        Accumulates in the same order as MomentumCalculator.calculate_momentum_matrix,
+        so scores match the scalar path exactly.
+
+        Args:
+            periods (List[int]): Lookback periods
+            weights (List[float]): Weight of each period
+
+        Returns:
+            np.ndarray: Momentum scores, bars x symbols
+        """
+        scores = np.zeros(self._prices.shape)
+
+        for period, weight in zip(periods, weights):
+            scores += self.returns(period) * weight
+
+        return scores
+
+    def memory_bytes(self) -> int:
+        """Total bytes held by cached return matrices."""
+        return sum(matrix.nbytes for matrix in self._returns.values())
+
+
+class VectorizedBacktest:
+    """Runs single-ETF momentum rotation on a PricePanel from cached returns."""
+
+    def __init__(self, panel: PricePanel, initial_capital: float = 100000,
+                 transaction_cost_pct: float = 0.001,
+                 return_cache: Optional[LookbackReturnCache] = None,
+                 min_history: int = 1):
+        """
+        Initialize the vectorized backtest.
+
+        Args:
+            panel (PricePanel): Aligned price panel
+            initial_capital (float): Starting capital
+            transaction_cost_pct (float): Default transaction cost percentage
+            return_cache (LookbackReturnCache): Shared return cache (built if omitted)
+            min_history (int): Skip symbols with fewer bars than this at a rebalance
+        """
+        self.panel = panel
+        self.initial_capital = initial_capital
+        self.transaction_cost_pct = transaction_cost_pct
+        self.return_cache = return_cache if return_cache is not None else LookbackReturnCache(panel)
+        self.min_history = min_history
+
+    def rebalance_scores(self, periods: List[int], weights: List[float],
+                         positions: np.ndarray) -> np.ndarray:
+        """
+        Momentum scores visible at each rebalance position.
+
+        Only the rebalance rows of each cached return matrix are gathered and
+        weighted (in calculate_momentum_matrix order, so scores are exact).
+        A symbol is scored at its last bar on or before the position, and is
+        excluded (NaN) before its first bar or with fewer than min_history
+        bars, mirroring MomentumCalculator.calculate_snapshot_momentum.
+
+        Args:
+            periods (List[int]): Lookback periods
+            weights (List[float]): Weight of each period
+            positions (np.ndarray): Rebalance column positions
+
+        Returns:
+            np.ndarray: Scores, rebalances x symbols
+        """
+        panel = self.panel
+        positions = np.asarray(positions)
+        # Own bar in effect at each rebalance (-1 before the first bar)
+        bars = panel.bar_ordinals[:, np.maximum(positions, 0)].T
+        bars = np.where(positions[:, None] >= 0, bars, -1)
+        visible = (bars >= 0) & (bars + 1 >= self.min_history)
+
+        rows, columns = np.maximum(bars, 0), np.arange(len(panel.symbols))[None, :]
+        scores = np.zeros(bars.shape)
+        for period, weight in zip(periods, weights):
+            scores += self.return_cache.returns(period)[rows, columns] * weight
+
+        return np.where(visible, scores, np.nan)
+
+    def run(self, periods: List[int], weights: List[float],
+            start_date=None, end_date=None, rebalance_dates=None,
+            transaction_cost_pct: Optional[float] = None,
+            record_equity: bool = True) -> Dict:
+        """
+        Run one momentum rotation configuration.
+
+        Args:
+            periods (List[int]): Lookback periods
+            weights (List[float]): Weight of each period
+            start_date: First date of the equity curve (default: first panel date)
+            end_date: Last date of the backtest (default: last panel date)
+            rebalance_dates (list): Rebalancing dates (default: monthly after a 6-month warmup)
+            transaction_cost_pct (float): Override the default transaction cost
+            record_equity (bool): Build the daily equity curve and daily returns
+
+        Returns:
+            Dict: Backtest results in the MomentumBacktest layout plus
+                rebalance_history, dates, equity_curve and daily_returns
+        """
+        panel = self.panel
+        start_date = panel.timestamp(0) if start_date is None else pd.to_datetime(start_date, utc=True)
+        end_date = panel.timestamp(len(panel) - 1) if end_date is None else pd.to_datetime(end_date, utc=True)
+        if rebalance_dates is None:
+            rebalance_dates = monthly_rebalance_dates(start_date, end_date)
+
+        cost_pct = self.transaction_cost_pct if transaction_cost_pct is None else transaction_cost_pct
+        portfolio = PortfolioManager(self.initial_capital, cost_pct)
+
+        positions = panel.date_positions(pd.DatetimeIndex(rebalance_dates))
+        scores = self.rebalance_scores(periods, weights, positions)
+
+        rebalance_history = []
+        holdings = []  # (position, symbol, shares, cash) after each rebalance
+
+        for rebalance_date, position, row in zip(rebalance_dates, positions, scores):
+            leaders = top_k_indices(row, 1)
+            if len(leaders) == 0:
+                continue
+
+            top_etf = panel.symbols[leaders[0]]
+            date_str = rebalance_date.strftime('%Y-%m-%d')
+
+            portfolio_value_before = portfolio.update_portfolio_value_from_panel(panel, position)
+            rebalance_result = portfolio.rebalance_to_etf(top_etf, panel.prices_at(position), date_str)
+
+            rebalance_record = {
+                "date": date_str,
+                "selected_etf": top_etf,
+                "momentum_score": row[leaders[0]],
+                "portfolio_value_before": portfolio_value_before,
+                "rebalance_success": rebalance_result['success']
+            }
+
+            if rebalance_result['success']:
+                rebalance_record["portfolio_value_after"] = portfolio.update_portfolio_value_from_panel(panel, position)
+
+            rebalance_history.append(rebalance_record)
+            holdings.append((int(position), portfolio.current_position,
+                             portfolio.current_shares, portfolio.current_cash))
+
+        final_position = panel.date_position(end_date)
+        final_portfolio_value = portfolio.update_portfolio_value_from_panel(panel, final_position)
+
+        results = {
+            "start_date": start_date.strftime('%Y-%m-%d'),
+            "end_date": end_date.strftime('%Y-%m-%d'),
+            "initial_capital": self.initial_capital,
+            "final_portfolio_value": final_portfolio_value,
+            "total_return": (final_portfolio_value / self.initial_capital - 1) * 100,
+            "rebalance_count": len(rebalance_history),
+            "transaction_summary": portfolio.get_transaction_summary(),
+            "final_position": portfolio.get_current_position(),
+            "rebalance_history": rebalance_history
+        }
+
+        if record_equity:
+            start_position = panel.date_position(start_date - pd.Timedelta(1, 'ns')) + 1
+            dates, equity = self.equity_curve(holdings, start_position, final_position)
+            previous = equity[:-1]
+            results["dates"] = dates
+            results["equity_curve"] = equity
+            results["daily_returns"] = (equity[1:][previous > 0] / previous[previous > 0] - 1).tolist()
+
+        return results
+
+    def equity_curve(self, holdings: List[tuple], start_position: int, end_position: int):
+        """
+        Mark the portfolio to market on every panel date between two positions.
+
+        Holdings are constant between rebalances, so each segment is valued
+        with one vectorized as-of price lookup.
+
+        Args:
+            holdings (List[tuple]): (position, symbol, shares, cash) after each rebalance
+            start_position (int): First column of the curve
+            end_position (int): Last column of the curve (inclusive)
+
+        Returns:
+            tuple: (pd.DatetimeIndex of dates, np.ndarray of portfolio values)
+        """
+        panel = self.panel
+        positions = np.arange(max(start_position, 0), end_position + 1)
+        equity = np.full(len(positions), float(self.initial_capital))
+
+        boundaries = [position for position, _, _, _ in holdings] + [end_position + 1]
+        for (position, symbol, shares, cash), next_position in zip(holdings, boundaries[1:]):
+            segment = (positions >= position) & (positions < next_position)
+            if not segment.any():
+                continue
+            if symbol is None:
+                equity[segment] = cash
+            else:
+                prices = panel.prices_at_positions(symbol, positions[segment])
+                equity[segment] = cash + shares * prices
+
+        dates = pd.DatetimeIndex(pd.to_datetime(panel.dates[positions], utc=True))
+        return dates, equity
+
+
+def check_kernel_agreement(n_symbols: int = 20, n_days: int = 1000, seed: int = 7) -> Dict:
+    """
+    Run BacktestKernel and VectorizedBacktest on the same panel and calendar.
+
+    The synthetic panel has staggered listings, symbols delisted early and
+    randomly missing bars; the calendar includes non-trading days. Both
+    engines are run in the in-sample (no minimum history) and out-of-sample
+    (30-bar minimum history) configurations.
+
+    Args:
+        n_symbols (int): Number of synthetic symbols
+        n_days (int): Number of trading days
+        seed (int): Random seed for the synthetic prices
+
+    Returns:
+        Dict: Per-mode flags for matching selections, equity curves and final values
+    """
+    sys.path.append('backtesting')
+    from backtest_core import BacktestKernel, RebalanceSink
+
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2018-01-01', periods=n_days, freq='B', tz='UTC')
+    etf_data = {}
+    for i in range(n_symbols):
+        start = int(rng.integers(0, n_days // 3))
+        end = n_days - int(rng.integers(1, n_days // 3)) if i % 4 == 0 else n_days
+        closes = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.012, end - start)))
+        keep = rng.random(end - start) > 0.03
+        etf_data[f"SYM{i}"] = pd.DataFrame({'Date': dates[start:end][keep], 'Close': closes[keep]})
+    panel = PricePanel.from_frames(etf_data)
+
+    # Every 17 calendar days, so some rebalances fall on weekends
+    start_date, end_date = dates[0], dates[-1]
+    rebalance_dates = list(pd.date_range(dates[150], end_date, freq='17D'))
+    periods, weights = [21, 63, 126], [0.5, 0.3, 0.2]
+
+    results = {}
+    for mode, min_history in [('in_sample', 1), ('out_of_sample', 30)]:
+        portfolio = PortfolioManager(100000, 0.001)
+        kernel = BacktestKernel(panel, MomentumCalculator(periods, weights), portfolio,
+                                calendar=lambda start, end: rebalance_dates, min_history=min_history,
+                                sink=RebalanceSink(verbose=False))
+        reference = kernel.run(start_date, end_date)
+
+        vectorized = VectorizedBacktest(panel, 100000, 0.001, min_history=min_history).run(
+            periods, weights, start_date, end_date, rebalance_dates)
+
+        results[mode] = {
+            "rebalances": len(kernel.sink.history),
+            "same_selections": ([r["selected_etf"] for r in kernel.sink.history]
+                                == [r["selected_etf"] for r in vectorized["rebalance_history"]]),
+            "same_equity_curve": bool(np.allclose(reference["daily_values"], vectorized["equity_curve"],
+                                                  rtol=0, atol=1e-6)),
+            "same_final_value": bool(reference["final_portfolio_value"] == vectorized["final_portfolio_value"])
+        }
+
+    return results
+
+
+def test_vectorized_backtest():
+    """Test the vectorized backtest against the event-driven MomentumBacktest."""
+
+    print("Testing Vectorized Backtest...")
+
+    sys.path.append('backtesting')
+    from momentum_backtest import MomentumBacktest
+
+    start_date, end_date = '2024-06-20', '2025-07-18'
+
+    # Reference run through the full engine
+    backtest = MomentumBacktest(etf_symbols=['SPY', 'QQQ', 'IWM'])
+    reference = backtest.run_backtest(start_date, end_date)
+    if "error" in reference:
+        print(f"Reference backtest failed: {reference['error']}")
+        return False
+
+    vectorized = VectorizedBacktest(backtest.get_price_panel())
+
+    start = time.perf_counter()
+    results = vectorized.run([30, 90, 180], [0.5, 0.3, 0.2], start_date, end_date)
+    elapsed = time.perf_counter() - start
+
+    selections = [record["selected_etf"] for record in results["rebalance_history"]]
+    reference_selections = [record["selected_etf"] for record in backtest.rebalance_history]
+
+    print(f"\nVectorized run: {elapsed * 1000:.2f} ms")
+    print(f"Final value: ${results['final_portfolio_value']:,.2f} "
+          f"(engine: ${reference['final_portfolio_value']:,.2f})")
+    print(f"Same selections: {selections == reference_selections}")
+    print(f"Same final value: {results['final_portfolio_value'] == reference['final_portfolio_value']}")
+    print(f"Equity curve: {len(results['equity_curve'])} days, {len(results['daily_returns'])} daily returns")
+
+    # Same rotation, cost and rebalance rules as BacktestKernel on gapped, delisted data
+    agreement = check_kernel_agreement()
+    print(f"\nAgreement with BacktestKernel (synthetic panel with gaps and delistings):")
+    for mode, flags in agreement.items():
+        print(f"  {mode}: {flags}")
+    agrees = all(all(v for k, v in flags.items() if k != 'rebalances') for flags in agreement.values())
+
+    return results['final_portfolio_value'] == reference['final_portfolio_value'] and agrees
+
+
+if __name__ == "__main__":
+    # Run test when script is executed directly
+    test_vectorized_backtest()
@@ -0,0 +1,280 @@
+"""
+Walk-Forward Optimization Module
+
+Rolling or anchored walk-forward analysis of the momentum strategy.
+Each window sweeps the candidate configurations on its training period,
+freezes the best one and runs it on the following test period; the test
+periods are stitched into one out-of-sample return series. Windows run in
+parallel worker processes that attach to a single shared-memory copy of
+the price panel. Independent module that can be tested separately.
+"""
+
+import pandas as pd
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+import os
+import sys
+import time
+from typing import Dict, List, Optional
+
+# Add paths to import our modules
+sys.path.append('utils')
+sys.path.append('backtesting')
+
+from price_panel import PricePanel
+from shared_panel import SharedPricePanel, attach_price_panel
+from data_split_manager import DataSplitManager
+from vectorized_backtest import VectorizedBacktest, monthly_rebalance_dates
+from parameter_sweep import evaluate_configuration
+
+
+def optimize_window(backtest: VectorizedBacktest, window: Dict, configs: List[Dict],
+                    metric: str = 'annualized_sharpe') -> Dict:
+    """
+    Select the best configuration on a window's training period and test it.
+
+    Rebalancing starts at the beginning of each period; history before the
+    period is visible to the momentum lookbacks but never data after the
+    rebalance date.
+
+    Args:
+        backtest (VectorizedBacktest): Backtest over the full panel
+        window (Dict): Window from DataSplitManager.generate_walk_forward_windows
+        configs (List[Dict]): Candidate configurations
+        metric (str): Training metric to maximize
+
+    Returns:
+        Dict: Window dates, best configuration, training metric and test results
+    """
+    start = time.perf_counter()
+
+    train_dates = monthly_rebalance_dates(window['train_start'], window['train_end'], warmup_months=0)
+    rows = [evaluate_configuration(backtest, config, window['train_start'], window['train_end'], train_dates)
+            for config in configs]
+    scores = np.array([row[metric] for row in rows], dtype=np.float64)
+    best_index = int(np.nanargmax(scores)) if not np.isnan(scores).all() else 0
+    best_config = configs[best_index]
+
+    test_dates = monthly_rebalance_dates(window['test_start'], window['test_end'], warmup_months=0)
+    test_results = backtest.run(best_config['periods'], best_config['weights'],
+                                window['test_start'], window['test_end'],
+                                rebalance_dates=test_dates,
+                                transaction_cost_pct=best_config['transaction_cost_pct'])
+
+    equity = test_results['equity_curve']
+
+    return {
+        'window_id': window['window_id'],
+        'train_start': window['train_start'],
+        'train_end': window['train_end'],
+        'test_start': window['test_start'],
+        'test_end': window['test_end'],
+        'best_config': best_config,
+        'train_metric': float(scores[best_index]),
+        'test_return': test_results['total_return'],
+        'test_rebalances': test_results['rebalance_count'],
+        'test_dates': test_results['dates'].asi8,
+        # First return includes the cost of opening the window's position
+        'test_returns': np.concatenate(([equity[0] / backtest.initial_capital - 1], equity[1:] / equity[:-1] - 1))
+                        if len(equity) else np.empty(0),
+        'seconds': time.perf_counter() - start
+    }
+
+
+# Per-process state, built once by the pool initializer
+_worker_backtest = None
+_worker_blocks = None
+
+
+def _attach_worker(descriptor: Dict, initial_capital: float, min_history: int):
+    """Attach to the shared panel and build this worker's return cache."""
+    global _worker_backtest, _worker_blocks
+    panel, _worker_blocks = attach_price_panel(descriptor)
+    _worker_backtest = VectorizedBacktest(panel, initial_capital, min_history=min_history)
+
+
+def _run_window(window: Dict, configs: List[Dict], metric: str) -> Dict:
+    """Optimize and test one window inside a worker process."""
+    return optimize_window(_worker_backtest, window, configs, metric)
+
+
+class WalkForwardOptimizer:
+    """Runs walk-forward optimization of momentum parameters over a PricePanel."""
+
+    def __init__(self, panel: PricePanel, configs: List[Dict], initial_capital: float = 100000,
+                 metric: str = 'annualized_sharpe', min_history: int = 1,
+                 max_workers: Optional[int] = None):
+        """
+        Initialize the optimizer.
+
+        Args:
+            panel (PricePanel): Price panel covering every window
+            configs (List[Dict]): Candidate configurations (see parameter_sweep)
+            initial_capital (float): Capital each test window starts with
+            metric (str): Training metric to maximize
+            min_history (int): Skip symbols with fewer bars than this at a rebalance
+            max_workers (int): Worker processes (default: CPU count, 1 runs in-process)
+        """
+        self.panel = panel
+        self.configs = configs
+        self.initial_capital = initial_capital
+        self.metric = metric
+        self.min_history = min_history
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.data_splitter = DataSplitManager()
+
+    def generate_windows(self, train_months: int = 12, test_months: int = 3,
+                         step_months: Optional[int] = None, anchored: bool = False) -> List[Dict]:
+        """
+        Generate walk-forward windows over the panel's dates.
+
+        Args:
+            train_months (int): Training window length (initial length when anchored)
+            test_months (int): Test window length
+            step_months (int): Months between windows (default: test_months)
+            anchored (bool): Grow the training window from the first date
+
+        Returns:
+            List[Dict]: Windows from DataSplitManager.generate_walk_forward_windows
+        """
+        return self.data_splitter.generate_walk_forward_windows(
+            self.panel.dates, train_months, test_months, step_months, anchored)
+
+    def run(self, windows: List[Dict]) -> Dict:
+        """
+        Optimize every window and stitch the out-of-sample periods.
+
+        Windows are independent (each test period starts in cash with
+        initial_capital), so they run in parallel; the stitched series
+        compounds each test period's daily returns in date order.
+
+        Args:
+            windows (List[Dict]): Windows from generate_windows
+
+        Returns:
+            Dict: Per-window table and stitched out-of-sample results in the
+                OOS engine layout (daily_returns, total_return, ...)
+        """
+        if not windows:
+            return {"error": "No walk-forward windows"}
+
+        workers = min(self.max_workers, len(windows))
+        print(f"Walk-forward: {len(windows)} windows x {len(self.configs)} configurations on {workers} worker(s)...")
+
+        start = time.perf_counter()
+        if workers == 1:
+            backtest = VectorizedBacktest(self.panel, self.initial_capital, min_history=self.min_history)
+            window_results = [optimize_window(backtest, window, self.configs, self.metric) for window in windows]
+        else:
+            with SharedPricePanel(self.panel) as shared:
+                with ProcessPoolExecutor(max_workers=workers, initializer=_attach_worker,
+                                         initargs=(shared.descriptor, self.initial_capital,
+                                                   self.min_history)) as executor:
+                    futures = [executor.submit(_run_window, window, self.configs, self.metric)
+                               for window in windows]
+                    window_results = [future.result() for future in futures]
+        elapsed = time.perf_counter() - start
+
+        print(f"Walk-forward finished in {elapsed:.2f}s")
+
+        return self.stitch_results(window_results)
+
+    def stitch_results(self, window_results: List[Dict]) -> Dict:
+        """
+        Combine per-window test periods into one out-of-sample result.
+
+        Args:
+            window_results (List[Dict]): Results from optimize_window
+
+        Returns:
+            Dict: Stitched results and a per-window summary table
+        """
+        if not window_results:
+            return {"error": "No walk-forward windows"}
+
+        window_results = sorted(window_results, key=lambda result: result['window_id'])
+
+        # With step_months < test_months the test periods overlap: each window
+        # only contributes the days before the next window's test period starts
+        returns_parts, date_parts = [], []
+        for result, following in zip(window_results, window_results[1:] + [None]):
+            keep = len(result['test_dates'])
+            if following is not None and len(following['test_dates']):
+                keep = np.searchsorted(result['test_dates'], following['test_dates'][0], side='left')
+            returns_parts.append(result['test_returns'][:keep])
+            date_parts.append(result['test_dates'][:keep])
+
+        daily_returns = np.concatenate(returns_parts)
+        dates = pd.to_datetime(np.concatenate(date_parts), utc=True)
+        equity = self.initial_capital * np.cumprod(1 + daily_returns)
+        final_value = float(equity[-1]) if len(equity) else float(self.initial_capital)
+
+        windows_table = pd.DataFrame([{
+            'window_id': result['window_id'],
+            'train_start': result['train_start'],
+            'train_end': result['train_end'],
+            'test_start': result['test_start'],
+            'test_end': result['test_end'],
+            'periods': result['best_config']['periods'],
+            'weights': result['best_config']['weights'],
+            'transaction_cost_pct': result['best_config']['transaction_cost_pct'],
+            f'train_{self.metric}': result['train_metric'],
+            'test_return_pct': result['test_return'],
+            'test_rebalances': result['test_rebalances'],
+            'seconds': result['seconds']
+        } for result in window_results])
+
+        return {
+            "backtest_type": "walk_forward",
+            "start_date": window_results[0]['test_start'],
+            "end_date": window_results[-1]['test_end'],
+            "initial_capital": self.initial_capital,
+            "final_portfolio_value": final_value,
+            "total_return": (final_value / self.initial_capital - 1) * 100,
+            "window_count": len(window_results),
+            "dates": dates,
+            "equity_curve": equity,
+            "daily_returns": daily_returns.tolist(),
+            "windows": windows_table
+        }
+
+
+def test_walk_forward():
+    """Test function to verify walk-forward optimization works correctly."""
+
+    print("Testing Walk-Forward Optimizer...")
+
+    sys.path.append('src/data_providers')
+    from etf_data_fetcher import ETFDataFetcher
+    from parameter_sweep import grid_configurations, period_grid, weight_grid
+
+    fetcher = ETFDataFetcher()
+    etf_data = {symbol: fetcher.load_data(symbol) for symbol in ['SPY', 'QQQ', 'IWM']}
+    if any(data.empty for data in etf_data.values()):
+        print("Missing ETF data. Run data fetcher first.")
+        return False
+
+    panel = PricePanel.from_frames(etf_data)
+    configs = grid_configurations(period_grid([21, 42, 63, 126], 3), weight_grid(3, 0.2, 0.2), [0.001])
+
+    for anchored in [False, True]:
+        optimizer = WalkForwardOptimizer(panel, configs)
+        windows = optimizer.generate_windows(train_months=12, test_months=3, anchored=anchored)
+        results = optimizer.run(windows)
+
+        print(f"\n{'Anchored' if anchored else 'Rolling'} walk-forward: {results['window_count']} windows, "
+              f"{results['start_date']} to {results['end_date']}")
+        print(results['windows'][['train_start', 'test_start', 'test_end', 'periods', 'weights',
+                                  'test_return_pct']].to_string(index=False))
+        print(f"Stitched OOS return: {results['total_return']:.2f}% over {len(results['daily_returns'])} days")
+
+    # Parallel windows over the shared panel must match the in-process run
+    parallel = WalkForwardOptimizer(panel, configs, max_workers=2).run(windows)
+    print(f"\nParallel run matches: {parallel['daily_returns'] == results['daily_returns']}")
+
+    return parallel['daily_returns'] == results['daily_returns']
+
+
+if __name__ == "__main__":
+    # Run test when script is executed directly
+    test_walk_forward()
@@ -0,0 +1,297 @@
+"""
+Benchmark Suite
+
+Times every hot path of the pipeline on synthetic universes of growing
+size (symbols x years): loading stored data, validating it (per symbol
+and as one panel), scoring momentum, rebalancing the portfolio, both
+backtest engines and the in-sample vs out-of-sample comparison. Results
+are written as JSON tagged with the git commit, and two result files can
+be compared to spot regressions and scaling changes between commits.
+
+Usage (from the repository root):
+    python benchmarks/run_benchmarks.py --symbols 3 10 50 --years 1 5
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/<baseline>.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Add paths to import our modules
+sys.path.append('benchmarks')
+sys.path.append('src/data_providers')
+sys.path.append('src/portfolio')
+sys.path.append('strategies/scenario_based')
+sys.path.append('utils')
+sys.path.append('backtesting')
+
+from synthetic_data import generate_etf_data, write_etf_data
+from data_validator import DataValidator
+from momentum_calculator import MomentumCalculator
+from portfolio_manager import PortfolioManager
+from momentum_backtest import MomentumBacktest
+from oos_backtest_engine import OOSBacktestEngine
+from performance_comparator import PerformanceComparator
+
+
+RESULTS_DIR = 'benchmarks/results'
+
+STRATEGY_PARAMETERS = {
+    'periods': [30, 90, 180],
+    'weights': [0.5, 0.3, 0.2],
+    'transaction_cost_pct': 0.001,
+    'rebalance_frequency': 'monthly'
+}
+
+REBALANCES_PER_RUN = 200
+
+
+def best_time(func: Callable, repeats: int) -> float:
+    """
+    Fastest wall time of several calls, with the callee's output silenced.
+
+    Args:
+        func (Callable): Function to time
+        repeats (int): Number of calls
+
+    Returns:
+        float: Seconds of the fastest call
+    """
+    best = float('inf')
+    for _ in range(repeats):
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - started)
+    return best
+
+
+def benchmark_case(n_symbols: int, years: float, repeats: int = 3, seed: int = 42) -> Dict:
+    """
+    Time every hot path on one synthetic universe.
+
+    Args:
+        n_symbols (int): Number of symbols
+        years (float): Years of daily history
+        repeats (int): Calls per benchmark (the fastest is kept)
+        seed (int): Random seed for the synthetic data
+
+    Returns:
+        Dict: Universe size and seconds per benchmark
+    """
+    etf_data = generate_etf_data(n_symbols, years, seed)
+    symbols = list(etf_data)
+    dates = etf_data[symbols[0]]['Date']
+    start_date, end_date = dates.iloc[0].strftime('%Y-%m-%d'), dates.iloc[-1].strftime('%Y-%m-%d')
+    prices = {symbol: float(data['Close'].iloc[-1]) for symbol, data in etf_data.items()}
+    timings = {}
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        with contextlib.redirect_stdout(io.StringIO()):
+            fetcher = write_etf_data(etf_data, data_dir)
+
+        # Stored data -> DataFrames for the whole universe
+        timings['fetcher_load'] = best_time(lambda: [fetcher.load_data(symbol) for symbol in symbols], repeats)
+
+        validator = DataValidator()
+        timings['validate_etf_data'] = best_time(
+            lambda: [validator.validate_etf_data(data, symbol) for symbol, data in etf_data.items()], repeats)
+        timings['validate_panel'] = best_time(lambda: validator.validate_panel(etf_data), repeats)
+
+        calculator = MomentumCalculator()
+        timings['multi_etf_momentum'] = best_time(lambda: calculator.calculate_multi_etf_momentum(etf_data), repeats)
+
+        # Seconds per rebalance, cycling through the universe
+        def rebalance_cycle():
+            portfolio = PortfolioManager(100000, 0.001)
+            for i in range(REBALANCES_PER_RUN):
+                portfolio.rebalance_to_etf(symbols[i % len(symbols)], prices, end_date)
+        timings['rebalance_to_etf'] = best_time(rebalance_cycle, repeats) / REBALANCES_PER_RUN
+
+        # Full in-sample run, including loading and validating from storage
+        backtest_results = {}
+
+        def momentum_backtest():
+            backtest = MomentumBacktest(etf_symbols=symbols)
+            backtest.data_fetcher = fetcher
+            backtest_results.update(backtest.run_backtest(start_date, end_date))
+        timings['momentum_backtest'] = best_time(momentum_backtest, repeats)
+
+    oos_results = {}
+
+    def oos_backtest():
+        engine = OOSBacktestEngine({**STRATEGY_PARAMETERS, 'etf_symbols': symbols})
+        oos_results.update(engine.run_oos_backtest(etf_data, start_date, end_date))
+    timings['oos_backtest'] = best_time(oos_backtest, repeats)
+
+    # Timing an early exit would hide a broken engine
+    for engine, results in (('momentum_backtest', backtest_results), ('oos_backtest', oos_results)):
+        if 'error' in results:
+            raise RuntimeError(f"{engine} failed on {n_symbols} symbols x {years} years: {results['error']}")
+
+    # First half of the equity curve against the second half
+    daily_returns = backtest_results.get('daily_returns', [])
+    half = len(daily_returns) // 2
+    timings['performance_comparator'] = best_time(
+        lambda: PerformanceComparator().compare_in_sample_vs_oos(
+            {'daily_returns': daily_returns[:half]}, {'daily_returns': daily_returns[half:]}), repeats)
+
+    return {
+        'symbols': n_symbols,
+        'years': years,
+        'days': len(dates),
+        'seconds': timings
+    }
+
+
+def git_commit() -> str:
+    """Short hash of the checked-out commit ('unknown' outside a git checkout)."""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run_suite(symbol_counts: List[int] = (3, 10, 50), years: List[float] = (1.0, 5.0),
+              repeats: int = 3, seed: int = 42) -> Dict:
+    """
+    Run every benchmark over a grid of universe sizes.
+
+    Args:
+        symbol_counts (List[int]): Universe sizes
+        years (List[float]): History lengths in years
+        repeats (int): Calls per benchmark
+        seed (int): Random seed for the synthetic data
+
+    Returns:
+        Dict: Metadata (commit, versions, machine) and one case per grid point
+    """
+    results = {
+        'metadata': {
+            'timestamp': datetime.now().isoformat(),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'repeats': repeats,
+            'seed': seed
+        },
+        'cases': []
+    }
+
+    for n_years in years:
+        for n_symbols in symbol_counts:
+            started = time.perf_counter()
+            case = benchmark_case(n_symbols, n_years, repeats, seed)
+            results['cases'].append(case)
+            print(f"{n_symbols:>5} symbols x {n_years:>4} years: " +
+                  ", ".join(f"{name} {seconds * 1000:.2f}ms" for name, seconds in case['seconds'].items()) +
+                  f" ({time.perf_counter() - started:.1f}s)")
+
+    return results
+
+
+def save_results(results: Dict, output_dir: str = RESULTS_DIR) -> str:
+    """
+    Write suite results to a JSON file named after the time and commit.
+
+    Args:
+        results (Dict): Output of run_suite
+        output_dir (str): Results directory
+
+    Returns:
+        str: Path of the written file
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    stamp = datetime.fromisoformat(results['metadata']['timestamp']).strftime('%Y%m%d-%H%M%S')
+    path = os.path.join(output_dir, f"{stamp}_{results['metadata']['commit']}.json")
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2)
+    return path
+
+
+def load_results(path: str) -> Dict:
+    """Load suite results written by save_results."""
+    with open(path) as f:
+        return json.load(f)
+
+
+def results_frame(results: Dict) -> pd.DataFrame:
+    """
+    Flatten suite results into one row per case and benchmark.
+
+    Args:
+        results (Dict): Output of run_suite
+
+    Returns:
+        pd.DataFrame: symbols, years, days, benchmark and seconds columns
+    """
+    return pd.DataFrame([
+        {'symbols': case['symbols'], 'years': case['years'], 'days': case['days'],
+         'benchmark': name, 'seconds': seconds}
+        for case in results['cases'] for name, seconds in case['seconds'].items()
+    ])
+
+
+def compare_results(baseline: Dict, current: Dict, tolerance: float = 0.2) -> pd.DataFrame:
+    """
+    Compare two suite runs benchmark by benchmark.
+
+    Args:
+        baseline (Dict): Earlier results
+        current (Dict): New results
+        tolerance (float): Relative slowdown flagged as a regression
+
+    Returns:
+        pd.DataFrame: Matching rows with both timings, the ratio and a regression flag
+    """
+    keys = ['symbols', 'years', 'benchmark']
+    merged = results_frame(baseline).merge(results_frame(current), on=keys, suffixes=('_baseline', '_current'))
+    merged['ratio'] = merged['seconds_current'] / merged['seconds_baseline']
+    merged['regression'] = merged['ratio'] > 1 + tolerance
+    return merged[keys + ['seconds_baseline', 'seconds_current', 'ratio', 'regression']]
+
+
+def main(argv: Optional[List[str]] = None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark the momentum pipeline on synthetic data")
+    parser.add_argument('--symbols', type=int, nargs='+', default=[3, 10, 50], help="Universe sizes")
+    parser.add_argument('--years', type=float, nargs='+', default=[1.0, 5.0], help="History lengths in years")
+    parser.add_argument('--repeats', type=int, default=3, help="Calls per benchmark (fastest is kept)")
+    parser.add_argument('--seed', type=int, default=42, help="Random seed for the synthetic data")
+    parser.add_argument('--output-dir', default=RESULTS_DIR, help="Directory for the JSON results")
+    parser.add_argument('--compare', help="Earlier results file to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Slowdown flagged as a regression")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.symbols, args.years, args.repeats, args.seed)
+    path = save_results(results, args.output_dir)
+    print(f"\nResults written to {path}")
+
+    if args.compare:
+        comparison = compare_results(load_results(args.compare), results, args.tolerance)
+        print(f"\nComparison with {args.compare}:")
+        print(comparison.round(4).to_string(index=False))
+        regressions = comparison[comparison['regression']]
+        print(f"\n{len(regressions)} regression(s) above {args.tolerance:.0%}")
+
+    return results
+
+
+if __name__ == "__main__":
+    main()
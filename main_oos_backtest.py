@@ -7,6 +7,7 @@ Combines all OOS modules for comprehensive strategy validation.
 
 import sys
 import pandas as pd
+import numpy as np
 from datetime import datetime
 from typing import Dict, Tuple
 
@@ -20,6 +21,22 @@ from data_split_manager import DataSplitManager
 from oos_validator import OutOfSampleValidator
 from performance_comparator import PerformanceComparator
 from oos_backtest_engine import OOSBacktestEngine
+from structured_logging import configure_logging, shutdown_logging
+
+
+def first_full_history_position(panel, periods: list):
+    """
+    First panel column on which some ETF has a full momentum score.
+    
+    Args:
+        panel (PricePanel): Aligned price panel
+        periods (list): Lookback periods in bars
+        
+    Returns:
+        int: Column position, or None if no ETF ever has max(periods) bars of history
+    """
+    scored = np.flatnonzero((panel.bar_ordinals >= max(periods)).any(axis=0))
+    return int(scored[0]) if len(scored) else None
 
 
 class MainOOSController:
@@ -35,6 +52,22 @@ class MainOOSController:
         self.etf_symbols = etf_symbols
         self.results = {}
         
+        # Strategy parameters used in-sample and frozen for out-of-sample
+        self.strategy_parameters = {
+            'periods': [30, 90, 180],
+            'weights': [0.5, 0.3, 0.2],
+            'transaction_cost_pct': 0.001,
+            'rebalance_frequency': 'monthly'
+        }
+        
+        # Lookbacks and weights swept on the in-sample split; the best row
+        # (by annualized Sharpe) replaces the periods and weights above
+        self.parameter_grid = {
+            'period_candidates': [21, 30, 63, 90, 126, 180],
+            'weight_step': 0.1,
+            'min_weight': 0.1
+        }
+        
         # Initialize components
         self.data_fetcher = ETFDataFetcher()
         self.data_splitter = DataSplitManager()
@@ -86,24 +119,28 @@ class MainOOSController:
             if symbol in in_sample_data and symbol in oos_data:
                 print(f"  {symbol}: {len(in_sample_data[symbol])} in-sample, {len(oos_data[symbol])} out-of-sample")
         
-        # Step 3: Run in-sample backtest (to establish baseline)
-        print(f"\n3. RUNNING IN-SAMPLE BACKTEST (BASELINE)")
+        # Step 3: Select and freeze parameters on the in-sample split
+        print(f"\n3. FREEZING STRATEGY PARAMETERS (IN-SAMPLE SWEEP)")
         print("-" * 30)
         
-        is_results = self.run_in_sample_backtest(in_sample_data, initial_capital)
-        if "error" in is_results:
-            analysis_results["error"] = f"In-sample backtest failed: {is_results['error']}"
+        frozen_params = self.freeze_strategy_parameters(in_sample_data)
+        if "error" in frozen_params:
+            analysis_results["error"] = f"Parameter sweep failed: {frozen_params['error']}"
             return analysis_results
         
-        print(f"  In-sample return: {is_results['total_return']:.2f}%")
+        param_hash = self.oos_validator.capture_strategy_parameters('momentum_strategy', frozen_params)
+        print(f"  Parameters frozen with hash: {param_hash[:8]}...")
         
-        # Step 4: Capture and freeze parameters
-        print(f"\n4. FREEZING STRATEGY PARAMETERS")
+        # Step 4: Run in-sample backtest with the frozen parameters (baseline)
+        print(f"\n4. RUNNING IN-SAMPLE BACKTEST (BASELINE)")
         print("-" * 30)
         
-        frozen_params = self.freeze_strategy_parameters(is_results)
-        param_hash = self.oos_validator.capture_strategy_parameters('momentum_strategy', frozen_params)
-        print(f"  Parameters frozen with hash: {param_hash[:8]}...")
+        is_results = self.run_in_sample_backtest(in_sample_data, initial_capital, frozen_params)
+        if "error" in is_results:
+            analysis_results["error"] = f"In-sample backtest failed: {is_results['error']}"
+            return analysis_results
+        
+        print(f"  In-sample return: {is_results['total_return']:.2f}%")
         
         # Step 5: Run out-of-sample backtest
         print(f"\n5. RUNNING OUT-OF-SAMPLE BACKTEST")
@@ -144,12 +181,58 @@ class MainOOSController:
         
         return analysis_results
     
+    def run_walk_forward_analysis(self, train_months: int = 12, test_months: int = 3,
+                                  anchored: bool = False, configs: list = None,
+                                  initial_capital: float = 100000,
+                                  max_workers: int = None) -> Dict:
+        """
+        Run rolling or anchored walk-forward optimization.
+        
+        Args:
+            train_months (int): Training window length (initial length when anchored)
+            test_months (int): Test window length
+            anchored (bool): Grow the training window from the first date
+            configs (list): Candidate configurations (default: lookback/weight grid)
+            initial_capital (float): Capital each test window starts with
+            max_workers (int): Worker processes for the windows
+            
+        Returns:
+            Dict: Stitched out-of-sample results with a per-window table
+        """
+        from price_panel import PricePanel
+        from parameter_sweep import grid_configurations, period_grid, weight_grid
+        from walk_forward import WalkForwardOptimizer
+        
+        print("=" * 60)
+        print(f"{'ANCHORED' if anchored else 'ROLLING'} WALK-FORWARD ANALYSIS")
+        print("=" * 60)
+        
+        etf_data = self.load_etf_data()
+        if not etf_data:
+            return {"error": "Failed to load ETF data"}
+        
+        if configs is None:
+            configs = grid_configurations(period_grid([21, 42, 63, 90, 126, 180], 3),
+                                          weight_grid(3, step=0.1, min_weight=0.1), [0.001])
+        
+        optimizer = WalkForwardOptimizer(PricePanel.from_frames(etf_data), configs,
+                                         initial_capital, max_workers=max_workers)
+        windows = optimizer.generate_windows(train_months, test_months, anchored=anchored)
+        results = optimizer.run(windows)
+        
+        if "error" not in results:
+            print(results['windows'][['test_start', 'test_end', 'periods', 'weights', 'test_return_pct']].to_string(index=False))
+            print(f"\nStitched out-of-sample return: {results['total_return']:.2f}% "
+                  f"({results['start_date']} to {results['end_date']})")
+        
+        return results
+    
     def load_etf_data(self) -> Dict[str, pd.DataFrame]:
         """Load data for all ETFs."""
         etf_data = {}
         
         for symbol in self.etf_symbols:
-            data = self.data_fetcher.load_data_from_csv(symbol)
+            data = self.data_fetcher.load_data(symbol)
             if not data.empty:
                 etf_data[symbol] = data
             else:
@@ -162,44 +245,106 @@ class MainOOSController:
         return self.data_splitter.split_multiple_etfs(etf_data, split_date)
     
     def run_in_sample_backtest(self, in_sample_data: Dict[str, pd.DataFrame], 
-                              initial_capital: float) -> Dict:
-        """Run in-sample backtest to establish baseline."""
-        # Import the original momentum backtest for in-sample
-        from momentum_backtest import MomentumBacktest
-        
-        # Run in-sample backtest
-        is_backtest = MomentumBacktest(
-            etf_symbols=list(in_sample_data.keys()),
-            initial_capital=initial_capital,
-            transaction_cost_pct=0.001
-        )
+                              initial_capital: float, params: Dict = None) -> Dict:
+        """
+        Run in-sample backtest to establish baseline.
         
-        # Get date range for in-sample data
-        start_date = min(data['Date'].min() for data in in_sample_data.values()).strftime('%Y-%m-%d')
-        end_date = max(data['Date'].max() for data in in_sample_data.values()).strftime('%Y-%m-%d')
+        Uses the vectorized engine over an aligned panel of the in-sample
+        data (same rotation and trade logic as MomentumBacktest) and returns
+        results in the OOS engine layout, including daily returns.
         
-        # Temporarily store the data
-        is_backtest.etf_data = in_sample_data
+        Like the OOS engine, the curve starts on the first rebalance: the
+        first date on which a full momentum score exists (max(periods) bars
+        of history), with monthly rebalances from there. Lookbacks still see
+        the earlier bars, so no leading cash-only days dilute the IS metrics.
         
-        # Run the backtest logic (simplified version)
-        results = {
-            "start_date": start_date,
-            "end_date": end_date,
-            "initial_capital": initial_capital,
-            "final_portfolio_value": initial_capital * 1.13,  # Use known 13% return
-            "total_return": 13.0,
-            "backtest_type": "in_sample"
+        Args:
+            in_sample_data (Dict): In-sample data for each ETF
+            initial_capital (float): Starting capital
+            params (Dict): Strategy parameters (default: self.strategy_parameters)
+            
+        Returns:
+            Dict: In-sample backtest results
+        """
+        from price_panel import PricePanel
+        from vectorized_backtest import VectorizedBacktest, monthly_rebalance_dates
+        
+        if not in_sample_data:
+            return {"error": "No in-sample data"}
+        
+        params = params or self.strategy_parameters
+        panel = PricePanel.from_frames(in_sample_data)
+        backtest = VectorizedBacktest(panel, initial_capital, params['transaction_cost_pct'])
+        
+        start_position = first_full_history_position(panel, params['periods'])
+        if start_position is None:
+            return {"error": "No rebalances in the in-sample period"}
+        
+        start_date = panel.timestamp(start_position)
+        end_date = panel.timestamp(len(panel) - 1)
+        rebalance_dates = monthly_rebalance_dates(start_date, end_date, warmup_months=0)
+        results = backtest.run(params['periods'], params['weights'], start_date, end_date, rebalance_dates)
+        
+        dates, daily_values = results.pop('dates'), results.pop('equity_curve')
+        
+        # The curve must open invested, not on a cash-only segment
+        first_rebalance = results['rebalance_history'][0] if results['rebalance_history'] else {}
+        if first_rebalance.get('date') != dates[0].strftime('%Y-%m-%d') or not first_rebalance.get('rebalance_success'):
+            return {"error": "In-sample curve starts before the first executed rebalance"}
+        
+        return {
+            "backtest_type": "in_sample",
+            **results,
+            "strategy_parameters": params,
+            "dates": dates.strftime('%Y-%m-%d').tolist(),
+            "daily_values": daily_values.tolist()
         }
-        
-        return results
     
-    def freeze_strategy_parameters(self, is_results: Dict) -> Dict:
-        """Freeze strategy parameters based on in-sample results."""
+    def freeze_strategy_parameters(self, in_sample_data: Dict[str, pd.DataFrame]) -> Dict:
+        """
+        Sweep lookbacks and weights on the in-sample split and freeze the best row.
+        
+        Every configuration is scored on the same calendar, starting on the
+        first date the longest candidate lookback has full history, so no
+        configuration is favoured by a shorter warmup. The transaction cost
+        is a market assumption, not a tuning knob, and is kept fixed.
+        
+        Args:
+            in_sample_data (Dict): In-sample data for each ETF
+            
+        Returns:
+            Dict: Frozen strategy parameters (or an "error" key)
+        """
+        from price_panel import PricePanel
+        from parameter_sweep import ParameterSweep, grid_configurations, period_grid, weight_grid
+        from vectorized_backtest import monthly_rebalance_dates
+        
+        if not in_sample_data:
+            return {"error": "No in-sample data"}
+        
+        grid = self.parameter_grid
+        configs = grid_configurations(period_grid(grid['period_candidates'], len(self.strategy_parameters['periods'])),
+                                      weight_grid(len(self.strategy_parameters['weights']), grid['weight_step'],
+                                                  grid['min_weight']),
+                                      [self.strategy_parameters['transaction_cost_pct']])
+        
+        sweep = ParameterSweep(PricePanel.from_frames(in_sample_data))
+        start_position = first_full_history_position(sweep.panel, grid['period_candidates'])
+        if start_position is None:
+            return {"error": "In-sample data is shorter than the longest candidate lookback"}
+        
+        start_date = sweep.panel.timestamp(start_position)
+        end_date = sweep.panel.timestamp(len(sweep.panel) - 1)
+        results = sweep.run(configs, start_date, end_date,
+                            rebalance_dates=monthly_rebalance_dates(start_date, end_date, warmup_months=0))
+        best = ParameterSweep.best_parameters(results, configs=configs)
+        
+        print(f"  Best of {len(configs)} configurations: periods {best['periods']}, weights {best['weights']} "
+              f"(IS Sharpe {results['annualized_sharpe'].max():.2f})")
+        
         frozen_params = {
-            'periods': [30, 90, 180],
-            'weights': [0.5, 0.3, 0.2],
-            'transaction_cost_pct': 0.001,
-            'rebalance_frequency': 'monthly',
+            **self.strategy_parameters,
+            **best,
             'etf_symbols': self.etf_symbols
         }
         
@@ -241,6 +386,15 @@ class MainOOSController:
         else:
             comparison["consistency_assessment"] = "low"
         
+        # Full metric comparison on the daily return series of both periods
+        if is_results.get('daily_returns') and oos_results.get('daily_returns'):
+            detailed = self.performance_comparator.compare_in_sample_vs_oos(is_results, oos_results)
+            if "error" not in detailed:
+                comparison["detailed_comparison"] = detailed
+                metrics = detailed['performance_comparison']
+                print(f"  Annualized Sharpe: IS {metrics['annualized_sharpe']['in_sample']:.2f}, "
+                      f"OOS {metrics['annualized_sharpe']['out_of_sample']:.2f}")
+        
         return comparison
     
     def validate_scientific_rigor(self, frozen_params: Dict, oos_results: Dict) -> Dict:
@@ -366,6 +520,9 @@ class MainOOSController:
 def main():
     """Main function to run complete OOS analysis."""
     
+    # Rebalance progress to the console and as JSON lines into logs/
+    log_path = configure_logging()
+    
     # Initialize controller
     controller = MainOOSController(['SPY', 'QQQ', 'IWM'])
     
@@ -375,6 +532,9 @@ def main():
         initial_capital=100000
     )
     
+    shutdown_logging()
+    print(f"\nStructured log written to {log_path}")
+    
     return results
 
 
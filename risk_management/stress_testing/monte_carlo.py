@@ -0,0 +1,367 @@
+"""
+Monte-Carlo Stress Testing Module
+
+Measures how robust the single-ETF momentum rotation is beyond the one
+historical path. Daily log-return blocks are bootstrapped from the loaded
+ETF histories (whole cross-sections, so correlations between ETFs are
+kept), turned into synthetic price paths and traded by a vectorized
+version of the momentum rule on all paths at once as a
+paths x days x symbols array. Paths are processed in chunks sized to a
+memory budget. Independent module that can be tested separately.
+"""
+
+import numpy as np
+import pandas as pd
+import sys
+import time
+from typing import Dict, Optional
+
+# Add paths to import our modules
+sys.path.append('strategies/scenario_based')
+sys.path.append('utils')
+
+from momentum_calculator import MomentumCalculator
+from price_panel import PricePanel
+
+
+TRADING_DAYS_PER_YEAR = 252
+
+# Consecutive paths drawn from one child seed; chunks of any size see the same draws
+PATHS_PER_STREAM = 64
+
+# float64 arrays of one value per path and day held alongside the price cube while
+# a chunk is simulated and scored (indices, holdings, held returns, growth, factors,
+# equity, daily returns, running max, drawdowns)
+DAY_ARRAYS_PER_PATH = 9
+
+
+def panel_log_returns(panel: PricePanel) -> np.ndarray:
+    """
+    Daily log returns on the dates where every symbol trades.
+
+    Args:
+        panel (PricePanel): Aligned price panel
+
+    Returns:
+        np.ndarray: Log returns, days x symbols (rows with any gap dropped)
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_prices = np.log(np.where(panel.closes > 0, panel.closes, np.nan)).T
+
+    log_returns = np.diff(log_prices, axis=0)
+    return np.ascontiguousarray(log_returns[np.isfinite(log_returns).all(axis=1)])
+
+
+class BlockBootstrap:
+    """Circular block bootstrap of return rows."""
+
+    def __init__(self, n_observations: int, block_length: int = 21, seed: int = 42):
+        """
+        Initialize the sampler.
+
+        Args:
+            n_observations (int): Number of historical return rows
+            block_length (int): Consecutive rows per block (keeps short-term
+                autocorrelation and volatility clustering)
+            seed (int): Random seed
+        """
+        self.n_observations = n_observations
+        self.block_length = max(1, min(block_length, n_observations))
+        self.seed = seed
+
+    def _stream_starts(self, stream: int, n_blocks: int) -> np.ndarray:
+        """Block starts of the PATHS_PER_STREAM paths drawn from one child seed."""
+        rng = np.random.default_rng(np.random.SeedSequence(self.seed, spawn_key=(stream,)))
+        return rng.integers(0, self.n_observations, size=(PATHS_PER_STREAM, n_blocks, 1))
+
+    def sample_indices(self, n_paths: int, n_days: int, first_path: int = 0) -> np.ndarray:
+        """
+        Draw row indices for a range of synthetic paths.
+
+        Every PATHS_PER_STREAM consecutive paths come from their own child
+        SeedSequence, so a path's draws do not depend on how the paths are
+        split into chunks and only the requested range is allocated.
+
+        Args:
+            n_paths (int): Number of paths
+            n_days (int): Days per path
+            first_path (int): Number of the first path in the range
+
+        Returns:
+            np.ndarray: Row indices, n_paths x n_days (int32)
+        """
+        n_blocks = -(-n_days // self.block_length)
+        first_stream, last_stream = first_path // PATHS_PER_STREAM, (first_path + n_paths - 1) // PATHS_PER_STREAM
+        starts = np.concatenate([self._stream_starts(stream, n_blocks)
+                                 for stream in range(first_stream, last_stream + 1)])
+        skip = first_path - first_stream * PATHS_PER_STREAM
+        starts = starts[skip:skip + n_paths]
+        offsets = np.arange(self.block_length)
+        indices = (starts + offsets).reshape(n_paths, -1)[:, :n_days] % self.n_observations
+
+        return indices.astype(np.int32)
+
+
+class MonteCarloEngine:
+    """Runs the momentum rotation on bootstrapped price paths."""
+
+    def __init__(self, panel: PricePanel, momentum_calculator: Optional[MomentumCalculator] = None,
+                 transaction_cost_pct: float = 0.001, rebalance_days: int = 21,
+                 block_length: int = 21, initial_capital: float = 100000,
+                 max_chunk_bytes: int = 256 * 2**20, seed: int = 42):
+        """
+        Initialize the engine.
+
+        Args:
+            panel (PricePanel): Historical panel the return blocks are drawn from
+            momentum_calculator (MomentumCalculator): Lookback periods and weights (default: strategy defaults)
+            transaction_cost_pct (float): Cost per side as a fraction of traded value
+            rebalance_days (int): Trading days between rebalances (21 ~ monthly)
+            block_length (int): Bootstrap block length in days
+            initial_capital (float): Starting capital of every path
+            max_chunk_bytes (int): Memory budget for one chunk (price cube and per-path day arrays)
+            seed (int): Random seed
+        """
+        self.panel = panel
+        self.symbols = list(panel.symbols)
+        self.momentum_calculator = momentum_calculator or MomentumCalculator()
+        self.transaction_cost_pct = transaction_cost_pct
+        self.rebalance_days = rebalance_days
+        self.initial_capital = initial_capital
+        self.max_chunk_bytes = max_chunk_bytes
+
+        self.log_returns = panel_log_returns(panel)
+        self.bootstrap = BlockBootstrap(len(self.log_returns), block_length, seed)
+
+    @classmethod
+    def from_frames(cls, etf_data: Dict[str, pd.DataFrame], **kwargs) -> 'MonteCarloEngine':
+        """
+        Build an engine from a dictionary of ETF DataFrames.
+
+        Args:
+            etf_data (Dict): Historical data for each ETF
+            **kwargs: Passed to MonteCarloEngine
+
+        Returns:
+            MonteCarloEngine: Engine over the aligned panel
+        """
+        return cls(PricePanel.from_frames(etf_data), **kwargs)
+
+    def chunk_size(self, n_days: int) -> int:
+        """
+        Paths per chunk so one chunk's working set fits max_chunk_bytes.
+
+        Counts the price cube and the per-path day arrays built while a
+        chunk is simulated and scored.
+
+        Args:
+            n_days (int): Days per path
+
+        Returns:
+            int: Paths per chunk (at least 1)
+        """
+        bytes_per_path = (n_days + 1) * (len(self.symbols) + DAY_ARRAYS_PER_PATH) * 8
+        return max(1, self.max_chunk_bytes // bytes_per_path)
+
+    def rebalance_rows(self, n_days: int) -> np.ndarray:
+        """
+        Path rows at which the strategy rebalances.
+
+        The first rebalance waits until the longest lookback is available.
+
+        Args:
+            n_days (int): Days per path
+
+        Returns:
+            np.ndarray: Row numbers (row 0 is the starting price)
+        """
+        return np.arange(max(self.momentum_calculator.periods), n_days, self.rebalance_days)
+
+    def simulate_paths(self, indices: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Trade the momentum rotation on a batch of paths.
+
+        Every path starts at price 1 for each symbol. At each rebalance row
+        the symbol with the highest weighted momentum score is held until
+        the next rebalance (fractional shares); entering costs one side of
+        transaction costs and switching costs two.
+
+        Args:
+            indices (np.ndarray): Return-row indices, paths x days
+
+        Returns:
+            Dict: Per-path arrays of equity (paths x days+1), switches and
+                the equal-weight buy-and-hold final value
+        """
+        n_paths, n_days = indices.shape
+        cost_pct = self.transaction_cost_pct
+
+        # paths x days+1 x symbols cumulative log prices, built in place
+        log_prices = np.empty((n_paths, n_days + 1, len(self.symbols)))
+        log_prices[:, 0] = 0.0
+        np.take(self.log_returns, indices, axis=0, out=log_prices[:, 1:])
+        np.cumsum(log_prices[:, 1:], axis=1, out=log_prices[:, 1:])
+
+        rows = self.rebalance_rows(n_days)
+        scores = np.zeros((n_paths, len(rows), len(self.symbols)))
+        for period, weight in zip(self.momentum_calculator.periods, self.momentum_calculator.weights):
+            scores += np.expm1(log_prices[:, rows] - log_prices[:, rows - period]) * weight
+        leaders = scores.argmax(axis=2) if len(rows) else np.empty((n_paths, 0), dtype=np.int64)
+
+        # Holding for the return into day d: the leader of the last rebalance before d (-1 = cash)
+        holdings = np.concatenate([np.full((n_paths, 1), -1), leaders], axis=1)
+        last_rebalance = np.searchsorted(rows, np.arange(1, n_days + 1), side='left')
+        held = holdings[:, last_rebalance]
+
+        held_returns = self.log_returns[indices, np.maximum(held, 0)]
+        growth = np.where(held >= 0, np.exp(held_returns), 1.0)
+
+        previous = holdings[:, :-1]
+        switched = leaders != previous
+        sides = np.where(switched, np.where(previous >= 0, 2, 1), 0)
+        factors = np.ones((n_paths, n_days + 1))
+        factors[:, 1:] = growth
+        factors[:, rows] *= (1 - cost_pct) ** sides
+
+        equity = self.initial_capital * np.cumprod(factors, axis=1)
+        equal_weight = self.initial_capital * np.exp(log_prices[:, -1]).mean(axis=1)
+
+        return {
+            "equity": equity,
+            "switches": switched.sum(axis=1),
+            "equal_weight_final": equal_weight
+        }
+
+    def path_metrics(self, simulated: Dict[str, np.ndarray]) -> pd.DataFrame:
+        """
+        Headline metrics for every path (equity_metrics definitions, row-wise).
+
+        Args:
+            simulated (Dict): Output of simulate_paths
+
+        Returns:
+            pd.DataFrame: One row per path
+        """
+        equity = simulated["equity"]
+        n_days = equity.shape[1] - 1
+        returns = equity[:, 1:] / equity[:, :-1] - 1
+
+        volatility = returns.std(axis=1, ddof=1) if n_days > 1 else np.zeros(len(equity))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sharpe = np.where(volatility > 0, returns.mean(axis=1) / volatility, 0.0)
+        running_max = np.maximum.accumulate(equity, axis=1)
+        max_drawdown = ((equity - running_max) / running_max).min(axis=1)
+
+        growth = equity[:, -1] / self.initial_capital
+        years = n_days / TRADING_DAYS_PER_YEAR
+
+        return pd.DataFrame({
+            "total_return_pct": (growth - 1) * 100,
+            "annualized_return_pct": (growth ** (1 / years) - 1) * 100 if years > 0 else 0.0,
+            "annualized_volatility": volatility * np.sqrt(TRADING_DAYS_PER_YEAR),
+            "annualized_sharpe": sharpe * np.sqrt(TRADING_DAYS_PER_YEAR),
+            "max_drawdown_pct": max_drawdown * 100,
+            "switches": simulated["switches"],
+            "excess_vs_equal_weight_pct": (equity[:, -1] - simulated["equal_weight_final"]) / self.initial_capital * 100
+        })
+
+    def historical_metrics(self) -> pd.Series:
+        """
+        Metrics of the rule on the actual history (same simplified execution).
+
+        Returns:
+            pd.Series: Historical path metrics
+        """
+        indices = np.arange(len(self.log_returns), dtype=np.int32)[None, :]
+        return self.path_metrics(self.simulate_paths(indices)).iloc[0]
+
+    def run(self, n_paths: int = 1000, n_days: Optional[int] = None) -> Dict:
+        """
+        Simulate the strategy on bootstrapped paths.
+
+        Args:
+            n_paths (int): Number of synthetic paths
+            n_days (int): Trading days per path (default: length of the history)
+
+        Returns:
+            Dict: Per-path metrics, percentile summary, historical metrics and
+                where the history ranks in the simulated distribution
+        """
+        n_days = n_days or len(self.log_returns)
+        if n_days <= max(self.momentum_calculator.periods):
+            return {"error": f"Paths of {n_days} days are shorter than the longest lookback"}
+        if len(self.log_returns) < self.bootstrap.block_length:
+            return {"error": "Not enough overlapping history to bootstrap"}
+
+        chunk = self.chunk_size(n_days)
+        print(f"Monte Carlo: {n_paths:,} paths x {n_days} days x {len(self.symbols)} symbols "
+              f"in chunks of {chunk:,} paths...")
+
+        start = time.perf_counter()
+        # Indices are drawn per chunk so memory stays within max_chunk_bytes
+        metrics = [self.path_metrics(self.simulate_paths(
+                       self.bootstrap.sample_indices(min(chunk, n_paths - first), n_days, first)))
+                   for first in range(0, n_paths, chunk)]
+        paths = pd.concat(metrics, ignore_index=True)
+        elapsed = time.perf_counter() - start
+
+        print(f"Monte Carlo finished in {elapsed:.2f}s")
+
+        historical = self.historical_metrics()
+        columns = ["total_return_pct", "annualized_return_pct", "annualized_sharpe",
+                   "max_drawdown_pct", "excess_vs_equal_weight_pct"]
+
+        return {
+            "n_paths": n_paths,
+            "n_days": n_days,
+            "seconds": elapsed,
+            "paths": paths,
+            "summary": paths[columns].quantile([0.05, 0.25, 0.5, 0.75, 0.95]),
+            "probability_of_loss": float((paths["total_return_pct"] < 0).mean()),
+            "probability_beats_equal_weight": float((paths["excess_vs_equal_weight_pct"] > 0).mean()),
+            "historical": historical,
+            "historical_percentile": {
+                column: float((paths[column] < historical[column]).mean() * 100)
+                for column in ["annualized_return_pct", "annualized_sharpe", "max_drawdown_pct"]
+            }
+        }
+
+
+def test_monte_carlo():
+    """Test function to verify the Monte-Carlo engine works correctly."""
+
+    print("Testing Monte Carlo Engine...")
+
+    sys.path.append('src/data_providers')
+    from etf_data_fetcher import ETFDataFetcher
+
+    fetcher = ETFDataFetcher()
+    etf_data = {symbol: fetcher.load_data(symbol) for symbol in ['SPY', 'QQQ', 'IWM']}
+    if any(data.empty for data in etf_data.values()):
+        print("Missing ETF data. Run data fetcher first.")
+        return False
+
+    engine = MonteCarloEngine.from_frames(etf_data)
+    results = engine.run(n_paths=2000, n_days=504)
+    if "error" in results:
+        print(f"Monte Carlo failed: {results['error']}")
+        return False
+
+    print(f"\nPercentiles over {results['n_paths']:,} two-year paths:")
+    print(results['summary'].round(2).to_string())
+    print(f"\nProbability of loss: {results['probability_of_loss']:.1%}")
+    print(f"Probability of beating equal weight: {results['probability_beats_equal_weight']:.1%}")
+    print(f"Historical Sharpe {results['historical']['annualized_sharpe']:.2f} is at the "
+          f"{results['historical_percentile']['annualized_sharpe']:.0f}th percentile")
+
+    # Chunking must not change the results
+    small = MonteCarloEngine.from_frames(etf_data, max_chunk_bytes=1 * 2**20).run(n_paths=2000, n_days=504)
+    same = np.allclose(small['paths'].values, results['paths'].values)
+    print(f"Chunked run matches: {same}")
+
+    return same
+
+
+if __name__ == "__main__":
+    # Run test when script is executed directly
+    test_monte_carlo()
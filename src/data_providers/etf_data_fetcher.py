@@ -9,21 +9,104 @@ import pandas as pd
 import yfinance as yf
 from datetime import datetime, timedelta
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
 import os
 
+from price_store import CSVPriceStore, create_price_store, migrate_csv_to_store, benchmark_load_times
+
+
+class YahooFinanceProvider:
+    """Downloads daily price history from Yahoo Finance."""
+    
+    def history(self, symbol, start_date, end_date):
+        """
+        Download raw price history.
+        
+        Args:
+            symbol (str): ETF symbol
+            start_date (str): Start date in 'YYYY-MM-DD' format
+            end_date (str): End date in 'YYYY-MM-DD' format (exclusive)
+            
+        Returns:
+            pd.DataFrame: Price history indexed by Date
+        """
+        return yf.Ticker(symbol).history(start=start_date, end=end_date)
+
+
+class RateLimiter:
+    """Thread-safe limiter that spaces calls at a fixed maximum rate."""
+    
+    def __init__(self, calls_per_second):
+        """
+        Initialize the rate limiter.
+        
+        Args:
+            calls_per_second (float): Maximum sustained call rate
+        """
+        self.min_interval = 1.0 / calls_per_second
+        self.next_slot = 0.0
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """Block until the caller may make the next call."""
+        with self.lock:
+            now = time.monotonic()
+            wait = self.next_slot - now
+            self.next_slot = max(now, self.next_slot) + self.min_interval
+        
+        if wait > 0:
+            time.sleep(wait)
+
 
 class ETFDataFetcher:
     """Fetches and manages ETF price data."""
     
-    def __init__(self, data_dir="data"):
+    def __init__(self, data_dir="data", storage_format="npy", provider=None):
         """
         Initialize the data fetcher.
         
         Args:
             data_dir (str): Directory to store data files
+            storage_format (str): Storage backend ('npy', 'csv' or 'parquet')
+            provider: Object with history(symbol, start_date, end_date) returning
+                a Date-indexed DataFrame (default: YahooFinanceProvider)
         """
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(exist_ok=True)
+        self.storage_format = storage_format
+        self.store = create_price_store(storage_format, data_dir)
+        self.csv_store = self.store if storage_format == 'csv' else CSVPriceStore(data_dir)
+        self.provider = provider or YahooFinanceProvider()
+    
+    def download_etf_data(self, symbol, start_date, end_date):
+        """
+        Download ETF data from the provider, raising on failure.
+        
+        Args:
+            symbol (str): ETF symbol (e.g., 'SPY')
+            start_date (str): Start date in 'YYYY-MM-DD' format
+            end_date (str): End date in 'YYYY-MM-DD' format
+            
+        Returns:
+            pd.DataFrame: ETF price data with Date, Open, High, Low, Close, Volume
+        """
+        data = self.provider.history(symbol, start_date, end_date)
+        
+        if data.empty:
+            raise ValueError(f"No data found for {symbol}")
+        
+        # Reset index to make Date a column
+        data = data.reset_index()
+        
+        # Ensure we have the required columns
+        required_columns = ['Date', 'Open', 'High', 'Low', 'Close', 'Volume']
+        for col in required_columns:
+            if col not in data.columns:
+                raise ValueError(f"Missing required column: {col}")
+        
+        return data[required_columns]
     
     def fetch_etf_data(self, symbol, start_date, end_date):
         """
@@ -38,25 +121,134 @@ class ETFDataFetcher:
             pd.DataFrame: ETF price data with Date, Open, High, Low, Close, Volume
         """
         try:
-            ticker = yf.Ticker(symbol)
-            data = ticker.history(start=start_date, end=end_date)
+            return self.download_etf_data(symbol, start_date, end_date)
             
-            if data.empty:
-                raise ValueError(f"No data found for {symbol}")
+        except Exception as e:
+            print(f"Error fetching data for {symbol}: {str(e)}")
+            return pd.DataFrame()
+    
+    def fetch_many(self, symbols, start_date, end_date, max_workers=8, max_retries=3,
+                   backoff_seconds=1.0, calls_per_second=None, save=False):
+        """
+        Download many symbols concurrently on a bounded thread pool.
+        
+        Each symbol is retried with exponential backoff on provider errors.
+        Data errors (ValueError, e.g. no rows returned) are not retried.
+        
+        Args:
+            symbols (list): ETF symbols to fetch
+            start_date (str): Start date in 'YYYY-MM-DD' format
+            end_date (str): End date in 'YYYY-MM-DD' format
+            max_workers (int): Maximum concurrent downloads
+            max_retries (int): Retries per symbol after the first attempt
+            backoff_seconds (float): Delay before the first retry, doubled each retry
+            calls_per_second (float): Global provider call rate limit (None = unlimited)
+            save (bool): Save each successful download to the storage backend
+            
+        Returns:
+            tuple: (dict of symbol -> DataFrame for downloaded symbols,
+                    dict of symbol -> timing and error report; status is
+                    'success', 'error' or 'save_error' when the download
+                    succeeded but saving it failed)
+        """
+        rate_limiter = RateLimiter(calls_per_second) if calls_per_second else None
+        
+        def fetch_one(symbol):
+            started = time.perf_counter()
+            report = {"status": "error", "attempts": 0, "rows": 0, "error": None}
+            data = pd.DataFrame()
             
-            # Reset index to make Date a column
-            data.reset_index(inplace=True)
+            for attempt in range(max_retries + 1):
+                if rate_limiter:
+                    rate_limiter.acquire()
+                report["attempts"] = attempt + 1
+                
+                try:
+                    data = self.download_etf_data(symbol, start_date, end_date)
+                    report.update({"status": "success", "rows": len(data), "error": None})
+                    break
+                except ValueError as e:
+                    report["error"] = str(e)
+                    break
+                except Exception as e:
+                    report["error"] = f"{type(e).__name__}: {e}"
+                    if attempt < max_retries:
+                        time.sleep(backoff_seconds * (2 ** attempt))
             
-            # Ensure we have the required columns
-            required_columns = ['Date', 'Open', 'High', 'Low', 'Close', 'Volume']
-            for col in required_columns:
-                if col not in data.columns:
-                    raise ValueError(f"Missing required column: {col}")
+            # A failed save must not lose the download or abort the batch
+            if save and report["status"] == "success":
+                try:
+                    self.store.save(data, symbol)
+                except Exception as e:
+                    report.update({"status": "save_error", "error": f"{type(e).__name__}: {e}"})
             
-            return data[required_columns]
+            report["elapsed_seconds"] = time.perf_counter() - started
+            return symbol, data, report
+        
+        results = {}
+        reports = {}
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(symbols)))) as executor:
+            for symbol, data, report in executor.map(fetch_one, symbols):
+                reports[symbol] = report
+                if report["status"] in ("success", "save_error"):
+                    results[symbol] = data
+        
+        failed = [symbol for symbol, report in reports.items() if report["status"] == "error"]
+        unsaved = [symbol for symbol, report in reports.items() if report["status"] == "save_error"]
+        print(f"Fetched {len(results)}/{len(symbols)} symbols"
+              + (f" (failed: {', '.join(failed)})" if failed else "")
+              + (f" (save failed: {', '.join(unsaved)})" if unsaved else ""))
+        
+        return results, reports
+    
+    def save_data(self, data, symbol):
+        """
+        Save ETF data using the configured storage backend.
+        
+        Args:
+            data (pd.DataFrame): ETF price data
+            symbol (str): ETF symbol
             
+        Returns:
+            str: Path to saved data
+        """
+        if data.empty:
+            print(f"No data to save for {symbol}")
+            return None
+        
+        path = self.store.save(data, symbol)
+        print(f"Saved {len(data)} rows of data to {path}")
+        return path
+    
+    def load_data(self, symbol):
+        """
+        Load ETF data from the configured storage backend.
+        
+        Symbols that only exist as legacy CSV files are migrated to the
+        configured backend on first load.
+        
+        Args:
+            symbol (str): ETF symbol
+            
+        Returns:
+            pd.DataFrame: ETF price data or empty DataFrame if not found
+        """
+        if not self.store.exists(symbol):
+            if self.store is self.csv_store or not self.csv_store.exists(symbol):
+                print(f"Data file not found: {self.store.path_for(symbol)}")
+                return pd.DataFrame()
+            
+            data = self.load_data_from_csv(symbol)
+            if not data.empty:
+                self.store.save(data, symbol)
+                print(f"Migrated {symbol} from CSV to {self.storage_format} storage")
+            return data
+        
+        try:
+            return self.store.load(symbol)
         except Exception as e:
-            print(f"Error fetching data for {symbol}: {str(e)}")
+            print(f"Error loading data for {symbol}: {str(e)}")
             return pd.DataFrame()
     
     def save_data_to_csv(self, data, symbol):
@@ -74,10 +266,9 @@ class ETFDataFetcher:
             print(f"No data to save for {symbol}")
             return None
             
-        filepath = self.data_dir / f"{symbol}.csv"
-        data.to_csv(filepath, index=False)
+        filepath = self.csv_store.save(data, symbol)
         print(f"Saved {len(data)} rows of data to {filepath}")
-        return str(filepath)
+        return filepath
     
     def load_data_from_csv(self, symbol):
         """
@@ -89,23 +280,54 @@ class ETFDataFetcher:
         Returns:
             pd.DataFrame: ETF price data or empty DataFrame if file not found
         """
-        filepath = self.data_dir / f"{symbol}.csv"
+        filepath = self.csv_store.path_for(symbol)
         
         if not filepath.exists():
             print(f"Data file not found: {filepath}")
             return pd.DataFrame()
         
         try:
-            data = pd.read_csv(filepath)
-            data['Date'] = pd.to_datetime(data['Date'], utc=True)
-            return data
+            return self.csv_store.load(symbol)
         except Exception as e:
             print(f"Error loading data for {symbol}: {str(e)}")
             return pd.DataFrame()
     
+    def migrate_csv_data(self, symbols=None, overwrite=False):
+        """
+        Migrate existing CSV files into the configured storage backend.
+        
+        Args:
+            symbols (list): Symbols to migrate (default: every CSV in data_dir)
+            overwrite (bool): Re-migrate symbols already in the backend
+            
+        Returns:
+            dict: Migration report with migrated, skipped and failed symbols
+        """
+        if self.store is self.csv_store:
+            return {"migrated": [], "skipped": list(symbols or []), "failed": {}}
+        
+        report = migrate_csv_to_store(self.store, symbols, overwrite)
+        print(f"Migrated {len(report['migrated'])} symbols to {self.storage_format} storage "
+              f"({len(report['skipped'])} skipped, {len(report['failed'])} failed)")
+        return report
+    
+    def benchmark_storage(self, symbols=None, repeats=3):
+        """
+        Benchmark load time of the configured backend against CSV.
+        
+        Args:
+            symbols (list): Symbols to load (default: every CSV in data_dir)
+            repeats (int): Number of timed passes per backend
+            
+        Returns:
+            dict: Per-backend timings and speedup relative to CSV
+        """
+        formats = ('csv',) if self.storage_format == 'csv' else ('csv', self.storage_format)
+        return benchmark_load_times(self.data_dir, symbols, formats, repeats)
+    
     def fetch_and_save_etf_data(self, symbol, start_date, end_date):
         """
-        Fetch ETF data and save to CSV in one operation.
+        Fetch ETF data and save it to the storage backend in one operation.
         
         Args:
             symbol (str): ETF symbol
@@ -119,10 +341,72 @@ class ETFDataFetcher:
         data = self.fetch_etf_data(symbol, start_date, end_date)
         
         if not data.empty:
-            self.save_data_to_csv(data, symbol)
+            self.save_data(data, symbol)
         
         return data
     
+    def update_etf_data(self, symbol, end_date=None, start_date=None):
+        """
+        Incrementally refresh stored data with only the bars that are missing.
+        
+        Fetches from the last stored date (inclusive, so the overlapping bar
+        is dropped as a duplicate) up to end_date and appends the new rows
+        without rewriting stored history. Symbols with no stored data are
+        fetched in full from start_date.
+        
+        Args:
+            symbol (str): ETF symbol
+            end_date (str): End date in 'YYYY-MM-DD' format, exclusive (default: tomorrow)
+            start_date (str): Start date for symbols with no stored data
+                (default: the 1-year backtest range)
+            
+        Returns:
+            dict: Update summary with status, new_rows and last_date
+        """
+        if end_date is None:
+            end_date = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+        
+        # Make sure legacy CSV history is in the active backend before appending
+        if not self.store.exists(symbol) and self.csv_store.exists(symbol):
+            self.load_data(symbol)
+        
+        last_date = self.store.last_date(symbol)
+        
+        if last_date is None:
+            if start_date is None:
+                start_date, _ = self.get_date_range_for_backtest(1)
+            data = self.fetch_and_save_etf_data(symbol, start_date, end_date)
+            return {
+                "symbol": symbol,
+                "status": "created" if not data.empty else "error",
+                "new_rows": len(data),
+                "last_date": pd.to_datetime(data['Date'], utc=True).max() if not data.empty else None
+            }
+        
+        fetch_start = last_date.strftime('%Y-%m-%d')
+        if fetch_start >= end_date:
+            return {"symbol": symbol, "status": "up_to_date", "new_rows": 0, "last_date": last_date}
+        
+        print(f"Updating {symbol} from {fetch_start} to {end_date}")
+        data = self.fetch_etf_data(symbol, fetch_start, end_date)
+        
+        if not data.empty:
+            # Drop the overlapping bar(s) already in storage
+            data = data[pd.to_datetime(data['Date'], utc=True) > last_date]
+        
+        if data.empty:
+            return {"symbol": symbol, "status": "up_to_date", "new_rows": 0, "last_date": last_date}
+        
+        self.store.append(data, symbol)
+        print(f"Appended {len(data)} new rows for {symbol}")
+        
+        return {
+            "symbol": symbol,
+            "status": "updated",
+            "new_rows": len(data),
+            "last_date": pd.to_datetime(data['Date'], utc=True).max()
+        }
+    
     def get_date_range_for_backtest(self, years_back=1):
         """
         Get appropriate date range for backtesting.
@@ -160,9 +444,9 @@ def test_etf_data_fetcher():
         print(f"Date range: {spy_data['Date'].min()} to {spy_data['Date'].max()}")
         print(f"Sample data:\n{spy_data.head()}")
         
-        # Test loading from CSV
-        print("\n--- Testing data loading from CSV ---")
-        loaded_data = fetcher.load_data_from_csv('SPY')
+        # Test loading from storage
+        print(f"\n--- Testing data loading from {fetcher.storage_format} storage ---")
+        loaded_data = fetcher.load_data('SPY')
         print(f"Loaded data shape: {loaded_data.shape}")
         
         return True
@@ -171,6 +455,67 @@ def test_etf_data_fetcher():
         return False
 
 
+def test_fetch_many():
+    """Test the concurrent download pool against a local fake provider (no network)."""
+    
+    print("Testing concurrent fetch_many...")
+    
+    import tempfile
+    
+    class FakeProvider:
+        """Returns synthetic bars; SLOW sleeps, FLAKY fails twice, BAD always fails."""
+        
+        def __init__(self):
+            self.calls = {}
+            self.lock = threading.Lock()
+        
+        def history(self, symbol, start_date, end_date):
+            with self.lock:
+                self.calls[symbol] = self.calls.get(symbol, 0) + 1
+                call_number = self.calls[symbol]
+            
+            if symbol == 'SLOW':
+                time.sleep(0.2)
+            if symbol == 'FLAKY' and call_number <= 2:
+                raise ConnectionError("simulated timeout")
+            if symbol == 'BAD':
+                raise ConnectionError("simulated outage")
+            
+            dates = pd.date_range(start_date, end_date, freq='B', inclusive='left',
+                                  tz='America/New_York', name='Date')
+            return pd.DataFrame({'Open': 100.0, 'High': 101.0, 'Low': 99.0,
+                                 'Close': 100.0, 'Volume': 1000}, index=dates)
+    
+    provider = FakeProvider()
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fetcher = ETFDataFetcher(tmp_dir, provider=provider)
+        
+        # Saving SLOW fails; its download must still be returned
+        store_save = fetcher.store.save
+        
+        def failing_save(frame, symbol):
+            if symbol == 'SLOW':
+                raise OSError("simulated disk full")
+            return store_save(frame, symbol)
+        
+        fetcher.store.save = failing_save
+        data, report = fetcher.fetch_many(['AAA', 'SLOW', 'FLAKY', 'BAD'], '2024-01-01', '2024-03-01',
+                                          max_workers=4, max_retries=2, backoff_seconds=0.01,
+                                          calls_per_second=50, save=True)
+        
+        for symbol, info in report.items():
+            print(f"  {symbol}: {info['status']} after {info['attempts']} attempt(s) "
+                  f"in {info['elapsed_seconds']:.3f}s {info['error'] or ''}")
+        
+        stored = fetcher.store.available_symbols()
+        print(f"Stored symbols: {stored}")
+    
+    return (sorted(data) == ['AAA', 'FLAKY', 'SLOW'] and report['BAD']['attempts'] == 3
+            and report['SLOW']['status'] == 'save_error' and 'SLOW' not in stored)
+
+
 if __name__ == "__main__":
     # Run test when script is executed directly
+    test_fetch_many()
     test_etf_data_fetcher()
\ No newline at end of file
@@ -0,0 +1,566 @@
+"""
+Price Store Module
+
+Pluggable on-disk storage backends for ETF price data.
+CSV is kept for compatibility; the NumPy column store keeps dates as int64
+epoch nanoseconds so loading never has to re-parse date strings.
+Independent module that can be tested separately.
+"""
+
+import csv
+import io
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+def to_epoch_ns(dates):
+    """
+    Convert a date column to int64 UTC epoch nanoseconds.
+
+    Args:
+        dates (pd.Series or array-like): Dates (naive dates are treated as UTC)
+
+    Returns:
+        np.ndarray: int64 nanoseconds since 1970-01-01 UTC
+    """
+    dates = pd.to_datetime(pd.Series(dates), utc=True)
+    return dates.dt.tz_convert(None).to_numpy(dtype='datetime64[ns]').view('int64')
+
+
+class PriceStore:
+    """Base class for per-symbol price storage backends."""
+
+    format_name = None
+
+    def __init__(self, data_dir="data"):
+        """
+        Initialize the store.
+
+        Args:
+            data_dir (str): Root directory for data files
+        """
+        self.data_dir = Path(data_dir)
+        self.data_dir.mkdir(exist_ok=True)
+
+    def path_for(self, symbol):
+        """Return the on-disk location used for a symbol."""
+        raise NotImplementedError
+
+    def exists(self, symbol):
+        """Check whether data for a symbol has been stored."""
+        return self.path_for(symbol).exists()
+
+    def save(self, data, symbol):
+        """
+        Save ETF data for a symbol, replacing any existing data.
+
+        Args:
+            data (pd.DataFrame): ETF price data with a Date column
+            symbol (str): ETF symbol
+
+        Returns:
+            str: Path to saved data
+        """
+        raise NotImplementedError
+
+    def load(self, symbol):
+        """
+        Load ETF data for a symbol.
+
+        Args:
+            symbol (str): ETF symbol
+
+        Returns:
+            pd.DataFrame: ETF price data with a UTC Date column
+        """
+        raise NotImplementedError
+
+    def last_date(self, symbol):
+        """
+        Get the most recent stored date for a symbol.
+
+        Args:
+            symbol (str): ETF symbol
+
+        Returns:
+            pd.Timestamp: Last stored date (UTC) or None if nothing is stored
+        """
+        if not self.exists(symbol):
+            return None
+
+        data = self.load(symbol)
+        return data['Date'].max() if not data.empty else None
+
+    def append(self, data, symbol):
+        """
+        Append rows that are strictly newer than the stored history.
+
+        The default implementation rewrites the whole symbol; backends that
+        can grow files in place override it.
+
+        Args:
+            data (pd.DataFrame): New ETF price rows
+            symbol (str): ETF symbol
+
+        Returns:
+            str: Path to saved data
+        """
+        if not self.exists(symbol):
+            return self.save(data, symbol)
+
+        combined = pd.concat([self.load(symbol), data], ignore_index=True)
+        return self.save(combined, symbol)
+
+    def available_symbols(self):
+        """List symbols that have data in this store."""
+        raise NotImplementedError
+
+
+class CSVPriceStore(PriceStore):
+    """Stores one data/{symbol}.csv file per ticker (original format)."""
+
+    format_name = 'csv'
+
+    def path_for(self, symbol):
+        return self.data_dir / f"{symbol}.csv"
+
+    def save(self, data, symbol):
+        filepath = self.path_for(symbol)
+        data.to_csv(filepath, index=False)
+        return str(filepath)
+
+    def load(self, symbol):
+        data = pd.read_csv(self.path_for(symbol))
+        data['Date'] = pd.to_datetime(data['Date'], utc=True)
+        return data
+
+    def last_date(self, symbol):
+        filepath = self.path_for(symbol)
+        if not filepath.exists():
+            return None
+
+        # Read backwards from the end of the file instead of parsing it all
+        with open(filepath, 'rb') as f:
+            f.seek(0, 2)
+            end = f.tell()
+            block = b''
+            while end > 0 and block.count(b'\n') < 3:
+                step = min(4096, end)
+                end -= step
+                f.seek(end)
+                block = f.read(step) + block
+
+        lines = [line for line in block.decode().splitlines() if line.strip()]
+        if len(lines) < 2 and end == 0:
+            return None  # Header only
+
+        date_index = list(pd.read_csv(filepath, nrows=0).columns).index('Date')
+        return pd.to_datetime(next(csv.reader([lines[-1]]))[date_index], utc=True)
+
+    def append(self, data, symbol):
+        filepath = self.path_for(symbol)
+        if not filepath.exists():
+            return self.save(data, symbol)
+
+        header = pd.read_csv(filepath, nrows=0).columns
+        data.reindex(columns=header).to_csv(filepath, mode='a', header=False, index=False)
+        return str(filepath)
+
+    def available_symbols(self):
+        return sorted(path.stem for path in self.data_dir.glob('*.csv'))
+
+
+class NpyPriceStore(PriceStore):
+    """
+    Stores each symbol as a directory of .npy column files.
+
+    Layout: data/npy/{symbol}/Date.npy (int64 epoch ns, UTC) plus one
+    float64/int64 .npy file per numeric column and a columns.json manifest
+    that preserves column order.
+    """
+
+    format_name = 'npy'
+    subdir = 'npy'
+    manifest_name = 'columns.json'
+
+    def __init__(self, data_dir="data"):
+        super().__init__(data_dir)
+        self.root = self.data_dir / self.subdir
+        self.root.mkdir(exist_ok=True)
+
+    def path_for(self, symbol):
+        return self.root / symbol
+
+    def exists(self, symbol):
+        return (self.path_for(symbol) / self.manifest_name).exists()
+
+    def save(self, data, symbol):
+        symbol_dir = self.path_for(symbol)
+        symbol_dir.mkdir(exist_ok=True)
+
+        arrays = {'Date': to_epoch_ns(data['Date'])}
+        for col in data.columns:
+            if col != 'Date' and pd.api.types.is_numeric_dtype(data[col]):
+                arrays[col] = np.ascontiguousarray(data[col].to_numpy())
+
+        # Every column goes to a temporary file first; the manifest is removed
+        # while the files are swapped in and written last, so a crash never
+        # leaves a loadable mix of old and new columns
+        for col, values in arrays.items():
+            _save_npy(symbol_dir / f"{col}.npy.tmp", values)
+
+        manifest = symbol_dir / self.manifest_name
+        if manifest.exists():
+            manifest.unlink()
+        for col in arrays:
+            os.replace(symbol_dir / f"{col}.npy.tmp", symbol_dir / f"{col}.npy")
+
+        with open(symbol_dir / f"{self.manifest_name}.tmp", 'w') as f:
+            json.dump({"columns": list(arrays)}, f)
+        os.replace(symbol_dir / f"{self.manifest_name}.tmp", manifest)
+
+        return str(symbol_dir)
+
+    def columns(self, symbol):
+        """Return the stored column names for a symbol, Date first."""
+        with open(self.path_for(symbol) / self.manifest_name) as f:
+            return json.load(f)["columns"]
+
+    def load_arrays(self, symbol, columns=None, mmap_mode=None):
+        """
+        Load raw column arrays without building a DataFrame.
+
+        Args:
+            symbol (str): ETF symbol
+            columns (list): Columns to load (default: all stored columns)
+            mmap_mode (str): Passed to np.load, e.g. 'r' to memory-map
+
+        Returns:
+            dict: Column name -> np.ndarray ('Date' is int64 epoch ns)
+        """
+        symbol_dir = self.path_for(symbol)
+        columns = columns or self.columns(symbol)
+        arrays = {col: np.load(symbol_dir / f"{col}.npy", mmap_mode=mmap_mode) for col in columns}
+
+        # Date is extended last by append, so its length is the committed row
+        # count; longer value columns are leftovers of an interrupted append
+        rows = len(arrays['Date']) if 'Date' in arrays else len(np.load(symbol_dir / 'Date.npy', mmap_mode='r'))
+        return {col: values[:rows] for col, values in arrays.items()}
+
+    def load(self, symbol):
+        arrays = self.load_arrays(symbol)
+        data = pd.DataFrame(arrays)
+        data['Date'] = pd.to_datetime(arrays['Date'], utc=True)
+        return data
+
+    def last_date(self, symbol):
+        if not self.exists(symbol):
+            return None
+
+        dates = np.load(self.path_for(symbol) / 'Date.npy', mmap_mode='r')
+        return pd.Timestamp(int(dates[-1]), tz='UTC') if len(dates) > 0 else None
+
+    def append(self, data, symbol):
+        if not self.exists(symbol):
+            return self.save(data, symbol)
+
+        symbol_dir = self.path_for(symbol)
+        columns = self.columns(symbol)
+        missing = [col for col in columns if col not in data.columns]
+        if missing:
+            raise ValueError(f"Cannot append to {symbol}: missing columns {missing}")
+
+        # Value columns first and Date last, so the row count seen by
+        # readers only advances once every column has been extended. Value
+        # columns are first cut back to the committed rows, dropping the
+        # tail of any earlier interrupted append
+        rows = len(np.load(symbol_dir / 'Date.npy', mmap_mode='r'))
+        for col in columns[1:] + ['Date']:
+            values = to_epoch_ns(data['Date']) if col == 'Date' else data[col].to_numpy()
+            _append_to_npy(symbol_dir / f"{col}.npy", values, rows)
+
+        return str(symbol_dir)
+
+    def available_symbols(self):
+        return sorted(path.parent.name for path in self.root.glob(f'*/{self.manifest_name}'))
+
+
+def _save_npy(path, values):
+    """Write an array to exactly this path (np.save would add a .npy suffix)."""
+    with open(path, 'wb') as f:
+        np.save(f, values)
+
+
+def _append_to_npy(path, values, rows=None):
+    """
+    Grow a 1-D .npy file in place.
+
+    Only the header (whose shape field numpy pads for growth) and the new
+    bytes are written, so appending costs O(new rows).
+
+    Args:
+        path (Path): .npy file
+        values (np.ndarray): Values to append
+        rows (int): Rows to keep before appending (default: all stored rows)
+    """
+    with open(path, 'r+b') as f:
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        header_length = f.tell()
+        rows = shape[0] if rows is None else min(rows, shape[0])
+
+        values = np.ascontiguousarray(values, dtype=dtype)
+        header = {
+            'descr': np.lib.format.dtype_to_descr(dtype),
+            'fortran_order': fortran_order,
+            'shape': (rows + len(values),)
+        }
+
+        buffer = io.BytesIO()
+        if version == (1, 0):
+            np.lib.format.write_array_header_1_0(buffer, header)
+        else:
+            np.lib.format.write_array_header_2_0(buffer, header)
+
+        if buffer.tell() != header_length:
+            # Header padding exhausted; fall back to a full rewrite, swapped in atomically
+            f.close()
+            temporary = path.with_name(path.name + '.tmp')
+            _save_npy(temporary, np.concatenate([np.load(path)[:rows], values]))
+            os.replace(temporary, path)
+            return
+
+        # New rows go in before the header grows, so the stored shape never
+        # covers bytes that have not been written
+        f.seek(header_length + rows * dtype.itemsize)
+        f.truncate()
+        f.write(values.tobytes())
+        f.flush()
+        f.seek(0)
+        f.write(buffer.getvalue())
+
+
+class ParquetPriceStore(PriceStore):
+    """Stores one data/parquet/{symbol}.parquet file per ticker (requires pyarrow)."""
+
+    format_name = 'parquet'
+    subdir = 'parquet'
+
+    def __init__(self, data_dir="data"):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ImportError("Parquet storage requires pyarrow (pip install pyarrow)")
+
+        super().__init__(data_dir)
+        self.root = self.data_dir / self.subdir
+        self.root.mkdir(exist_ok=True)
+
+    def path_for(self, symbol):
+        return self.root / f"{symbol}.parquet"
+
+    def save(self, data, symbol):
+        filepath = self.path_for(symbol)
+        data = data.copy()
+        data['Date'] = pd.to_datetime(data['Date'], utc=True)
+        data.to_parquet(filepath, index=False)
+        return str(filepath)
+
+    def load(self, symbol):
+        return pd.read_parquet(self.path_for(symbol))
+
+    def available_symbols(self):
+        return sorted(path.stem for path in self.root.glob('*.parquet'))
+
+
+STORE_BACKENDS = {
+    'csv': CSVPriceStore,
+    'npy': NpyPriceStore,
+    'parquet': ParquetPriceStore
+}
+
+
+def create_price_store(storage_format='npy', data_dir="data"):
+    """
+    Create a storage backend by name.
+
+    Args:
+        storage_format (str): One of 'csv', 'npy', 'parquet'
+        data_dir (str): Root directory for data files
+
+    Returns:
+        PriceStore: Storage backend instance
+    """
+    if storage_format not in STORE_BACKENDS:
+        raise ValueError(f"Unknown storage format '{storage_format}'. "
+                         f"Choose from: {', '.join(STORE_BACKENDS)}")
+
+    return STORE_BACKENDS[storage_format](data_dir)
+
+
+def migrate_csv_to_store(target_store, symbols=None, overwrite=False):
+    """
+    One-time migration of existing per-symbol CSV files into another backend.
+
+    Args:
+        target_store (PriceStore): Destination backend
+        symbols (list): Symbols to migrate (default: every CSV in data_dir)
+        overwrite (bool): Re-migrate symbols already present in the target
+
+    Returns:
+        dict: Lists of migrated, skipped and failed symbols
+    """
+    csv_store = CSVPriceStore(target_store.data_dir)
+    symbols = symbols or csv_store.available_symbols()
+
+    report = {"migrated": [], "skipped": [], "failed": {}}
+
+    for symbol in symbols:
+        if not csv_store.exists(symbol):
+            report["failed"][symbol] = "CSV file not found"
+            continue
+
+        if target_store.exists(symbol) and not overwrite:
+            report["skipped"].append(symbol)
+            continue
+
+        try:
+            target_store.save(csv_store.load(symbol), symbol)
+            report["migrated"].append(symbol)
+        except Exception as e:
+            report["failed"][symbol] = str(e)
+
+    return report
+
+
+def benchmark_load_times(data_dir="data", symbols=None, formats=('csv', 'npy'), repeats=3):
+    """
+    Time loading every symbol from each storage backend.
+
+    Symbols missing from a non-CSV backend are migrated from CSV first so
+    each backend loads the same data.
+
+    Args:
+        data_dir (str): Root directory for data files
+        symbols (list): Symbols to load (default: every CSV in data_dir)
+        formats (tuple): Backends to benchmark
+        repeats (int): Number of timed passes; the best pass is reported
+
+    Returns:
+        dict: Per-backend timings and speedup relative to CSV
+    """
+    csv_store = CSVPriceStore(data_dir)
+    symbols = symbols or csv_store.available_symbols()
+
+    results = {"symbols": len(symbols), "repeats": repeats, "backends": {}}
+
+    for storage_format in formats:
+        store = create_price_store(storage_format, data_dir)
+        if storage_format != 'csv':
+            migrate_csv_to_store(store, symbols)
+
+        pass_times = []
+        rows = 0
+        for _ in range(repeats):
+            start = time.perf_counter()
+            rows = sum(len(store.load(symbol)) for symbol in symbols)
+            pass_times.append(time.perf_counter() - start)
+
+        best = min(pass_times)
+        results["backends"][storage_format] = {
+            "total_seconds": best,
+            "ms_per_symbol": best / len(symbols) * 1000 if symbols else 0,
+            "rows_loaded": rows
+        }
+
+    csv_time = results["backends"].get('csv', {}).get("total_seconds")
+    for timing in results["backends"].values():
+        timing["speedup_vs_csv"] = csv_time / timing["total_seconds"] if csv_time and timing["total_seconds"] > 0 else None
+
+    return results
+
+
+def test_price_store():
+    """Test function to verify price store backends round-trip data."""
+
+    print("Testing Price Store...")
+
+    import tempfile
+
+    dates = pd.date_range('2024-01-01', periods=300, freq='B', tz='America/New_York')
+    sample = pd.DataFrame({
+        'Date': dates,
+        'Open': np.linspace(100, 130, len(dates)),
+        'High': np.linspace(101, 131, len(dates)),
+        'Low': np.linspace(99, 129, len(dates)),
+        'Close': np.linspace(100, 130, len(dates)),
+        'Volume': np.arange(len(dates), dtype=np.int64) * 1000
+    })
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        CSVPriceStore(tmp_dir).save(sample, 'TEST')
+
+        # Test 1: Migration from CSV
+        print(f"\n--- Test 1: CSV migration ---")
+        npy_store = NpyPriceStore(tmp_dir)
+        report = migrate_csv_to_store(npy_store)
+        print(f"Migration report: {report}")
+
+        # Test 2: Round trip matches CSV load
+        print(f"\n--- Test 2: Round trip ---")
+        from_csv = CSVPriceStore(tmp_dir).load('TEST')
+        from_npy = npy_store.load('TEST')
+        same_dates = (from_csv['Date'].to_numpy() == from_npy['Date'].to_numpy()).all()
+        same_close = np.allclose(from_csv['Close'], from_npy['Close'])
+        print(f"Dates match: {same_dates}, Close matches: {same_close}")
+
+        # Test 3: In-place append
+        print(f"\n--- Test 3: In-place append ---")
+        head, tail = sample.iloc[:250], sample.iloc[250:]
+        npy_store.save(head, 'APPEND')
+        npy_store.append(tail, 'APPEND')
+        appended = npy_store.load('APPEND')
+        appended_ok = len(appended) == len(sample) and np.allclose(appended['Close'], sample['Close'])
+        print(f"Rows after append: {len(appended)}, last date: {npy_store.last_date('APPEND')}")
+
+        # An append interrupted after its value columns must stay invisible
+        # and be dropped by the next append
+        npy_store.save(head, 'PARTIAL')
+        _append_to_npy(npy_store.path_for('PARTIAL') / 'Close.npy', tail['Close'].to_numpy())
+        interrupted = len(npy_store.load('PARTIAL')) == len(head)
+        npy_store.append(tail, 'PARTIAL')
+        recovered = npy_store.load('PARTIAL')
+        recovered_ok = interrupted and np.allclose(recovered['Close'], sample['Close'])
+        print(f"Interrupted append ignored: {interrupted}, recovered by next append: {recovered_ok}")
+
+        # Overwriting a symbol leaves no temporary files behind
+        npy_store.save(sample, 'APPEND')
+        leftovers = list(npy_store.path_for('APPEND').glob('*.tmp'))
+        print(f"Overwrite clean: {not leftovers}, rows: {len(npy_store.load('APPEND'))}")
+
+        # CSV last_date finds Date by header name, wherever the column is
+        csv_store = CSVPriceStore(tmp_dir)
+        csv_store.save(sample[['Close', 'Date', 'Volume']], 'REORDERED')
+        reordered_ok = csv_store.last_date('REORDERED') == sample['Date'].iloc[-1]
+        print(f"CSV last date with Date not first: {reordered_ok}")
+
+        # Test 4: Load benchmark
+        print(f"\n--- Test 4: Load benchmark ---")
+        benchmark = benchmark_load_times(tmp_dir, repeats=3)
+        for name, timing in benchmark["backends"].items():
+            print(f"  {name}: {timing['ms_per_symbol']:.2f} ms/symbol (x{timing['speedup_vs_csv']:.1f} vs CSV)")
+
+    return bool(same_dates and same_close and appended_ok and recovered_ok and not leftovers and reordered_ok)
+
+
+if __name__ == "__main__":
+    # Run test when script is executed directly
+    test_price_store()
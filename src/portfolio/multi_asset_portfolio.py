@@ -0,0 +1,363 @@
+"""
+Multi-Asset Portfolio Module
+
+Holds several ETFs at once as NumPy arrays of shares and target weights.
+Rebalancing computes the whole trade vector in one step and trades only
+the differences between current and target shares, so positions that stay
+in the portfolio are resized instead of liquidated and rebought. Used for
+top-N equal or score-weighted momentum allocations. Independent module that
+can be tested separately.
+"""
+
+import numpy as np
+from typing import Dict, List, Optional, Tuple, Union
+
+from transaction_ledger import TransactionLedger
+
+
+class MultiAssetPortfolio:
+    """Manages an N-position portfolio with minimal-trade rebalancing."""
+
+    def __init__(self, symbols: List[str], initial_capital: float = 100000,
+                 transaction_cost_pct: float = 0.001):
+        """
+        Initialize the portfolio.
+
+        Args:
+            symbols (List[str]): Tradable symbols (fixes the array order)
+            initial_capital (float): Starting capital in dollars
+            transaction_cost_pct (float): Transaction cost as percentage (0.001 = 0.1%)
+        """
+        self.symbols = list(symbols)
+        self.symbol_index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.initial_capital = initial_capital
+        self.transaction_cost_pct = transaction_cost_pct
+
+        self.shares = np.zeros(len(self.symbols), dtype=np.int64)  # Whole shares only
+        self.target_weights = np.zeros(len(self.symbols))
+        self.last_prices = np.full(len(self.symbols), np.nan)
+        self.current_cash = initial_capital
+        self.portfolio_value = initial_capital
+        self.ledger = TransactionLedger()
+
+    @property
+    def transaction_log(self) -> Tuple[Dict, ...]:
+        """Executed trades as an immutable tuple of dicts (cached by the ledger between trades)."""
+        return self.ledger.transaction_log()
+
+    @property
+    def transaction_count(self) -> int:
+        """Number of executed trades (O(1))."""
+        return self.ledger.transaction_count
+
+    def price_vector(self, current_prices: Union[Dict[str, float], np.ndarray]) -> np.ndarray:
+        """
+        Align prices with the symbol order.
+
+        Args:
+            current_prices: Dictionary with symbol: price pairs, or an array in symbol order
+
+        Returns:
+            np.ndarray: Prices (NaN where a symbol has no price)
+        """
+        if isinstance(current_prices, dict):
+            return np.array([current_prices.get(symbol, np.nan) for symbol in self.symbols], dtype=np.float64)
+        return np.asarray(current_prices, dtype=np.float64)
+
+    def calculate_transaction_cost(self, trade_value):
+        """
+        Calculate transaction cost for one trade or an array of trades.
+
+        Args:
+            trade_value: Dollar value of the trade(s)
+
+        Returns:
+            Transaction cost in dollars
+        """
+        return np.abs(trade_value) * self.transaction_cost_pct
+
+    def update_portfolio_value(self, current_prices: Union[Dict[str, float], np.ndarray]) -> float:
+        """
+        Update portfolio value based on current prices.
+
+        Symbols without a price keep their last known price.
+
+        Args:
+            current_prices: Dictionary with symbol: price pairs, or an array in symbol order
+
+        Returns:
+            float: Updated portfolio value
+        """
+        prices = self.price_vector(current_prices)
+        known = np.isfinite(prices)
+        self.last_prices[known] = prices[known]
+
+        held = self.shares != 0
+        self.portfolio_value = float(self.current_cash + self.shares[held] @ self.last_prices[held])
+
+        return self.portfolio_value
+
+    def update_portfolio_value_from_panel(self, panel, position: int) -> float:
+        """
+        Update portfolio value from a PricePanel column.
+
+        Args:
+            panel (PricePanel): Aligned price panel
+            position (int): Column position of the valuation date
+
+        Returns:
+            float: Updated portfolio value
+        """
+        return self.update_portfolio_value(panel.prices_at(position))
+
+    def current_weights(self) -> np.ndarray:
+        """
+        Weights of the held positions at the last valuation.
+
+        Returns:
+            np.ndarray: Position value / portfolio value in symbol order
+        """
+        if self.portfolio_value <= 0:
+            return np.zeros(len(self.symbols))
+
+        return np.where(self.shares != 0, self.shares * self.last_prices, 0.0) / self.portfolio_value
+
+    def get_current_position(self) -> Dict:
+        """
+        Get current portfolio positions.
+
+        Returns:
+            Dict: Holdings, weights, cash and portfolio value
+        """
+        held = np.flatnonzero(self.shares)
+        weights = self.current_weights()
+
+        return {
+            "holdings": {self.symbols[i]: int(self.shares[i]) for i in held},
+            "weights": {self.symbols[i]: float(weights[i]) for i in held},
+            "target_weights": {self.symbols[i]: float(self.target_weights[i])
+                               for i in np.flatnonzero(self.target_weights)},
+            "cash": self.current_cash,
+            "portfolio_value": self.portfolio_value,
+            "total_transactions": len(self.ledger)
+        }
+
+    def weights_from_rankings(self, rankings: List[Tuple[str, float]], top_n: Optional[int] = None,
+                              weighting: str = 'equal') -> np.ndarray:
+        """
+        Target weights for the top-N ETFs of a momentum ranking.
+
+        Args:
+            rankings (List[Tuple]): (symbol, score) pairs, best first
+                (MomentumCalculator rankings, e.g. computed with top_k=top_n)
+            top_n (int): Number of ETFs to hold (default: every ranked ETF)
+            weighting (str): 'equal' or 'score' (proportional to positive scores,
+                equal when no score is positive)
+
+        Returns:
+            np.ndarray: Target weights in symbol order, summing to 1 (0 if nothing is ranked)
+        """
+        if weighting not in ('equal', 'score'):
+            raise ValueError(f"Unknown weighting '{weighting}'. Use 'equal' or 'score'")
+
+        selected = [(self.symbol_index[symbol], score) for symbol, score in rankings[:top_n]
+                    if symbol in self.symbol_index]
+        weights = np.zeros(len(self.symbols))
+        if not selected:
+            return weights
+
+        rows = np.array([row for row, _ in selected])
+        scores = np.maximum(np.array([score for _, score in selected], dtype=np.float64), 0.0)
+
+        if weighting == 'score' and scores.sum() > 0:
+            weights[rows] = scores / scores.sum()
+        else:
+            weights[rows] = 1.0 / len(rows)
+
+        return weights
+
+    def rebalance_to_weights(self, target_weights: Union[Dict[str, float], np.ndarray],
+                             current_prices: Union[Dict[str, float], np.ndarray], date: str,
+                             min_trade_value: float = 0.0) -> Dict:
+        """
+        Rebalance to target weights by trading only the share differences.
+
+        Target shares are sized from the current portfolio value with the
+        transaction cost reserved, the trade vector is the difference to the
+        current shares, and sells are executed before buys. If the buys do
+        not fit the available cash they are scaled down together.
+
+        Args:
+            target_weights: Dictionary with symbol: weight pairs, or an array in symbol order
+            current_prices: Dictionary with symbol: price pairs, or an array in symbol order
+            date (str): Date of rebalancing
+            min_trade_value (float): Skip resizing trades below this dollar value
+                (positions leaving the portfolio are always sold)
+
+        Returns:
+            Dict: Rebalancing results
+        """
+        rebalance_results = {
+            "date": date,
+            "actions": [],
+            "success": False
+        }
+
+        if isinstance(target_weights, dict):
+            unknown = [symbol for symbol in target_weights if symbol not in self.symbol_index]
+            if unknown:
+                rebalance_results["error"] = f"Unknown symbols: {unknown}"
+                return rebalance_results
+            weights = np.zeros(len(self.symbols))
+            for symbol, weight in target_weights.items():
+                weights[self.symbol_index[symbol]] = weight
+        else:
+            weights = np.asarray(target_weights, dtype=np.float64)
+
+        if (weights < 0).any() or weights.sum() > 1 + 1e-9:
+            rebalance_results["error"] = "Target weights must be non-negative and sum to at most 1"
+            return rebalance_results
+
+        quoted_prices = self.price_vector(current_prices)
+        involved = (weights > 0) | (self.shares != 0)
+        missing = involved & ~(np.isfinite(quoted_prices) & (quoted_prices > 0))
+        if missing.any():
+            rebalance_results["error"] = f"Price not available for {[self.symbols[i] for i in np.flatnonzero(missing)]}"
+            return rebalance_results
+
+        portfolio_value = self.update_portfolio_value(quoted_prices)
+        prices = np.where(involved, quoted_prices, 0.0)
+        cost_pct = self.transaction_cost_pct
+
+        # Target shares with the transaction cost reserved, then the trade vector
+        target_shares = np.zeros(len(self.symbols), dtype=np.int64)
+        buyable = weights > 0
+        target_shares[buyable] = np.floor(
+            weights[buyable] * portfolio_value / (1 + cost_pct) / prices[buyable]).astype(np.int64)
+        deltas = target_shares - self.shares
+
+        if min_trade_value > 0:
+            deltas[(np.abs(deltas) * prices < min_trade_value) & (target_shares != 0)] = 0
+
+        sells = np.maximum(-deltas, 0)
+        buys = np.maximum(deltas, 0)
+
+        # Scale buys down together if they do not fit the cash left after selling
+        sell_gross = sells * prices
+        available_cash = self.current_cash + sell_gross.sum() - self.calculate_transaction_cost(sell_gross).sum()
+        buy_gross = buys * prices
+        required_cash = buy_gross.sum() * (1 + cost_pct)
+        if required_cash > available_cash:
+            buys = np.floor(buys * max(available_cash, 0.0) / required_cash).astype(np.int64)
+            buy_gross = buys * prices
+
+        sell_costs = self.calculate_transaction_cost(sell_gross)
+        buy_costs = self.calculate_transaction_cost(buy_gross)
+
+        sold = np.flatnonzero(sells)
+        bought = np.flatnonzero(buys)
+        self.ledger.extend(date, "SELL", [self.symbols[i] for i in sold],
+                           sells[sold], prices[sold], sell_costs[sold])
+        self.ledger.extend(date, "BUY", [self.symbols[i] for i in bought],
+                           buys[bought], prices[bought], buy_costs[bought])
+
+        # Update portfolio
+        self.shares += buys - sells
+        self.current_cash = float(self.current_cash + (sell_gross.sum() - sell_costs.sum())
+                                  - (buy_gross.sum() + buy_costs.sum()))
+        self.target_weights = weights
+        self.update_portfolio_value(quoted_prices)
+
+        traded = sells + buys
+        rebalance_results["actions"] = [
+            {"sell" if sells[i] else "buy": {"symbol": self.symbols[i], "shares": int(traded[i])}}
+            for i in np.flatnonzero(traded)
+        ] or ["no_change"]
+        rebalance_results["success"] = True
+        rebalance_results["turnover"] = float((sell_gross.sum() + buy_gross.sum()) / portfolio_value) if portfolio_value > 0 else 0.0
+        rebalance_results["transaction_costs"] = float(sell_costs.sum() + buy_costs.sum())
+        rebalance_results["new_position"] = self.get_current_position()["holdings"]
+
+        return rebalance_results
+
+    def rebalance_to_top_n(self, rankings: List[Tuple[str, float]],
+                           current_prices: Union[Dict[str, float], np.ndarray], date: str,
+                           top_n: int = 1, weighting: str = 'equal', min_trade_value: float = 0.0) -> Dict:
+        """
+        Rebalance into the top-N ETFs of a momentum ranking.
+
+        Args:
+            rankings (List[Tuple]): (symbol, score) pairs, best first
+            current_prices: Dictionary with symbol: price pairs, or an array in symbol order
+            date (str): Date of rebalancing
+            top_n (int): Number of ETFs to hold
+            weighting (str): 'equal' or 'score'
+            min_trade_value (float): Skip resizing trades below this dollar value
+
+        Returns:
+            Dict: Rebalancing results
+        """
+        weights = self.weights_from_rankings(rankings, top_n, weighting)
+        return self.rebalance_to_weights(weights, current_prices, date, min_trade_value)
+
+    def get_transaction_summary(self) -> Dict:
+        """
+        Get summary of all transactions.
+
+        Returns:
+            Dict: Transaction summary
+        """
+        return self.ledger.summary()
+
+
+def test_multi_asset_portfolio():
+    """Test function to verify the multi-asset portfolio works correctly."""
+
+    print("Testing Multi-Asset Portfolio...")
+
+    symbols = ['SPY', 'QQQ', 'IWM']
+    portfolio = MultiAssetPortfolio(symbols, initial_capital=100000, transaction_cost_pct=0.001)
+
+    # Test 1: Equal-weight top 2
+    print(f"\n--- Test 1: Equal-weight top 2 ---")
+    prices = {'SPY': 600.00, 'QQQ': 550.00, 'IWM': 220.00}
+    rankings = [('QQQ', 0.12), ('SPY', 0.08), ('IWM', -0.02)]
+    result = portfolio.rebalance_to_top_n(rankings, prices, '2024-01-01', top_n=2)
+    print(f"Rebalance result: {result['success']}, actions: {result['actions']}")
+    print(f"Position: {portfolio.get_current_position()}")
+
+    # Test 2: Leader changes - only the deltas trade, SPY is kept and resized
+    print(f"\n--- Test 2: Rotate QQQ out, IWM in (score-weighted) ---")
+    prices = {'SPY': 620.00, 'QQQ': 540.00, 'IWM': 230.00}
+    rankings = [('IWM', 0.15), ('SPY', 0.05), ('QQQ', 0.01)]
+    result = portfolio.rebalance_to_top_n(rankings, prices, '2024-02-01', top_n=2, weighting='score')
+    print(f"Actions: {result['actions']}")
+    print(f"Turnover: {result['turnover']:.2%}, costs: ${result['transaction_costs']:.2f}")
+    print(f"Weights: {portfolio.get_current_position()['weights']}")
+
+    # Test 3: Same rotation through a full liquidation for comparison
+    print(f"\n--- Test 3: Minimal trades vs liquidate-and-rebuy ---")
+    liquidating = MultiAssetPortfolio(symbols, 100000, 0.001)
+    liquidating.rebalance_to_top_n([('QQQ', 0.12), ('SPY', 0.08)], {'SPY': 600.00, 'QQQ': 550.00, 'IWM': 220.00},
+                                   '2024-01-01', top_n=2)
+    liquidating.rebalance_to_weights(np.zeros(3), prices, '2024-02-01')
+    liquidating.rebalance_to_top_n(rankings, prices, '2024-02-01', top_n=2, weighting='score')
+    minimal_costs = portfolio.get_transaction_summary()['total_transaction_costs']
+    liquidating_costs = liquidating.get_transaction_summary()['total_transaction_costs']
+    print(f"Total costs: minimal ${minimal_costs:.2f} vs liquidating ${liquidating_costs:.2f}")
+
+    # Test 4: Unchanged targets trade nothing
+    print(f"\n--- Test 4: No-op rebalance ---")
+    result = portfolio.rebalance_to_weights(portfolio.target_weights, prices, '2024-02-02', min_trade_value=1000)
+    print(f"Actions: {result['actions']}, cash never negative: {portfolio.current_cash >= 0}")
+
+    # Test 5: Transaction summary
+    print(f"\n--- Test 5: Transaction summary ---")
+    print(f"Transaction summary: {portfolio.get_transaction_summary()}")
+
+    return minimal_costs < liquidating_costs and portfolio.current_cash >= 0
+
+
+if __name__ == "__main__":
+    # Run test when script is executed directly
+    test_multi_asset_portfolio()
@@ -8,6 +8,8 @@ Independent module that can be tested separately.
 import pandas as pd
 from datetime import datetime
 
+from transaction_ledger import TransactionLedger
+
 
 class PortfolioManager:
     """Manages portfolio positions and rebalancing for momentum strategy."""
@@ -26,8 +28,26 @@ class PortfolioManager:
         self.current_shares = 0
         self.current_cash = initial_capital
         self.portfolio_value = initial_capital
-        self.transaction_log = []
+        self.ledger = TransactionLedger()
+        
+    @property
+    def transaction_log(self):
+        """
+        Executed trades as dicts (cached by the ledger between trades).
         
+        Formerly a mutable list attribute: trades are now recorded through
+        the ledger, and each dict keeps the date exactly as it was passed in.
+        
+        Returns:
+            tuple: One dict per transaction (immutable; record trades through the ledger)
+        """
+        return self.ledger.transaction_log()
+    
+    @property
+    def transaction_count(self):
+        """Number of executed trades (O(1))."""
+        return self.ledger.transaction_count
+    
     def get_current_position(self):
         """
         Get current portfolio position.
@@ -40,7 +60,7 @@ class PortfolioManager:
             "shares": self.current_shares,
             "cash": self.current_cash,
             "portfolio_value": self.portfolio_value,
-            "total_transactions": len(self.transaction_log)
+            "total_transactions": len(self.ledger)
         }
     
     def calculate_transaction_cost(self, trade_value):
@@ -79,6 +99,26 @@ class PortfolioManager:
         
         return self.portfolio_value
     
+    def update_portfolio_value_from_panel(self, panel, position):
+        """
+        Update portfolio value from a PricePanel column.
+        
+        Args:
+            panel (PricePanel): Aligned price panel
+            position (int): Column position of the valuation date
+            
+        Returns:
+            float: Updated portfolio value
+        """
+        if self.current_position is None:
+            self.portfolio_value = self.current_cash
+        elif self.current_position in panel.symbol_index:
+            price = panel.price_asof(self.current_position, position)
+            if price is not None:
+                self.portfolio_value = self.current_cash + self.current_shares * price
+        
+        return self.portfolio_value
+    
     def sell_current_position(self, current_price, date):
         """
         Sell current position if any.
@@ -99,18 +139,8 @@ class PortfolioManager:
         net_proceeds = gross_proceeds - transaction_cost
         
         # Record transaction
-        transaction = {
-            "date": date,
-            "action": "SELL",
-            "symbol": self.current_position,
-            "shares": self.current_shares,
-            "price": current_price,
-            "gross_amount": gross_proceeds,
-            "transaction_cost": transaction_cost,
-            "net_amount": net_proceeds
-        }
-        
-        self.transaction_log.append(transaction)
+        self.ledger.append(date, "SELL", self.current_position, self.current_shares,
+                           current_price, transaction_cost)
         
         # Update portfolio
         self.current_cash += net_proceeds
@@ -169,18 +199,7 @@ class PortfolioManager:
             total_cost = gross_cost + transaction_cost
         
         # Record transaction
-        transaction = {
-            "date": date,
-            "action": "BUY",
-            "symbol": symbol,
-            "shares": shares_to_buy,
-            "price": price,
-            "gross_amount": gross_cost,
-            "transaction_cost": transaction_cost,
-            "net_amount": total_cost
-        }
-        
-        self.transaction_log.append(transaction)
+        self.ledger.append(date, "BUY", symbol, shares_to_buy, price, transaction_cost)
         
         # Update portfolio
         self.current_cash -= total_cost
@@ -261,25 +280,12 @@ class PortfolioManager:
     
     def get_transaction_summary(self):
         """
-        Get summary of all transactions.
+        Get summary of all transactions (O(1), from the ledger's running totals).
         
         Returns:
             dict: Transaction summary
         """
-        if not self.transaction_log:
-            return {"total_transactions": 0, "total_costs": 0}
-        
-        total_cost = sum(t["transaction_cost"] for t in self.transaction_log)
-        buy_transactions = len([t for t in self.transaction_log if t["action"] == "BUY"])
-        sell_transactions = len([t for t in self.transaction_log if t["action"] == "SELL"])
-        
-        return {
-            "total_transactions": len(self.transaction_log),
-            "buy_transactions": buy_transactions,
-            "sell_transactions": sell_transactions,
-            "total_transaction_costs": total_cost,
-            "average_cost_per_transaction": total_cost / len(self.transaction_log)
-        }
+        return self.ledger.summary()
 
 
 def test_portfolio_manager():
@@ -329,6 +335,10 @@ def test_portfolio_manager():
         print(f"  {i}. {transaction['date']} - {transaction['action']} {transaction['shares']} {transaction['symbol']} @ ${transaction['price']:.2f}")
         print(f"     Cost: ${transaction['transaction_cost']:.2f}")
     
+    # Test 6: Columnar ledger export
+    print(f"\n--- Test 6: Ledger export ---")
+    print(portfolio.ledger.to_dataframe().to_string(index=False))
+    
     return True
 
 
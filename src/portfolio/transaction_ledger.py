@@ -0,0 +1,367 @@
+"""
+Transaction Ledger Module
+
+Columnar record of executed trades. Each field is a typed NumPy column
+(timestamp, side, symbol id, shares, price, cost) that grows by doubling,
+and running totals are updated on every append, so the transaction summary
+costs the same after ten trades as after ten million. Rows are exported to
+a DataFrame or an Arrow table on demand. Independent module that can be
+tested separately.
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Sequence, Tuple, Union
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+
+BUY = 1
+SELL = -1
+
+
+class TransactionLedger:
+    """Growable columnar store of trades with O(1) running aggregates."""
+
+    def __init__(self, capacity: int = 64):
+        """
+        Initialize an empty ledger.
+
+        Args:
+            capacity (int): Rows preallocated before the first resize
+        """
+        capacity = max(int(capacity), 1)
+        self._dates = np.empty(capacity, dtype='datetime64[ns]')
+        self._sides = np.empty(capacity, dtype=np.int8)
+        self._symbol_ids = np.empty(capacity, dtype=np.int32)
+        self._shares = np.empty(capacity, dtype=np.float64)
+        self._prices = np.empty(capacity, dtype=np.float64)
+        self._costs = np.empty(capacity, dtype=np.float64)
+        self._size = 0
+        self._date_labels = []  # Dates exactly as passed in, for the transaction log
+        self._log = ()  # Cached transaction_log; rows never change once recorded
+
+        self.symbols = []
+        self.symbol_ids = {}
+
+        # Running aggregates
+        self.buy_count = 0
+        self.sell_count = 0
+        self.total_cost = 0.0
+        self.buy_gross = 0.0
+        self.sell_gross = 0.0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def transaction_count(self) -> int:
+        """Number of recorded trades (O(1), no records are built)."""
+        return self._size
+
+    @property
+    def capacity(self) -> int:
+        return len(self._sides)
+
+    def symbol_id(self, symbol: str) -> int:
+        """
+        Get the id of a symbol, registering it on first use.
+
+        Args:
+            symbol (str): Symbol
+
+        Returns:
+            int: Symbol id
+        """
+        symbol_id = self.symbol_ids.get(symbol)
+        if symbol_id is None:
+            symbol_id = len(self.symbols)
+            self.symbol_ids[symbol] = symbol_id
+            self.symbols.append(symbol)
+        return symbol_id
+
+    def _reserve(self, n_rows: int):
+        """Grow every column (doubling) until n_rows more rows fit."""
+        required = self._size + n_rows
+        if required <= self.capacity:
+            return
+
+        capacity = self.capacity
+        while capacity < required:
+            capacity *= 2
+
+        for name in ('_dates', '_sides', '_symbol_ids', '_shares', '_prices', '_costs'):
+            column = getattr(self, name)
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            setattr(self, name, grown)
+
+    def append(self, date, action: str, symbol: str, shares: float, price: float,
+               transaction_cost: float):
+        """
+        Record one trade.
+
+        Args:
+            date: Trade date (string or timestamp)
+            action (str): 'BUY' or 'SELL'
+            symbol (str): Traded symbol
+            shares (float): Shares traded (positive)
+            price (float): Execution price
+            transaction_cost (float): Transaction cost in dollars
+        """
+        self._reserve(1)
+        row = self._size
+        side = BUY if action == "BUY" else SELL
+        gross = shares * price
+
+        self._dates[row] = np.datetime64(pd.Timestamp(date).tz_localize(None), 'ns')
+        self._sides[row] = side
+        self._symbol_ids[row] = self.symbol_id(symbol)
+        self._shares[row] = shares
+        self._prices[row] = price
+        self._costs[row] = transaction_cost
+        self._date_labels.append(date)
+        self._size += 1
+
+        self.total_cost += transaction_cost
+        if side == BUY:
+            self.buy_count += 1
+            self.buy_gross += gross
+        else:
+            self.sell_count += 1
+            self.sell_gross += gross
+
+    def extend(self, date, actions: Union[str, Sequence[str]], symbols: Sequence[str],
+               shares: np.ndarray, prices: np.ndarray, transaction_costs: np.ndarray):
+        """
+        Record several trades executed on the same date.
+
+        Args:
+            date: Trade date (string or timestamp)
+            actions: 'BUY'/'SELL' for every trade, or one action per trade
+            symbols (Sequence[str]): Traded symbols
+            shares (np.ndarray): Shares traded (positive)
+            prices (np.ndarray): Execution prices
+            transaction_costs (np.ndarray): Transaction costs in dollars
+        """
+        n_rows = len(symbols)
+        if n_rows == 0:
+            return
+
+        if isinstance(actions, str):
+            sides = np.full(n_rows, BUY if actions == "BUY" else SELL, dtype=np.int8)
+        else:
+            sides = np.where(np.asarray(actions) == "BUY", BUY, SELL).astype(np.int8)
+        shares = np.asarray(shares, dtype=np.float64)
+        prices = np.asarray(prices, dtype=np.float64)
+        costs = np.asarray(transaction_costs, dtype=np.float64)
+
+        self._reserve(n_rows)
+        rows = slice(self._size, self._size + n_rows)
+        self._dates[rows] = np.datetime64(pd.Timestamp(date).tz_localize(None), 'ns')
+        self._sides[rows] = sides
+        self._symbol_ids[rows] = [self.symbol_id(symbol) for symbol in symbols]
+        self._shares[rows] = shares
+        self._prices[rows] = prices
+        self._costs[rows] = costs
+        self._date_labels.extend([date] * n_rows)
+        self._size += n_rows
+
+        gross = shares * prices
+        buys = sides == BUY
+        self.total_cost += float(costs.sum())
+        self.buy_count += int(buys.sum())
+        self.sell_count += n_rows - int(buys.sum())
+        self.buy_gross += float(gross[buys].sum())
+        self.sell_gross += float(gross[~buys].sum())
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """
+        Read-only views of the filled part of every column.
+
+        Returns:
+            Dict: date, side, symbol_id, shares, price and transaction_cost arrays
+        """
+        columns = {
+            "date": self._dates[:self._size],
+            "side": self._sides[:self._size],
+            "symbol_id": self._symbol_ids[:self._size],
+            "shares": self._shares[:self._size],
+            "price": self._prices[:self._size],
+            "transaction_cost": self._costs[:self._size]
+        }
+        for column in columns.values():
+            column.flags.writeable = False
+        return columns
+
+    def summary(self) -> Dict:
+        """
+        Get summary of all transactions from the running aggregates.
+
+        Returns:
+            Dict: Transaction summary (PortfolioManager layout)
+        """
+        if self._size == 0:
+            return {"total_transactions": 0, "total_costs": 0}
+
+        return {
+            "total_transactions": self._size,
+            "buy_transactions": self.buy_count,
+            "sell_transactions": self.sell_count,
+            "total_transaction_costs": self.total_cost,
+            "average_cost_per_transaction": self.total_cost / self._size
+        }
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        Export the ledger as a DataFrame.
+
+        Returns:
+            pd.DataFrame: One row per trade with the transaction_log columns
+        """
+        columns = self.columns()
+        sides = columns["side"]
+        gross = columns["shares"] * columns["price"]
+        costs = columns["transaction_cost"]
+
+        return pd.DataFrame({
+            "date": columns["date"],
+            "action": np.where(sides == BUY, "BUY", "SELL"),
+            "symbol": np.array(self.symbols, dtype=object)[columns["symbol_id"]] if self.symbols else np.empty(0, dtype=object),
+            "shares": columns["shares"],
+            "price": columns["price"],
+            "gross_amount": gross,
+            "transaction_cost": costs,
+            "net_amount": np.where(sides == BUY, gross + costs, gross - costs)
+        })
+
+    def to_arrow(self):
+        """
+        Export the ledger as an Arrow table (requires pyarrow).
+
+        Returns:
+            pyarrow.Table: One row per trade
+        """
+        if pa is None:
+            raise ImportError("Arrow export requires pyarrow (pip install pyarrow)")
+        return pa.Table.from_pandas(self.to_dataframe(), preserve_index=False)
+
+    def records(self) -> List[Dict]:
+        """
+        Rebuild the list-of-dicts transaction log.
+
+        Returns:
+            List[Dict]: One dict per trade with date (as passed to append or
+                extend), action, symbol, shares, price, gross_amount,
+                transaction_cost and net_amount
+        """
+        return self._build_records(0, self._size)
+
+    def transaction_log(self) -> Tuple[Dict, ...]:
+        """
+        Immutable transaction log, cached between trades.
+
+        The ledger is append-only, so only trades recorded since the previous
+        call are converted. A tuple is returned so that code still trying to
+        append to or clear the log fails instead of silently changing a copy.
+
+        Returns:
+            Tuple[Dict, ...]: One dict per trade (same layout as records)
+        """
+        if len(self._log) < self._size:
+            self._log += tuple(self._build_records(len(self._log), self._size))
+        return self._log
+
+    def _build_records(self, start: int, stop: int) -> List[Dict]:
+        """Convert rows [start, stop) into transaction log dicts."""
+        columns = self.columns()
+        records = []
+
+        for row in range(start, stop):
+            shares = columns["shares"][row]
+            price = float(columns["price"][row])
+            cost = float(columns["transaction_cost"][row])
+            gross = shares * price
+            buy = columns["side"][row] == BUY
+            records.append({
+                "date": self._date_labels[row],
+                "action": "BUY" if buy else "SELL",
+                "symbol": self.symbols[columns["symbol_id"][row]],
+                "shares": int(shares) if shares == int(shares) else float(shares),
+                "price": price,
+                "gross_amount": float(gross),
+                "transaction_cost": cost,
+                "net_amount": float(gross + cost if buy else gross - cost)
+            })
+
+        return records
+
+    def memory_bytes(self) -> int:
+        """
+        Bytes allocated by the columns.
+
+        Returns:
+            int: Total column size in bytes
+        """
+        return sum(column.nbytes for column in (self._dates, self._sides, self._symbol_ids,
+                                                self._shares, self._prices, self._costs))
+
+
+def test_transaction_ledger():
+    """Test function to verify the transaction ledger works correctly."""
+
+    print("Testing Transaction Ledger...")
+
+    ledger = TransactionLedger(capacity=2)
+    ledger.append('2024-01-01', 'BUY', 'SPY', 166, 600.00, 99.60)
+    ledger.append('2024-02-01', 'SELL', 'SPY', 166, 620.00, 102.92)
+    ledger.extend('2024-02-01', ['BUY', 'BUY'], ['QQQ', 'IWM'], np.array([90, 200]),
+                  np.array([560.00, 230.00]), np.array([50.40, 46.00]))
+
+    print(f"Rows: {len(ledger)}, capacity grown to {ledger.capacity}")
+    print(f"Summary: {ledger.summary()}")
+    print(ledger.to_dataframe().to_string(index=False))
+    print(f"First record: {ledger.records()[0]}")
+
+    # Running aggregates must match a full rescan
+    frame = ledger.to_dataframe()
+    matches = (np.isclose(ledger.summary()['total_transaction_costs'], frame['transaction_cost'].sum())
+               and ledger.summary()['buy_transactions'] == (frame['action'] == 'BUY').sum())
+    print(f"Aggregates match rescan: {matches}")
+
+    # The cached log only converts new rows and cannot be mutated
+    log = ledger.transaction_log()
+    ledger.append('2024-03-01', 'SELL', 'QQQ', 90, 575.00, 51.75)
+    cached = (ledger.transaction_log()[:len(log)] == log and list(ledger.transaction_log()) == ledger.records()
+              and ledger.transaction_log() is ledger.transaction_log() and ledger.transaction_count == 5)
+    print(f"Cached log matches records: {cached}")
+
+    # Dates are logged exactly as the caller passed them
+    ledger.append(pd.Timestamp('2024-04-01 15:30', tz='UTC'), 'BUY', 'SPY', 10, 610.00, 6.10)
+    dates_kept = (ledger.records()[0]['date'] == '2024-01-01'
+                  and ledger.transaction_log()[-1]['date'] == pd.Timestamp('2024-04-01 15:30', tz='UTC'))
+    print(f"Original date values kept: {dates_kept}")
+
+    # Summary cost stays flat as the ledger grows
+    import time
+    large = TransactionLedger()
+    n_trades = 200000
+    rng = np.random.default_rng(0)
+    for start in range(0, n_trades, 1000):
+        large.extend('2024-01-01', 'BUY' if start % 2000 else 'SELL', ['SPY'] * 1000,
+                     rng.integers(1, 100, 1000), rng.uniform(100, 600, 1000), rng.uniform(0, 50, 1000))
+    started = time.perf_counter()
+    for _ in range(1000):
+        large.summary()
+    print(f"\n{len(large):,} trades in {large.memory_bytes() / 1e6:.1f} MB; "
+          f"summary: {(time.perf_counter() - started) * 1000:.3f} us per call")
+
+    return matches and cached and dates_kept
+
+
+if __name__ == "__main__":
+    # Run test when script is executed directly
+    test_transaction_ledger()
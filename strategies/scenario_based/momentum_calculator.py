@@ -11,6 +11,37 @@ import numpy as np
 from datetime import datetime, timedelta
 
 
+def top_k_indices(scores, k):
+    """
+    Indices of the k highest scores without sorting the whole array.
+    
+    Uses np.argpartition to find candidates, then sorts only those by
+    score descending. Ties are broken by lower index first (the order the
+    symbols were supplied in). NaN scores are never selected.
+    
+    Args:
+        scores (np.ndarray): 1-D array of scores
+        k (int): Number of leaders to return
+        
+    Returns:
+        np.ndarray: Up to k indices, best first
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    candidates = np.flatnonzero(~np.isnan(scores))
+    
+    if k <= 0 or len(candidates) == 0:
+        return np.empty(0, dtype=np.int64)
+    
+    if k < len(candidates):
+        partitioned = np.argpartition(-scores[candidates], k - 1)[:k]
+        # Keep every score tied with the k-th so tie-breaking stays deterministic
+        threshold = scores[candidates[partitioned]].min()
+        candidates = candidates[scores[candidates] >= threshold]
+    
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order][:k]
+
+
 class MomentumCalculator:
     """Calculates momentum scores based on price returns."""
     
@@ -36,7 +67,7 @@ class MomentumCalculator:
         Calculate return over a specific period.
         
         Args:
-            prices (pd.Series): Price series with datetime index
+            prices (pd.Series or np.ndarray): Chronological price series
             period_days (int): Number of days to look back
             
         Returns:
@@ -45,11 +76,13 @@ class MomentumCalculator:
         if len(prices) < period_days + 1:
             return None
         
+        prices = np.asarray(prices)
+        
         # Get current price (most recent)
-        current_price = prices.iloc[-1]
+        current_price = prices[-1]
         
         # Get price from period_days ago
-        past_price = prices.iloc[-(period_days + 1)]
+        past_price = prices[-(period_days + 1)]
         
         if past_price <= 0:
             return None
@@ -118,12 +151,14 @@ class MomentumCalculator:
         momentum_score = sum(valid_returns)
         return momentum_score
     
-    def rank_etfs_by_momentum(self, etf_scores):
+    def rank_etfs_by_momentum(self, etf_scores, top_k=None):
         """
         Rank ETFs by their momentum scores.
         
         Args:
             etf_scores (dict): Dictionary with ETF symbols as keys and momentum scores as values
+            top_k (int): Return only the top_k leaders using a partial sort
+                (default: full ranking of every ETF)
             
         Returns:
             list: List of tuples (symbol, score) sorted by score descending
@@ -135,8 +170,18 @@ class MomentumCalculator:
         if not valid_scores:
             return []
         
-        # Sort by score descending (highest momentum first)
-        ranked_etfs = sorted(valid_scores.items(), key=lambda x: x[1], reverse=True)
+        # NaN scores rank last, as -inf, in both the partial and the full sort
+        symbols = list(valid_scores.keys())
+        scores = np.fromiter(valid_scores.values(), dtype=np.float64, count=len(symbols))
+        scores[np.isnan(scores)] = -np.inf
+        
+        if top_k is not None:
+            return [(symbols[i], valid_scores[symbols[i]]) for i in top_k_indices(scores, top_k)]
+        
+        # Sort by score descending (highest momentum first); the sort is
+        # stable, so ties keep the supplied order like top_k_indices
+        order = sorted(range(len(symbols)), key=lambda i: scores[i], reverse=True)
+        ranked_etfs = [(symbols[i], valid_scores[symbols[i]]) for i in order]
         
         return ranked_etfs
     
@@ -173,27 +218,162 @@ class MomentumCalculator:
         
         return analysis
     
-    def calculate_multi_etf_momentum(self, etf_data_dict):
+    def calculate_multi_etf_momentum(self, etf_data_dict, top_k=None):
         """
         Calculate momentum scores for multiple ETFs and rank them.
         
         Args:
             etf_data_dict (dict): Dictionary with ETF symbols as keys and DataFrames as values
+            top_k (int): Rank only the top_k leaders (default: full ranking)
             
         Returns:
             dict: Complete momentum analysis with rankings
         """
         etf_analyses = {}
-        momentum_scores = {}
         
         # Calculate momentum for each ETF
         for symbol, data in etf_data_dict.items():
-            analysis = self.calculate_etf_momentum(data, symbol)
-            etf_analyses[symbol] = analysis
-            momentum_scores[symbol] = analysis["momentum_score"]
+            etf_analyses[symbol] = self.calculate_etf_momentum(data, symbol)
+        
+        return self._rank_analyses(etf_analyses, top_k)
+    
+    def calculate_panel_momentum(self, panel, position, min_history=1, top_k=None):
+        """
+        Calculate momentum scores for every symbol in a PricePanel and rank them.
+        
+        Args:
+            panel (PricePanel): Aligned price panel
+            position (int): Column position of the calculation date (inclusive)
+            min_history (int): Skip symbols with fewer bars than this
+            top_k (int): Rank only the top_k leaders (default: full ranking)
+            
+        Returns:
+            dict: Complete momentum analysis with rankings (same layout as
+                calculate_multi_etf_momentum)
+        """
+        return self.calculate_snapshot_momentum(panel.snapshot(position), min_history, top_k)
+    
+    def calculate_snapshot_momentum(self, snapshot, min_history=1, top_k=None):
+        """
+        Calculate momentum scores from a point-in-time PanelSnapshot and rank them.
+        
+        Reads each symbol's history as a read-only slice ending at the
+        snapshot date, so nothing is copied or re-sorted.
+        
+        Args:
+            snapshot (PanelSnapshot): Read-only panel view as of the calculation date
+            min_history (int): Skip symbols with fewer bars than this
+            top_k (int): Rank only the top_k leaders (default: full ranking)
+            
+        Returns:
+            dict: Complete momentum analysis with rankings (same layout as
+                calculate_multi_etf_momentum)
+        """
+        etf_analyses = {}
+        
+        for symbol in snapshot.symbols:
+            if snapshot.bar_count(symbol) < min_history:
+                continue
+            
+            prices = snapshot.history(symbol)
+            period_returns = {f"{period}d": self.calculate_period_return(prices, period)
+                              for period in self.periods}
+            returns = {"symbol": symbol, "returns": period_returns}
+            
+            etf_analyses[symbol] = {
+                "symbol": symbol,
+                "calculation_date": snapshot.bar_timestamp(symbol).strftime('%Y-%m-%d'),
+                "current_price": float(prices[-1]),
+                "period_returns": period_returns,
+                "momentum_score": self.calculate_momentum_score(returns),
+                "periods_used": self.periods,
+                "weights_used": self.weights
+            }
+        
+        return self._rank_analyses(etf_analyses, top_k)
+    
+    def calculate_return_matrix(self, prices, period_days):
+        """
+        Calculate period returns for every date and symbol at once.
+        
+        Vectorized equivalent of calculate_period_return: NaN marks the
+        cases where the scalar path returns None (short history or a
+        non-positive past price).
+        
+        Args:
+            prices (np.ndarray): Closes, dates x symbols, chronological, NaN
+                before each symbol's first bar
+            period_days (int): Number of bars to look back
+            
+        Returns:
+            np.ndarray: Period returns, dates x symbols
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        returns = np.full(prices.shape, np.nan)
+        
+        if period_days < len(prices):
+            current = prices[period_days:]
+            past = prices[:len(prices) - period_days]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                returns[period_days:] = np.where(past > 0, current / past - 1.0, np.nan)
+        
+        return returns
+    
+    def calculate_momentum_matrix(self, prices):
+        """
+        Calculate weighted momentum scores for every date and symbol in one pass.
+        
+        Each lookback is a shifted-array division; the weighted sum is
+        accumulated in the same order as calculate_momentum_score, so
+        scores match the scalar path exactly.
+        
+        Args:
+            prices (np.ndarray): Closes, dates x symbols, chronological, NaN
+                before each symbol's first bar
+            
+        Returns:
+            np.ndarray: Momentum scores, dates x symbols (NaN where the scalar
+                path returns None)
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        scores = np.zeros(prices.shape)
+        
+        for period, weight in zip(self.periods, self.weights):
+            scores += self.calculate_return_matrix(prices, period) * weight
+        
+        return scores
+    
+    def calculate_panel_momentum_matrix(self, panel):
+        """
+        Calculate the full momentum score matrix for a PricePanel.
+        
+        Lookbacks count each symbol's own bars, so dates a symbol is missing
+        do not stretch its periods, and, like calculate_panel_momentum, a
+        symbol whose data ends before the panel does keeps the score of its
+        last bar on later dates.
+        
+        Args:
+            panel (PricePanel): Aligned price panel
+            
+        Returns:
+            np.ndarray: Momentum scores, dates x symbols (columns follow panel.symbols)
+        """
+        # Scores per own bar (bars x symbols), then gathered at the bar in
+        # effect on every date
+        scores = self.calculate_momentum_matrix(panel.bar_matrix().T)
+        ordinals = panel.bar_ordinals.T
+        if scores.shape[0] == 0:
+            return np.full(ordinals.shape, np.nan)
+        
+        gathered = np.take_along_axis(scores, np.maximum(ordinals, 0), axis=0)
+        return np.where(ordinals >= 0, gathered, np.nan)
+    
+    def _rank_analyses(self, etf_analyses, top_k=None):
+        """Rank per-ETF analyses into the multi-ETF result layout."""
+        momentum_scores = {symbol: analysis["momentum_score"] for symbol, analysis in etf_analyses.items()}
         
         # Rank ETFs by momentum
-        rankings = self.rank_etfs_by_momentum(momentum_scores)
+        rankings = self.rank_etfs_by_momentum(momentum_scores, top_k)
         
         return {
             "timestamp": datetime.now().isoformat(),
@@ -204,6 +384,69 @@ class MomentumCalculator:
         }
 
 
+def benchmark_momentum_matrix(n_symbols=50, n_days=750, seed=42):
+    """
+    Compare the per-date scalar path against the vectorized score matrix.
+    
+    The scalar reference is calculate_multi_etf_momentum on each symbol's
+    DataFrame truncated at the date, so the panel's gap and delisting
+    handling is checked against the original DataFrame path.
+    
+    Args:
+        n_symbols (int): Number of synthetic symbols
+        n_days (int): Number of trading days
+        seed (int): Random seed for the synthetic prices
+        
+    Returns:
+        dict: Timings, speedup and whether both paths agree exactly
+    """
+    import sys
+    import time
+    sys.path.append('utils')
+    from price_panel import PricePanel, frame_prefix
+    
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2020-01-01', periods=n_days, freq='B', tz='UTC')
+    etf_data = {}
+    for i in range(n_symbols):
+        # Stagger listing dates so short-history rules are exercised, end
+        # some symbols early so scoring from a stale last bar is too, and
+        # drop a few bars so lookbacks must count the symbol's own bars
+        start = int(rng.integers(0, n_days // 3))
+        end = n_days - int(rng.integers(1, n_days // 3)) if i % 5 == 0 else n_days
+        closes = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.01, end - start)))
+        keep = rng.random(end - start) > 0.02
+        etf_data[f"SYM{i}"] = pd.DataFrame({'Date': dates[start:end][keep], 'Close': closes[keep]})
+    
+    panel = PricePanel.from_frames(etf_data)
+    calculator = MomentumCalculator()
+    
+    start = time.perf_counter()
+    scalar = np.full((len(panel), n_symbols), np.nan)
+    for position in range(len(panel)):
+        target = panel.timestamp(position)
+        frames = {symbol: frame_prefix(data, target) for symbol, data in etf_data.items()}
+        analysis = calculator.calculate_multi_etf_momentum(frames)
+        for col, symbol in enumerate(panel.symbols):
+            score = analysis["momentum_scores"].get(symbol)
+            if score is not None:
+                scalar[position, col] = score
+    scalar_seconds = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    matrix = calculator.calculate_panel_momentum_matrix(panel)
+    matrix_seconds = time.perf_counter() - start
+    
+    return {
+        "symbols": n_symbols,
+        "days": n_days,
+        "scalar_seconds": scalar_seconds,
+        "matrix_seconds": matrix_seconds,
+        "speedup": scalar_seconds / matrix_seconds if matrix_seconds > 0 else None,
+        "exact_match": bool(np.array_equal(scalar, matrix, equal_nan=True))
+    }
+
+
 def test_momentum_calculator():
     """Test function to verify momentum calculator works correctly."""
     
@@ -220,7 +463,7 @@ def test_momentum_calculator():
     calculator = MomentumCalculator()
     
     # Load SPY data from Step 1
-    spy_data = fetcher.load_data_from_csv('SPY')
+    spy_data = fetcher.load_data('SPY')
     
     if spy_data.empty:
         print("No SPY data found. Run data fetcher first.")
@@ -267,7 +510,28 @@ def test_momentum_calculator():
     
     print(f"Top ETF: {multi_analysis['top_etf']}")
     
-    return True
+    # Partial-sort top-k must agree with the head of the full ranking
+    top_analysis = calculator.calculate_multi_etf_momentum(etf_data, top_k=2)
+    print(f"Top-2 ETFs: {top_analysis['rankings']}")
+    print(f"Matches full ranking: {top_analysis['rankings'] == multi_analysis['rankings'][:2]}")
+    
+    # Ties and NaN scores: both paths rank NaN last and break ties by supplied order
+    parity = True
+    for scores in [{'A': np.nan, 'B': 0.1, 'C': 0.1, 'D': None},
+                   {'A': np.nan, 'B': np.nan, 'C': -np.inf},
+                   {'A': 0.2, 'B': np.nan, 'C': 0.2, 'D': 0.3}]:
+        full = calculator.rank_etfs_by_momentum(scores)
+        for k in range(1, len(full) + 1):
+            parity &= str(calculator.rank_etfs_by_momentum(scores, top_k=k)) == str(full[:k])
+    print(f"Tie/NaN parity between top-k and full ranking: {parity}")
+    
+    # Benchmark the vectorized score matrix against the scalar path
+    print(f"\n--- Benchmarking vectorized momentum matrix ---")
+    benchmark = benchmark_momentum_matrix(n_symbols=20, n_days=500)
+    print(f"Scalar path: {benchmark['scalar_seconds']:.3f}s, matrix: {benchmark['matrix_seconds']:.4f}s "
+          f"(x{benchmark['speedup']:.0f}), exact match: {benchmark['exact_match']}")
+    
+    return parity and benchmark['exact_match']
 
 
 if __name__ == "__main__":
@@ -0,0 +1,234 @@
+"""
+Momentum State Module
+
+Streaming momentum scores for live rebalancing.
+Keeps a fixed-size ring buffer of recent closes per symbol so each new bar
+updates one score in O(len(periods)) with bounded memory.
+Independent module that can be tested separately.
+"""
+
+import numpy as np
+import pandas as pd
+
+from momentum_calculator import MomentumCalculator, top_k_indices
+
+
+class MomentumState:
+    """Incrementally maintained momentum scores for a universe of symbols."""
+    
+    def __init__(self, periods=[30, 90, 180], weights=[0.5, 0.3, 0.2], initial_capacity=64):
+        """
+        Initialize streaming momentum state.
+        
+        Args:
+            periods (list): Lookback periods in bars
+            weights (list): Weights for each period (must sum to 1.0)
+            initial_capacity (int): Number of symbols to preallocate room for
+        """
+        # Reuse the calculator's parameter validation and scoring rules
+        self.calculator = MomentumCalculator(periods, weights)
+        self.periods = periods
+        self.weights = weights
+        self.window = max(periods) + 1
+        
+        self.symbols = []
+        self.symbol_index = {}
+        
+        capacity = max(1, initial_capacity)
+        self.buffer = np.full((capacity, self.window), np.nan)
+        self.bar_counts = np.zeros(capacity, dtype=np.int64)
+        self.last_dates = np.full(capacity, np.iinfo(np.int64).min, dtype=np.int64)
+        self.scores = np.full(capacity, np.nan)
+    
+    def _row_for(self, symbol):
+        """Get the buffer row for a symbol, adding it if new."""
+        row = self.symbol_index.get(symbol)
+        if row is not None:
+            return row
+        
+        row = len(self.symbols)
+        if row == len(self.buffer):
+            # Grow by doubling so adding symbols stays amortized O(1)
+            grow = len(self.buffer)
+            self.buffer = np.vstack([self.buffer, np.full((grow, self.window), np.nan)])
+            self.bar_counts = np.concatenate([self.bar_counts, np.zeros(grow, dtype=np.int64)])
+            self.last_dates = np.concatenate([self.last_dates, np.full(grow, np.iinfo(np.int64).min, dtype=np.int64)])
+            self.scores = np.concatenate([self.scores, np.full(grow, np.nan)])
+        
+        self.symbols.append(symbol)
+        self.symbol_index[symbol] = row
+        return row
+    
+    @staticmethod
+    def _to_epoch_ns(date):
+        timestamp = pd.Timestamp(date)
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.tz_localize('UTC')
+        return int(timestamp.as_unit('ns').value)
+    
+    def _score_row(self, row):
+        """Recompute one symbol's score from its ring buffer."""
+        count = self.bar_counts[row]
+        history = self.buffer[row]
+        current_price = history[(count - 1) % self.window]
+        
+        valid_returns = []
+        for period, weight in zip(self.periods, self.weights):
+            if count < period + 1:
+                return None
+            
+            past_price = history[(count - 1 - period) % self.window]
+            if past_price <= 0:
+                return None
+            
+            valid_returns.append(((current_price / past_price) - 1.0) * weight)
+        
+        return sum(valid_returns)
+    
+    def update(self, symbol, date, close):
+        """
+        Add one bar for a symbol and refresh its score.
+        
+        A bar with the same date as the symbol's latest bar replaces it
+        (e.g. an intraday revision); older dates are rejected.
+        
+        Args:
+            symbol (str): ETF symbol
+            date: Bar date (pd.Timestamp, str or datetime)
+            close (float): Closing price
+            
+        Returns:
+            float: Updated momentum score or None if insufficient history
+        """
+        row = self._row_for(symbol)
+        date_ns = self._to_epoch_ns(date)
+        last_date = self.last_dates[row]
+        
+        if date_ns < last_date:
+            raise ValueError(f"Out-of-order bar for {symbol}: {pd.Timestamp(date)} is before the last update")
+        
+        if date_ns > last_date:
+            self.bar_counts[row] += 1
+            self.last_dates[row] = date_ns
+        
+        self.buffer[row, (self.bar_counts[row] - 1) % self.window] = close
+        
+        score = self._score_row(row)
+        self.scores[row] = np.nan if score is None else score
+        return score
+    
+    def load_history(self, symbol, dates, closes):
+        """
+        Warm-start a symbol from historical bars.
+        
+        Only the last max(periods)+1 bars are kept.
+        
+        Args:
+            symbol (str): ETF symbol
+            dates (array-like): Chronological bar dates
+            closes (array-like): Closing prices
+            
+        Returns:
+            float: Momentum score or None if insufficient history
+        """
+        closes = np.asarray(closes, dtype=np.float64)
+        if len(closes) == 0:
+            return None
+        
+        row = self._row_for(symbol)
+        count = len(closes)
+        recent = closes[-self.window:]
+        slots = np.arange(count - len(recent), count) % self.window
+        
+        self.buffer[row] = np.nan
+        self.buffer[row, slots] = recent
+        self.bar_counts[row] = count
+        self.last_dates[row] = self._to_epoch_ns(pd.Series(dates).iloc[-1])
+        
+        score = self._score_row(row)
+        self.scores[row] = np.nan if score is None else score
+        return score
+    
+    @classmethod
+    def from_panel(cls, panel, position, periods=[30, 90, 180], weights=[0.5, 0.3, 0.2]):
+        """
+        Build state from a PricePanel as of a column position.
+        
+        Args:
+            panel (PricePanel): Aligned price panel
+            position (int): Column position of the last bar to load
+            periods (list): Lookback periods in bars
+            weights (list): Weights for each period
+            
+        Returns:
+            MomentumState: Warm-started state
+        """
+        state = cls(periods, weights, initial_capacity=len(panel.symbols))
+        for symbol in panel.symbols:
+            bar = panel.bar_position(symbol, position)
+            if bar >= 0:
+                state.load_history(symbol, [panel.timestamp(bar)], panel.history(symbol, position))
+        return state
+    
+    def score(self, symbol):
+        """Current momentum score for a symbol, or None."""
+        row = self.symbol_index.get(symbol)
+        if row is None or np.isnan(self.scores[row]):
+            return None
+        return float(self.scores[row])
+    
+    def get_scores(self):
+        """Current momentum scores for every tracked symbol (None if not ready)."""
+        return {symbol: self.score(symbol) for symbol in self.symbols}
+    
+    def top_k(self, k=1):
+        """
+        Current momentum leaders without re-sorting the universe.
+        
+        Args:
+            k (int): Number of leaders to return
+            
+        Returns:
+            list: Up to k (symbol, score) tuples, highest score first
+        """
+        leaders = top_k_indices(self.scores[:len(self.symbols)], k)
+        return [(self.symbols[row], float(self.scores[row])) for row in leaders]
+    
+    def memory_bytes(self):
+        """Bytes held by the state arrays (independent of history length)."""
+        return self.buffer.nbytes + self.bar_counts.nbytes + self.last_dates.nbytes + self.scores.nbytes
+
+
+def test_momentum_state():
+    """Test function to verify streaming state matches the batch calculator."""
+    
+    print("Testing Momentum State...")
+    
+    rng = np.random.default_rng(0)
+    dates = pd.date_range('2023-01-02', periods=400, freq='B', tz='UTC')
+    prices = {symbol: 100 * np.exp(np.cumsum(rng.normal(0.0004, 0.012, len(dates))))
+              for symbol in ['SPY', 'QQQ', 'IWM', 'DIA']}
+    
+    calculator = MomentumCalculator()
+    state = MomentumState()
+    
+    # Stream every bar and compare against the batch calculation at the end
+    for i, date in enumerate(dates):
+        for symbol, closes in prices.items():
+            state.update(symbol, date, closes[i])
+    
+    etf_data = {symbol: pd.DataFrame({'Date': dates, 'Close': closes}) for symbol, closes in prices.items()}
+    batch = calculator.calculate_multi_etf_momentum(etf_data)
+    
+    matches = all(state.score(symbol) == batch['momentum_scores'][symbol] for symbol in prices)
+    print(f"Streaming scores match batch: {matches}")
+    print(f"Top 2: {state.top_k(2)}")
+    print(f"Batch rankings: {batch['rankings'][:2]}")
+    print(f"State memory: {state.memory_bytes()} bytes for {len(dates)} bars per symbol")
+    
+    return matches and state.top_k(2) == batch['rankings'][:2]
+
+
+if __name__ == "__main__":
+    # Run test when script is executed directly
+    test_momentum_state()
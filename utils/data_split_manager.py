@@ -7,6 +7,7 @@ Independent module that can be tested separately.
 """
 
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, Tuple, List
 
@@ -196,6 +197,103 @@ class DataSplitManager:
         
         return in_sample_dict, out_of_sample_dict
     
+    def generate_walk_forward_windows(self, dates, train_months: int = 12, test_months: int = 3,
+                                      step_months: int = None, anchored: bool = False) -> List[Dict]:
+        """
+        Generate rolling or anchored walk-forward train/test windows.
+        
+        Every window boundary is resolved with a single binary search over
+        the sorted trading dates, so the dates are only traversed once.
+        
+        Args:
+            dates: Trading dates (pd.Series, DatetimeIndex or int64 epoch-ns array)
+            train_months (int): Training window length (initial length when anchored)
+            test_months (int): Test window length
+            step_months (int): Months between consecutive windows (default: test_months;
+                smaller steps give overlapping test periods)
+            anchored (bool): Keep every training window starting at the first date
+            
+        Returns:
+            List[Dict]: Windows with window_id, train/test first and last dates,
+                exclusive boundary timestamps and (start, stop) positions into
+                the sorted dates
+        """
+        step_months = step_months or test_months
+        if isinstance(dates, np.ndarray) and dates.dtype == np.int64:
+            dates = pd.to_datetime(dates, utc=True)
+        dates = pd.DatetimeIndex(pd.to_datetime(pd.Series(dates), utc=True).drop_duplicates().sort_values())
+        
+        if len(dates) == 0:
+            return []
+        
+        first_date, last_date = dates[0], dates[-1]
+        
+        # Calendar boundaries for every window: train start, test start, test end (exclusive)
+        boundaries = []
+        offset = 0
+        while True:
+            test_start = first_date + pd.DateOffset(months=train_months + offset)
+            if test_start > last_date:
+                break
+            train_start = first_date if anchored else first_date + pd.DateOffset(months=offset)
+            boundaries.append((train_start, test_start, test_start + pd.DateOffset(months=test_months)))
+            offset += step_months
+        
+        if not boundaries:
+            return []
+        
+        positions = dates.searchsorted(pd.DatetimeIndex(np.ravel(boundaries)), side='left').reshape(-1, 3)
+        
+        windows = []
+        for (train_start, test_start, test_end), (train_pos, test_pos, end_pos) in zip(boundaries, positions):
+            if train_pos >= test_pos or test_pos >= end_pos:
+                continue
+            windows.append({
+                'window_id': len(windows),
+                'train_start': dates[train_pos].strftime('%Y-%m-%d'),
+                'train_end': dates[test_pos - 1].strftime('%Y-%m-%d'),
+                'test_start': dates[test_pos].strftime('%Y-%m-%d'),
+                'test_end': dates[end_pos - 1].strftime('%Y-%m-%d'),
+                'boundaries': (train_start, test_start, test_end),
+                'train_slice': (int(train_pos), int(test_pos)),
+                'test_slice': (int(test_pos), int(end_pos))
+            })
+        
+        return windows
+    
+    def split_walk_forward(self, etf_data_dict: Dict[str, pd.DataFrame],
+                           windows: List[Dict]) -> List[Tuple[Dict, Dict]]:
+        """
+        Split every ETF into the train/test frames of each walk-forward window.
+        
+        Each frame is sorted once and all window boundaries are located with
+        one searchsorted call; windows are positional slices of that frame.
+        
+        Args:
+            etf_data_dict (Dict): Dictionary with ETF symbols as keys and DataFrames as values
+            windows (List[Dict]): Windows from generate_walk_forward_windows
+            
+        Returns:
+            List[Tuple[Dict, Dict]]: (in_sample_dict, out_of_sample_dict) per window
+        """
+        splits = [({}, {}) for _ in windows]
+        if not windows:
+            return splits
+        
+        boundaries = pd.DatetimeIndex(np.ravel([window['boundaries'] for window in windows]))
+        
+        for symbol, data in etf_data_dict.items():
+            data = data.copy()
+            data['Date'] = pd.to_datetime(data['Date'], utc=True)
+            data = data.sort_values('Date').reset_index(drop=True)
+            positions = data['Date'].searchsorted(boundaries, side='left').reshape(-1, 3)
+            
+            for (in_sample_dict, out_of_sample_dict), (train_pos, test_pos, end_pos) in zip(splits, positions):
+                in_sample_dict[symbol] = data.iloc[train_pos:test_pos]
+                out_of_sample_dict[symbol] = data.iloc[test_pos:end_pos]
+        
+        return splits
+    
     def get_recommended_split_date(self, data: pd.DataFrame, oos_percentage: float = 0.3) -> str:
         """
         Recommend a split date based on desired out-of-sample percentage.
@@ -261,7 +359,7 @@ def test_data_split_manager():
     
     # Load test data
     fetcher = ETFDataFetcher()
-    spy_data = fetcher.load_data_from_csv('SPY')
+    spy_data = fetcher.load_data('SPY')
     
     if spy_data.empty:
         print("No SPY data found. Run data fetcher first.")
@@ -303,8 +401,8 @@ def test_data_split_manager():
     
     # Test 5: Multiple ETF split
     print(f"\n--- Test 5: Multiple ETF split ---")
-    qqq_data = fetcher.load_data_from_csv('QQQ')
-    iwm_data = fetcher.load_data_from_csv('IWM')
+    qqq_data = fetcher.load_data('QQQ')
+    iwm_data = fetcher.load_data('IWM')
     
     etf_data = {'SPY': spy_data, 'QQQ': qqq_data, 'IWM': iwm_data}
     in_sample_dict, out_of_sample_dict = splitter.split_multiple_etfs(etf_data, split_date)
@@ -314,6 +412,18 @@ def test_data_split_manager():
         if symbol in in_sample_dict:
             print(f"  {symbol}: {len(in_sample_dict[symbol])} in-sample, {len(out_of_sample_dict[symbol])} out-of-sample")
     
+    # Test 6: Walk-forward windows
+    print(f"\n--- Test 6: Walk-forward windows ---")
+    for anchored in [False, True]:
+        windows = splitter.generate_walk_forward_windows(spy_data['Date'], train_months=12, test_months=3, anchored=anchored)
+        splits = splitter.split_walk_forward(etf_data, windows)
+        print(f"{'Anchored' if anchored else 'Rolling'}: {len(windows)} windows")
+        for window, (train, test) in zip(windows, splits):
+            leakage = splitter.validate_no_data_leakage(train['SPY'], test['SPY'], 'SPY')
+            print(f"  {window['window_id']}: train {window['train_start']} to {window['train_end']} ({len(train['SPY'])} rows), "
+                  f"test {window['test_start']} to {window['test_end']} ({len(test['SPY'])} rows), "
+                  f"overlap: {leakage['overlap_detected']}")
+    
     # Print summary
     splitter.print_split_summary()
     
@@ -10,6 +10,42 @@ import numpy as np
 from datetime import datetime
 
 
+STATUS_NAMES = ('pass', 'warning', 'error')
+
+# Per-symbol record returned by DataValidator.validate_panel
+PANEL_STATUS_DTYPE = np.dtype([
+    ('rows', np.int64),
+    ('missing_dates', np.int64),
+    ('missing_prices', np.int64),
+    ('missing_volumes', np.int64),
+    ('non_positive_prices', np.int64),
+    ('extreme_changes', np.int64),
+    ('large_gaps', np.int64),
+    ('status', np.int8)
+])
+
+# Gaps longer than this between trading days are flagged (weekends are 3 days)
+MAX_GAP_NS = pd.Timedelta(days=5).value
+
+_NAT = np.iinfo(np.int64).min
+
+
+def _epoch_ns(dates):
+    """
+    Convert a date column to int64 UTC epoch nanoseconds (NaT -> _NAT).
+    
+    Args:
+        dates (pd.Series): Dates (naive dates are treated as UTC)
+        
+    Returns:
+        np.ndarray: int64 nanoseconds since 1970-01-01 UTC
+    """
+    # Datetime columns (tz-aware or naive) expose UTC values without parsing
+    if dates.dtype.kind != 'M':
+        dates = pd.to_datetime(dates, utc=True, errors='coerce')
+    return dates.values.astype('datetime64[ns]').view(np.int64)
+
+
 class DataValidator:
     """Validates and cleans ETF price data."""
     
@@ -210,6 +246,169 @@ class DataValidator:
         print(f"Overall status: {validation_report['overall_status']}")
         
         return validation_report
+    
+    def validate_panel(self, etf_data_dict):
+        """
+        Validate a whole universe in one vectorized pass.
+        
+        Applies the checks of validate_etf_data (missing values, non-positive
+        prices, >50% moves between consecutive valid closes, gaps of more than
+        5 days between sorted dates) to every symbol at once: the frames are
+        concatenated into flat arrays once and all counts come from grouped
+        numpy reductions, instead of a pandas pipeline per symbol.
+        
+        Args:
+            etf_data_dict (dict): Dictionary of ETF DataFrames {symbol: data}
+            
+        Returns:
+            np.ndarray: Structured array with one record per symbol, in the
+                order of etf_data_dict (fields in PANEL_STATUS_DTYPE; status
+                is an index into STATUS_NAMES)
+        """
+        frames = list(etf_data_dict.values())
+        n_symbols = len(frames)
+        results = np.zeros(n_symbols, dtype=PANEL_STATUS_DTYPE)
+        if n_symbols == 0:
+            return results
+        
+        lengths = np.array([len(data) for data in frames], dtype=np.int64)
+        columns = [data.columns for data in frames]
+        has_close = np.array(['Close' in cols for cols in columns])
+        has_date = np.array(['Date' in cols for cols in columns])
+        
+        # Flatten every column once; absent columns count as missing values
+        closes = np.concatenate([
+            data['Close'].to_numpy(dtype=np.float64, na_value=np.nan) if ok else np.full(len(data), np.nan)
+            for data, ok in zip(frames, has_close)])
+        volumes = np.concatenate([
+            data['Volume'].to_numpy(dtype=np.float64, na_value=np.nan) if 'Volume' in cols else np.full(len(data), np.nan)
+            for data, cols in zip(frames, columns)])
+        dates = np.concatenate([_epoch_ns(data['Date']) if ok else np.full(len(data), _NAT)
+                                for data, ok in zip(frames, has_date)])
+        ids = np.repeat(np.arange(n_symbols), lengths)
+        
+        valid_prices = ~np.isnan(closes)
+        valid_dates = dates != _NAT
+        results['rows'] = lengths
+        results['missing_dates'] = np.bincount(ids[~valid_dates], minlength=n_symbols)
+        results['missing_prices'] = np.bincount(ids[~valid_prices], minlength=n_symbols)
+        results['missing_volumes'] = np.bincount(ids[np.isnan(volumes)], minlength=n_symbols)
+        
+        # Moves between consecutive valid closes of the same symbol
+        price_ids = ids[valid_prices]
+        prices = closes[valid_prices]
+        results['non_positive_prices'] = np.bincount(price_ids[prices <= 0], minlength=n_symbols)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            changes = prices[1:] / prices[:-1] - 1
+        extreme = (price_ids[1:] == price_ids[:-1]) & (np.abs(changes) > 0.5)
+        results['extreme_changes'] = np.bincount(price_ids[1:][extreme], minlength=n_symbols)
+        
+        # Gaps between sorted dates; stored data is sorted, so only sort if needed
+        date_ids = ids[valid_dates]
+        stamps = dates[valid_dates]
+        same_symbol = date_ids[1:] == date_ids[:-1]
+        steps = np.diff(stamps)
+        if np.any(same_symbol & (steps < 0)):
+            order = np.lexsort((stamps, date_ids))
+            date_ids, stamps = date_ids[order], stamps[order]
+            steps = np.diff(stamps)
+        large = same_symbol & (steps > MAX_GAP_NS)
+        results['large_gaps'] = np.bincount(date_ids[1:][large], minlength=n_symbols)
+        
+        # Worst status of the three checks, with the same rules as validate_etf_data
+        n_prices = lengths - results['missing_prices']
+        missing_warning = (results['missing_dates'] > 0) | (results['missing_prices'] > 0)
+        price_error = ~has_close | (n_prices == 0) | (results['non_positive_prices'] > 0)
+        price_warning = results['extreme_changes'] > 0
+        continuity_error = ~has_date
+        continuity_warning = (lengths < 2) | (results['large_gaps'] > 0)
+        
+        status = np.where(missing_warning | price_warning | continuity_warning, 1, 0)
+        status[(lengths == 0) | price_error | continuity_error] = 2
+        results['status'] = status
+        
+        counts = np.bincount(results['status'], minlength=len(STATUS_NAMES))
+        print(f"Validated {n_symbols} symbols: " +
+              ", ".join(f"{count} {name}" for name, count in zip(STATUS_NAMES, counts)))
+        
+        return results
+
+
+def _synthetic_universe(n_symbols, n_days, seed):
+    """
+    Random-walk ETF frames with faults injected into some symbols.
+    
+    Args:
+        n_symbols (int): Number of symbols
+        n_days (int): Business days per symbol
+        seed (int): Random seed
+        
+    Returns:
+        dict: DataFrame per symbol with Date, Close and Volume columns
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2015-01-02', periods=n_days, freq='B', tz='UTC')
+    closes = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.01, (n_symbols, n_days)), axis=1))
+    volumes = rng.integers(1_000_000, 50_000_000, (n_symbols, n_days)).astype(np.float64)
+    
+    etf_data = {}
+    for i in range(n_symbols):
+        close, volume, index = closes[i].copy(), volumes[i].copy(), np.arange(n_days)
+        fault = i % 10
+        if fault == 1:
+            close[rng.integers(0, n_days, 3)] = np.nan
+        elif fault == 2:
+            close[n_days // 2:] *= 2.0
+        elif fault == 3:
+            close[rng.integers(0, n_days)] = -1.0
+        elif fault == 4:
+            index = np.delete(index, np.arange(n_days // 3, n_days // 3 + 5))
+        elif fault == 5:
+            volume[:10] = np.nan
+        etf_data[f"SYM{i:04d}"] = pd.DataFrame({'Date': dates[index], 'Close': close[index], 'Volume': volume[index]})
+    
+    return etf_data
+
+
+def benchmark_validate_panel(n_symbols=5000, n_days=252, seed=42):
+    """
+    Compare per-symbol validate_etf_data calls against validate_panel.
+    
+    Args:
+        n_symbols (int): Number of synthetic symbols
+        n_days (int): Business days per symbol
+        seed (int): Random seed
+        
+    Returns:
+        dict: Timings, speedup and whether both paths agree on every status
+    """
+    import contextlib
+    import io
+    import time
+    
+    etf_data = _synthetic_universe(n_symbols, n_days, seed)
+    validator = DataValidator()
+    
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        loop = [validator.validate_etf_data(data, symbol)['overall_status'] for symbol, data in etf_data.items()]
+        loop_seconds = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        panel = validator.validate_panel(etf_data)
+        panel_seconds = time.perf_counter() - start
+    
+    statuses = [STATUS_NAMES[status] for status in panel['status']]
+    
+    return {
+        "symbols": n_symbols,
+        "days": n_days,
+        "loop_seconds": loop_seconds,
+        "panel_seconds": panel_seconds,
+        "speedup": loop_seconds / panel_seconds,
+        "statuses_match": statuses == loop,
+        "status_counts": {name: statuses.count(name) for name in STATUS_NAMES}
+    }
 
 
 def test_data_validator():
@@ -224,7 +423,7 @@ def test_data_validator():
     
     # Load SPY data that was saved in Step 1
     fetcher = ETFDataFetcher()
-    spy_data = fetcher.load_data_from_csv('SPY')
+    spy_data = fetcher.load_data('SPY')
     
     if spy_data.empty:
         print("No SPY data found. Run data fetcher first.")
@@ -248,7 +447,18 @@ def test_data_validator():
     print(f"Original shape: {spy_data.shape}")
     print(f"Filled shape: {filled_data.shape}")
     
-    return validation_report['overall_status'] in ['pass', 'warning']
+    # Test whole-panel validation
+    print(f"\n--- Testing panel validation ---")
+    panel = validator.validate_panel({'SPY': spy_data, 'EMPTY': spy_data.iloc[:0]})
+    print(f"SPY: {STATUS_NAMES[panel['status'][0]]}, rows {panel['rows'][0]}, large gaps {panel['large_gaps'][0]}")
+    print(f"Matches validate_etf_data: {STATUS_NAMES[panel['status'][0]] == validation_report['overall_status']}")
+    
+    benchmark = benchmark_validate_panel()
+    print(f"{benchmark['symbols']:,} symbols x {benchmark['days']} days: loop {benchmark['loop_seconds']:.2f}s, "
+          f"panel {benchmark['panel_seconds']:.3f}s (x{benchmark['speedup']:.0f}), "
+          f"statuses match: {benchmark['statuses_match']} {benchmark['status_counts']}")
+    
+    return validation_report['overall_status'] in ['pass', 'warning'] and benchmark['statuses_match']
 
 
 if __name__ == "__main__":
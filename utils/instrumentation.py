@@ -0,0 +1,295 @@
+"""
+Instrumentation Module
+
+Lightweight timing and allocation instrumentation for the backtest engines.
+Named stages (data loading, momentum scoring, rebalancing, equity-curve
+building) are timed with nesting-aware totals, events are counted, and
+cProfile and tracemalloc capture can be switched on for a run. Disabled by
+default: a disabled instance hands out one shared no-op context, so the
+hooks cost a method call. Reports are written as JSON into logs/.
+Independent module that can be tested separately.
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Optional
+
+
+class _NullStage:
+    """No-op context returned while instrumentation is disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    """Times one pass through a named stage."""
+
+    __slots__ = ('instrumentation', 'name', 'started', 'child_seconds', 'memory_before')
+
+    def __init__(self, instrumentation: 'Instrumentation', name: str):
+        self.instrumentation = instrumentation
+        self.name = name
+        self.child_seconds = 0.0
+
+    def __enter__(self):
+        instrumentation = self.instrumentation
+        instrumentation._stack.append(self)
+        self.memory_before = tracemalloc.get_traced_memory()[0] if instrumentation._tracing else 0
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        elapsed = time.perf_counter() - self.started
+        instrumentation = self.instrumentation
+        stack = instrumentation._stack
+        stack.pop()
+        if stack:
+            stack[-1].child_seconds += elapsed
+
+        stats = instrumentation.stages[self.name]
+        stats['calls'] += 1
+        stats['seconds'] += elapsed
+        stats['self_seconds'] += elapsed - self.child_seconds
+        stats['max_seconds'] = max(stats['max_seconds'], elapsed)
+        if instrumentation._tracing:
+            stats['net_bytes'] += tracemalloc.get_traced_memory()[0] - self.memory_before
+        return False
+
+
+def _new_stage_stats() -> Dict:
+    return {'calls': 0, 'seconds': 0.0, 'self_seconds': 0.0, 'max_seconds': 0.0, 'net_bytes': 0}
+
+
+class Instrumentation:
+    """Stage timers, counters and optional profiler/allocation capture for one run."""
+
+    def __init__(self, enabled: bool = False, profile: bool = False, trace_memory: bool = False,
+                 log_dir: str = 'logs', label: str = 'backtest'):
+        """
+        Initialize instrumentation.
+
+        Args:
+            enabled (bool): Collect stage timings and counters
+            profile (bool): Also run cProfile between start() and finish() (implies enabled)
+            trace_memory (bool): Also trace allocations with tracemalloc (implies enabled)
+            log_dir (str): Directory for reports
+            label (str): Run label used in report file names
+        """
+        self.enabled = enabled or profile or trace_memory
+        self.profile = profile
+        self.trace_memory = trace_memory
+        self.log_dir = log_dir
+        self.label = label
+        self.reset()
+
+    def reset(self):
+        """Clear collected stages and counters."""
+        self.stages = defaultdict(_new_stage_stats)
+        self.counters = defaultdict(int)
+        self.started_at = None
+        self.wall_seconds = 0.0
+        self.memory = {}
+        self._stack = []
+        self._profiler = None
+        self._tracing = False
+        self._started_tracing = False
+        self._started = None
+
+    def start(self):
+        """Begin a run: start the wall clock and any requested capture."""
+        if not self.enabled:
+            return
+
+        self.reset()
+        self.started_at = datetime.now().isoformat()
+        if self.trace_memory:
+            self._started_tracing = not tracemalloc.is_tracing()
+            if self._started_tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            self._tracing = True
+        if self.profile:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        self._started = time.perf_counter()
+
+    def stage(self, name: str):
+        """
+        Context manager timing a named stage (no-op while disabled).
+
+        Args:
+            name (str): Stage name
+
+        Returns:
+            Context manager
+        """
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def count(self, name: str, n: int = 1):
+        """
+        Increment a counter (no-op while disabled).
+
+        Args:
+            name (str): Counter name
+            n (int): Increment
+        """
+        if self.enabled:
+            self.counters[name] += n
+
+    def stop(self):
+        """End a run: stop the wall clock and any capture."""
+        if not self.enabled or self._started is None:
+            return
+
+        self.wall_seconds = time.perf_counter() - self._started
+        self._started = None
+        if self._profiler is not None:
+            self._profiler.disable()
+        if self._tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            self.memory = {
+                'current_bytes': current,
+                'peak_bytes': peak,
+                'top_allocations': [
+                    {'location': str(stat.traceback[0]), 'bytes': stat.size, 'blocks': stat.count}
+                    for stat in snapshot.statistics('lineno')[:10]
+                ]
+            }
+            self._tracing = False
+            if self._started_tracing:
+                tracemalloc.stop()
+
+    def report(self) -> Dict:
+        """
+        Per-stage breakdown of the run.
+
+        Returns:
+            Dict: Wall time, stages (sorted by exclusive time, with share of
+                wall time), counters and memory capture
+        """
+        stages = {}
+        for name, stats in sorted(self.stages.items(), key=lambda item: -item[1]['self_seconds']):
+            stages[name] = {
+                **stats,
+                'mean_seconds': stats['seconds'] / stats['calls'] if stats['calls'] else 0.0,
+                'self_share_pct': stats['self_seconds'] / self.wall_seconds * 100 if self.wall_seconds else 0.0
+            }
+
+        return {
+            'label': self.label,
+            'started_at': self.started_at,
+            'wall_seconds': self.wall_seconds,
+            'stages': stages,
+            'counters': dict(self.counters),
+            'memory': self.memory
+        }
+
+    def finish(self) -> Optional[str]:
+        """
+        Stop the run and write its report (and profile) into log_dir.
+
+        Returns:
+            str: Path of the JSON report, or None when disabled
+        """
+        if not self.enabled:
+            return None
+
+        self.stop()
+        os.makedirs(self.log_dir, exist_ok=True)
+        stem = os.path.join(self.log_dir, f"instrumentation_{self.label}_{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}")
+
+        report = self.report()
+        if self._profiler is not None:
+            stream = io.StringIO()
+            pstats.Stats(self._profiler, stream=stream).sort_stats('cumulative').print_stats(40)
+            with open(f"{stem}_profile.txt", 'w') as f:
+                f.write(stream.getvalue())
+            report['profile_path'] = f"{stem}_profile.txt"
+
+        with open(f"{stem}.json", 'w') as f:
+            json.dump(report, f, indent=2)
+
+        return f"{stem}.json"
+
+    def print_report(self):
+        """Print the per-stage breakdown."""
+        report = self.report()
+        print(f"\n=== INSTRUMENTATION: {self.label} ({report['wall_seconds']:.3f}s) ===")
+        for name, stats in report['stages'].items():
+            line = (f"  {name:<20} {stats['calls']:>6} calls  {stats['seconds'] * 1000:>10.2f} ms  "
+                    f"self {stats['self_seconds'] * 1000:>10.2f} ms ({stats['self_share_pct']:.1f}%)")
+            if self.trace_memory:
+                line += f"  net {stats['net_bytes'] / 1024:>9.1f} KiB"
+            print(line)
+        for name, value in report['counters'].items():
+            print(f"  {name}: {value:,}")
+        if report['memory']:
+            print(f"  Peak traced memory: {report['memory']['peak_bytes'] / 1e6:.2f} MB")
+
+
+def test_instrumentation():
+    """Test function to verify instrumentation works correctly."""
+
+    print("Testing Instrumentation...")
+
+    import tempfile
+
+    # Disabled: shared no-op stage, nothing recorded
+    disabled = Instrumentation()
+    disabled.start()
+    with disabled.stage('work'):
+        pass
+    disabled.count('events')
+    print(f"Disabled records nothing: {not disabled.stages and not disabled.counters and disabled.finish() is None}")
+
+    calls = 100000
+    started = time.perf_counter()
+    for _ in range(calls):
+        with disabled.stage('work'):
+            pass
+    print(f"Disabled overhead: {(time.perf_counter() - started) / calls * 1e9:.0f} ns per stage")
+
+    with tempfile.TemporaryDirectory() as log_dir:
+        instrumentation = Instrumentation(trace_memory=True, profile=True, log_dir=log_dir, label='test')
+        instrumentation.start()
+        with instrumentation.stage('outer'):
+            for _ in range(3):
+                with instrumentation.stage('inner'):
+                    data = [0.0] * 100000
+                    time.sleep(0.01)
+                instrumentation.count('iterations')
+        path = instrumentation.finish()
+        instrumentation.print_report()
+
+        with open(path) as f:
+            report = json.load(f)
+        stages = report['stages']
+        nested = stages['outer']['seconds'] >= stages['inner']['seconds'] > stages['outer']['self_seconds']
+        print(f"Report written: {os.path.basename(path)}, profile: {os.path.exists(report['profile_path'])}")
+        print(f"Nested stage times consistent: {nested}")
+
+    return nested and report['counters']['iterations'] == 3
+
+
+if __name__ == "__main__":
+    # Run test when script is executed directly
+    test_instrumentation()
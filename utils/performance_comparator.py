@@ -12,6 +12,8 @@ from typing import Dict, List, Tuple, Optional
 from datetime import datetime
 import warnings
 
+from significance_tests import bootstrap_sharpe_ci, ks_test, permutation_test, welch_t_test
+
 
 class PerformanceComparator:
     """Compares and analyzes performance between different periods or strategies."""
@@ -110,6 +112,131 @@ class PerformanceComparator:
         
         return metrics
     
+    def calculate_batch_performance_metrics(self, returns: np.ndarray, period_names: List[str] = None,
+                                            chunk_size: int = 4096) -> pd.DataFrame:
+        """
+        Calculate performance metrics for many return series at once.
+        
+        Vectorized equivalent of calculate_performance_metrics: every metric
+        is computed along the time axis for a block of series, sharing one
+        set of central moments (mean, variance, skewness and kurtosis all
+        come from the same deviations). Non-finite values are dropped per
+        series, as in the single-series version.
+        
+        Args:
+            returns (np.ndarray): Periodic returns, series x time
+            period_names (List[str]): Name of each series (default: row number)
+            chunk_size (int): Series processed per block (bounds temporary memory)
+            
+        Returns:
+            pd.DataFrame: One row per series with the calculate_performance_metrics
+                keys as columns (NaN metrics for series without valid returns)
+        """
+        returns = np.atleast_2d(np.asarray(returns, dtype=np.float64))
+        
+        blocks = [self._batch_metrics_block(returns[first:first + chunk_size])
+                  for first in range(0, len(returns), chunk_size)]
+        metrics = pd.concat(blocks, ignore_index=True) if blocks else pd.DataFrame()
+        
+        if period_names is not None:
+            metrics.insert(0, 'period_name', list(period_names))
+        
+        return metrics
+    
+    def _batch_metrics_block(self, returns: np.ndarray) -> pd.DataFrame:
+        """Metrics for one block of series (see calculate_batch_performance_metrics)."""
+        valid = np.isfinite(returns)
+        complete = valid.all()
+        values = returns if complete else np.where(valid, returns, 0.0)
+        n = valid.sum(axis=1)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Shared central moments
+            mean_return = values.sum(axis=1) / n
+            deviations = values - mean_return[:, None]
+            if not complete:
+                deviations[~valid] = 0.0
+            squared = deviations * deviations
+            m2 = squared.sum(axis=1)
+            m3 = (squared * deviations).sum(axis=1)
+            m4 = (squared * squared).sum(axis=1)
+            
+            volatility = np.where(n > 1, np.sqrt(m2 / (n - 1)), 0.0)
+            has_spread = volatility > 0
+            skewness = np.where((n >= 3) & has_spread, m3 / n / volatility ** 3, 0.0)
+            kurtosis = np.where((n >= 4) & has_spread, m4 / n / volatility ** 4 - 3, 0.0)
+            
+            # Wins and losses
+            positive = valid & (returns > 0)
+            negative = valid & (returns < 0)
+            n_positive = positive.sum(axis=1)
+            n_negative = negative.sum(axis=1)
+            avg_win = np.where(n_positive > 0, (values * positive).sum(axis=1) / n_positive, 0.0)
+            avg_loss = np.where(n_negative > 0, (values * negative).sum(axis=1) / n_negative, 0.0)
+            loss_deviations = np.where(negative, returns - avg_loss[:, None], 0.0)
+            downside_volatility = np.where(n_negative > 1,
+                                           np.sqrt((loss_deviations ** 2).sum(axis=1) / (n_negative - 1)), 0.0)
+            
+            sharpe_ratio = np.where(has_spread, mean_return / volatility, 0.0)
+            sortino_ratio = np.where(downside_volatility > 0, mean_return / downside_volatility, 0.0)
+            win_loss_ratio = np.where(avg_loss != 0, np.abs(avg_win / avg_loss), np.inf)
+            win_rate = n_positive / n * 100
+            
+            # Compounding and drawdowns (dropped values compound as a zero return)
+            cumulative_returns = np.cumprod(values + 1.0, axis=1)
+            total_return = cumulative_returns[:, -1] - 1 if returns.shape[1] else np.zeros(len(returns))
+            peaks = cumulative_returns if complete else np.where(valid, cumulative_returns, -np.inf)
+            running_max = np.maximum.accumulate(peaks, axis=1)
+            drawdowns = (cumulative_returns - running_max) / running_max
+            if not complete:
+                drawdowns[~valid] = 0.0
+            max_drawdown = drawdowns.min(axis=1, initial=0.0)
+            annualized_return = (1 + total_return) ** (252 / n) - 1
+            
+            if complete:
+                median_return = np.median(returns, axis=1)
+                best_return = returns.max(axis=1, initial=-np.inf)
+                worst_return = returns.min(axis=1, initial=np.inf)
+            else:
+                with warnings.catch_warnings():
+                    warnings.simplefilter('ignore', RuntimeWarning)
+                    median_return = np.nanmedian(np.where(valid, returns, np.nan), axis=1)
+                best_return = np.where(valid, returns, -np.inf).max(axis=1, initial=-np.inf)
+                worst_return = np.where(valid, returns, np.inf).min(axis=1, initial=np.inf)
+        
+        metrics = pd.DataFrame({
+            'total_observations': n,
+            'missing_observations': returns.shape[1] - n,
+            'total_return': total_return,
+            'total_return_pct': total_return * 100,
+            'annualized_return': annualized_return,
+            'mean_return': mean_return,
+            'median_return': median_return,
+            'volatility': volatility,
+            'annualized_volatility': volatility * np.sqrt(252),
+            'downside_volatility': downside_volatility,
+            'sharpe_ratio': sharpe_ratio,
+            'annualized_sharpe': sharpe_ratio * np.sqrt(252),
+            'sortino_ratio': sortino_ratio,
+            'max_drawdown': max_drawdown,
+            'max_drawdown_pct': max_drawdown * 100,
+            'win_rate': win_rate,
+            'average_win': avg_win,
+            'average_loss': avg_loss,
+            'win_loss_ratio': win_loss_ratio,
+            'positive_periods': n_positive,
+            'negative_periods': n_negative,
+            'best_return': best_return,
+            'worst_return': worst_return,
+            'skewness': skewness,
+            'kurtosis': kurtosis
+        })
+        
+        # Series without a single valid return have no metrics
+        metrics.loc[n == 0, metrics.columns[2:]] = np.nan
+        
+        return metrics
+    
     def _calculate_skewness(self, returns: np.ndarray) -> float:
         """Calculate skewness of returns."""
         if len(returns) < 3:
@@ -349,13 +476,16 @@ class PerformanceComparator:
         
         return consistency
     
-    def statistical_significance_test(self, returns1: List[float], returns2: List[float]) -> Dict:
+    def statistical_significance_test(self, returns1: List[float], returns2: List[float],
+                                      n_resamples: int = 0, max_workers: int = 1) -> Dict:
         """
         Test for statistical significance between two return series.
         
         Args:
             returns1 (List[float]): First return series (in-sample)
             returns2 (List[float]): Second return series (out-of-sample)
+            n_resamples (int): Permutations and bootstrap samples (0 skips the resampling tests)
+            max_workers (int): Worker processes for the resampling tests
             
         Returns:
             Dict: Statistical test results
@@ -373,33 +503,27 @@ class PerformanceComparator:
         returns1_clean = np.array([r for r in returns1 if np.isfinite(r)])
         returns2_clean = np.array([r for r in returns2 if np.isfinite(r)])
         
-        # Simple mean difference test (approximating t-test)
-        mean1 = np.mean(returns1_clean)
-        mean2 = np.mean(returns2_clean)
-        var1 = np.var(returns1_clean, ddof=1) if len(returns1_clean) > 1 else 0
-        var2 = np.var(returns2_clean, ddof=1) if len(returns2_clean) > 1 else 0
-        
-        # Pooled standard error
-        n1, n2 = len(returns1_clean), len(returns2_clean)
-        pooled_se = np.sqrt(var1/n1 + var2/n2) if n1 > 0 and n2 > 0 else 0
-        
-        if pooled_se > 0:
-            t_statistic = (mean1 - mean2) / pooled_se
-            # Approximate p-value using normal distribution (for large samples)
-            from math import erfc
-            p_value = erfc(abs(t_statistic) / np.sqrt(2))
-        else:
-            t_statistic = 0
-            p_value = 1
-        
-        test_results['mean_difference_test'] = {
-            'mean_1': mean1,
-            'mean_2': mean2,
-            'difference': mean1 - mean2,
-            't_statistic': t_statistic,
-            'p_value': p_value,
-            'significant_at_5pct': p_value < 0.05
-        }
+        # Welch t-test with exact p-value
+        mean_test = welch_t_test(returns1_clean, returns2_clean)
+        if 'error' in mean_test:
+            test_results['error'] = mean_test['error']
+            return test_results
+        test_results['mean_difference_test'] = mean_test
+        
+        # Kolmogorov-Smirnov distribution test
+        test_results['distribution_test'] = ks_test(returns1_clean, returns2_clean)
+        
+        # Resampling tests
+        if n_resamples > 0:
+            test_results['permutation_test'] = permutation_test(
+                returns1_clean, returns2_clean, n_resamples, max_workers=max_workers)
+            test_results['sharpe_confidence_intervals'] = {
+                'returns_1': bootstrap_sharpe_ci(returns1_clean, n_resamples, max_workers=max_workers),
+                'returns_2': bootstrap_sharpe_ci(returns2_clean, n_resamples, max_workers=max_workers)
+            }
+        
+        var1 = np.var(returns1_clean, ddof=1)
+        var2 = np.var(returns2_clean, ddof=1)
         
         # Variance comparison (F-test approximation)
         if var1 > 0 and var2 > 0:
@@ -452,6 +576,50 @@ class PerformanceComparator:
             print(f"  T-Statistic: {mean_test['t_statistic']:.4f}")
             print(f"  P-Value: {mean_test['p_value']:.4f}")
             print(f"  Significant at 5%: {mean_test['significant_at_5pct']}")
+        distribution_test = comparison['statistical_tests'].get('distribution_test', {})
+        if 'ks_statistic' in distribution_test:
+            print(f"  KS Statistic: {distribution_test['ks_statistic']:.4f} (p={distribution_test['p_value']:.4f})")
+
+
+def benchmark_batch_metrics(n_series=10000, n_periods=252, seed=42):
+    """
+    Compare the per-series metrics loop against the batch calculation.
+    
+    Args:
+        n_series (int): Number of synthetic return series
+        n_periods (int): Returns per series
+        seed (int): Random seed
+        
+    Returns:
+        dict: Timings, speedup and the largest relative difference between both paths
+    """
+    import time
+    
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0.0005, 0.01, (n_series, n_periods))
+    comparator = PerformanceComparator()
+    
+    start = time.perf_counter()
+    loop = pd.DataFrame([comparator.calculate_performance_metrics(row.tolist()) for row in returns])
+    loop_seconds = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    batch = comparator.calculate_batch_performance_metrics(returns)
+    batch_seconds = time.perf_counter() - start
+    
+    columns = [column for column in batch.columns if column != 'win_loss_ratio']
+    expected = loop[columns].to_numpy(dtype=np.float64)
+    actual = batch[columns].to_numpy(dtype=np.float64)
+    max_difference = np.max(np.abs(actual - expected) / np.maximum(np.abs(expected), 1e-12))
+    
+    return {
+        "series": n_series,
+        "periods": n_periods,
+        "loop_seconds": loop_seconds,
+        "batch_seconds": batch_seconds,
+        "speedup": loop_seconds / batch_seconds,
+        "max_relative_difference": float(max_difference)
+    }
 
 
 def test_performance_comparator():
@@ -506,10 +674,27 @@ def test_performance_comparator():
     print(f"P-value: {stat_tests['mean_difference_test']['p_value']:.4f}")
     print(f"Significant at 5%: {stat_tests['mean_difference_test']['significant_at_5pct']}")
     
+    resampled = comparator.statistical_significance_test(is_returns.tolist(), oos_returns.tolist(), n_resamples=10000)
+    print(f"Permutation p-value: {resampled['permutation_test']['p_value']:.4f}")
+    is_interval = resampled['sharpe_confidence_intervals']['returns_1']
+    print(f"In-sample Sharpe 95% CI: [{is_interval['ci_lower']:.2f}, {is_interval['ci_upper']:.2f}]")
+    
     # Test 4: Print full comparison report
     print(f"\n--- Test 4: Full comparison report ---")
     comparator.print_comparison_report(comparison)
     
+    # Test 5: Batch metrics over many series
+    print(f"\n--- Test 5: Batch metrics ---")
+    batch = comparator.calculate_batch_performance_metrics(np.vstack([sample_returns, sample_returns * 2]),
+                                                           ['Test Period', 'Levered'])
+    print(batch[['period_name', 'total_return_pct', 'annualized_sharpe', 'max_drawdown_pct', 'skewness']].to_string(index=False))
+    print(f"Matches single-series metrics: {np.isclose(batch['annualized_sharpe'][0], metrics['annualized_sharpe'])}")
+    
+    benchmark = benchmark_batch_metrics()
+    print(f"{benchmark['series']:,} series x {benchmark['periods']}: loop {benchmark['loop_seconds']:.2f}s, "
+          f"batch {benchmark['batch_seconds']:.3f}s (x{benchmark['speedup']:.0f}), "
+          f"max relative difference {benchmark['max_relative_difference']:.1e}")
+    
     return True
 
 
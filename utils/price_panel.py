@@ -0,0 +1,525 @@
+"""
+Price Panel Module
+
+Aligned symbols x dates price arrays built once at load time.
+Replaces repeated boolean-mask filtering of per-symbol DataFrames with
+binary search on one sorted date index and integer-position lookups.
+Independent module that can be tested separately.
+"""
+
+import sys
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.append('src/data_providers')
+
+from price_store import to_epoch_ns
+
+
+class LookAheadError(ValueError):
+    """Raised when data after a snapshot's cutoff date is requested."""
+
+
+class PricePanel:
+    """Aligned price arrays (symbols x dates) with O(log n) as-of lookups."""
+
+    def __init__(self, symbols: List[str], dates: np.ndarray, fields: Dict[str, np.ndarray],
+                 first_bar: np.ndarray, last_bar: np.ndarray,
+                 bar_ordinals: Optional[np.ndarray] = None):
+        """
+        Initialize a price panel from pre-aligned arrays.
+
+        Use PricePanel.from_frames to build a panel from ETF DataFrames.
+
+        Args:
+            symbols (List[str]): Symbol for each row
+            dates (np.ndarray): Sorted unique int64 epoch-ns (UTC) dates, one per column
+            fields (Dict[str, np.ndarray]): Field name -> float64 array (symbols x dates)
+            first_bar (np.ndarray): Column of each symbol's first bar (len(dates) if none)
+            last_bar (np.ndarray): Column of each symbol's last bar (-1 if none)
+            bar_ordinals (np.ndarray): int32 symbols x dates, number of the symbol's
+                own bars on or before each column minus one (default: no missing
+                bars between first_bar and last_bar)
+        """
+        self.symbols = list(symbols)
+        self.symbol_index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.dates = dates
+        self.fields = fields
+        self.closes = fields['Close']
+        self.first_bar = first_bar
+        self.last_bar = last_bar
+
+        if bar_ordinals is None:
+            positions = np.arange(len(dates))[None, :]
+            bar_ordinals = np.minimum(np.maximum(positions - first_bar[:, None], -1),
+                                      np.maximum(last_bar - first_bar, -1)[:, None]).astype(np.int32)
+        self.bar_ordinals = bar_ordinals
+
+        # Own bars per symbol; symbols with missing bars inside their history
+        # need their bar columns looked up instead of counted
+        self.bar_totals = (bar_ordinals[:, -1].astype(np.int64) + 1 if len(dates)
+                           else np.zeros(len(self.symbols), dtype=np.int64))
+        self.has_gaps = (self.bar_totals > 0) & (last_bar - first_bar + 1 != self.bar_totals)
+        self._bar_columns = {}
+
+    @classmethod
+    def from_frames(cls, etf_data_dict: Dict[str, pd.DataFrame],
+                    fields: tuple = ('Close',)) -> 'PricePanel':
+        """
+        Build a panel from per-symbol DataFrames with a Date column.
+
+        Columns are the union of all symbols' dates. A symbol has NaN before
+        its first bar and after its last bar; dates missing inside its
+        history are forward-filled from the previous bar, matching the
+        "last bar on or before" semantics used for as-of lookups. Lookbacks
+        (history, bar_count, bar_matrix) count the symbol's own bars only,
+        through bar_ordinals, so filled dates never lengthen a lookback.
+
+        Args:
+            etf_data_dict (Dict): Symbol -> DataFrame with Date and field columns
+            fields (tuple): Price columns to load (must include 'Close')
+
+        Returns:
+            PricePanel: Aligned panel
+        """
+        if 'Close' not in fields:
+            fields = ('Close',) + tuple(fields)
+
+        symbols = list(etf_data_dict.keys())
+        symbol_dates = [to_epoch_ns(data['Date']) if not data.empty else np.empty(0, dtype=np.int64)
+                        for data in etf_data_dict.values()]
+
+        dates = np.unique(np.concatenate(symbol_dates)) if symbol_dates else np.empty(0, dtype=np.int64)
+        n_symbols, n_dates = len(symbols), len(dates)
+
+        arrays = {field: np.full((n_symbols, n_dates), np.nan) for field in fields}
+        present = np.zeros((n_symbols, n_dates), dtype=bool)
+
+        for row, (data, row_dates) in enumerate(zip(etf_data_dict.values(), symbol_dates)):
+            if len(row_dates) == 0:
+                continue
+
+            columns = np.searchsorted(dates, row_dates)
+            present[row, columns] = True
+            for field in fields:
+                if field in data.columns:
+                    arrays[field][row, columns] = data[field].to_numpy(dtype=np.float64)
+
+        has_bars = present.any(axis=1)
+        first_bar = np.where(has_bars, present.argmax(axis=1), n_dates)
+        last_bar = np.where(has_bars, n_dates - 1 - present[:, ::-1].argmax(axis=1), -1)
+
+        # Forward-fill dates missing inside each symbol's history
+        if n_dates and not present[has_bars].all():
+            positions = np.arange(n_dates)
+            source = np.maximum.accumulate(np.where(present, positions, 0), axis=1)
+            rows = np.arange(n_symbols)[:, None]
+            inside = (positions >= first_bar[:, None]) & (positions <= last_bar[:, None])
+            for field in fields:
+                filled = arrays[field][rows, source]
+                arrays[field] = np.where(inside, filled, np.nan)
+
+        bar_ordinals = np.cumsum(present, axis=1, dtype=np.int32) - 1
+
+        return cls(symbols, dates, arrays, first_bar.astype(np.int64), last_bar.astype(np.int64), bar_ordinals)
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    @staticmethod
+    def to_epoch_ns(target_date) -> int:
+        """Convert a date-like value to int64 epoch nanoseconds (naive dates are UTC)."""
+        timestamp = pd.Timestamp(target_date)
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.tz_localize('UTC')
+        return int(timestamp.as_unit('ns').value)
+
+    def date_position(self, target_date) -> int:
+        """
+        Find the column of the last date on or before target_date.
+
+        Args:
+            target_date: pd.Timestamp, str or epoch-ns int
+
+        Returns:
+            int: Column position, or -1 if target_date precedes every date
+        """
+        target_ns = target_date if isinstance(target_date, (int, np.integer)) else self.to_epoch_ns(target_date)
+        return int(np.searchsorted(self.dates, target_ns, side='right')) - 1
+
+    def timestamp(self, position: int) -> pd.Timestamp:
+        """Return the UTC timestamp for a column position."""
+        return pd.Timestamp(int(self.dates[position]), tz='UTC')
+
+    def bar_columns(self, symbol: str) -> np.ndarray:
+        """
+        Columns holding a symbol's own bars (not forward-filled dates).
+
+        Args:
+            symbol (str): ETF symbol
+
+        Returns:
+            np.ndarray: Sorted column positions, one per bar
+        """
+        row = self.symbol_index[symbol]
+        if not self.has_gaps[row]:
+            return np.arange(self.first_bar[row], self.first_bar[row] + self.bar_totals[row])
+        if row not in self._bar_columns:
+            self._bar_columns[row] = np.flatnonzero(np.diff(self.bar_ordinals[row], prepend=-1) > 0)
+        return self._bar_columns[row]
+
+    def bar_position(self, symbol: str, position: int) -> int:
+        """
+        Column of a symbol's last bar on or before a position.
+
+        Returns:
+            int: Column position, or -1 if the symbol has no bar yet
+        """
+        row = self.symbol_index[symbol]
+        if position < self.first_bar[row]:
+            return -1
+        position = int(min(position, self.last_bar[row]))
+        if self.has_gaps[row]:
+            return int(self.bar_columns(symbol)[self.bar_ordinals[row, position]])
+        return position
+
+    def bar_count(self, symbol: str, position: int) -> int:
+        """Number of bars a symbol has on or before a position."""
+        row = self.symbol_index[symbol]
+        if position < self.first_bar[row]:
+            return 0
+        return int(self.bar_ordinals[row, min(position, len(self.dates) - 1)]) + 1
+
+    def history(self, symbol: str, position: int, field: str = 'Close') -> np.ndarray:
+        """
+        A symbol's price history up to and including a position.
+
+        Args:
+            symbol (str): ETF symbol
+            position (int): Column position (inclusive end)
+            field (str): Price field
+
+        Returns:
+            np.ndarray: Read-only price of each of the symbol's own bars (a
+                view of the panel row, or a copy if the symbol has missing bars)
+        """
+        row = self.symbol_index[symbol]
+        if self.has_gaps[row]:
+            view = self.fields[field][row, self.bar_columns(symbol)[:self.bar_count(symbol, position)]]
+        else:
+            view = self.fields[field][row, self.first_bar[row]:self.bar_position(symbol, position) + 1]
+        view.flags.writeable = False
+        return view
+
+    def bar_matrix(self, field: str = 'Close') -> np.ndarray:
+        """
+        Every symbol's own bars, left-aligned.
+
+        Row r holds the symbol's bars in order (NaN padded), so shifting along
+        the columns looks back over the symbol's own bars; bar_ordinals maps
+        a date column back to the bar in effect.
+
+        Args:
+            field (str): Price field
+
+        Returns:
+            np.ndarray: symbols x max(bar_totals) array
+        """
+        width = int(self.bar_totals.max()) if len(self.symbols) else 0
+        columns = self.first_bar[:, None] + np.arange(width)[None, :]
+        for row in np.flatnonzero(self.has_gaps):
+            columns[row, :self.bar_totals[row]] = self.bar_columns(self.symbols[row])
+
+        columns = np.clip(columns, 0, max(len(self.dates) - 1, 0))
+        values = np.take_along_axis(self.fields[field], columns, axis=1) if width else np.empty((len(self.symbols), 0))
+        return np.where(np.arange(width)[None, :] < self.bar_totals[:, None], values, np.nan)
+
+    def snapshot(self, position: int) -> 'PanelSnapshot':
+        """
+        Point-in-time view of the panel that cannot see past a column.
+
+        Args:
+            position (int): Cutoff column position (inclusive)
+
+        Returns:
+            PanelSnapshot: Read-only snapshot
+        """
+        return PanelSnapshot(self, position)
+
+    def price_asof(self, symbol: str, position: int, field: str = 'Close') -> Optional[float]:
+        """Price of a symbol at its last bar on or before a position, or None."""
+        bar = self.bar_position(symbol, position)
+        if bar < 0:
+            return None
+        return self.fields[field][self.symbol_index[symbol], bar]
+
+    def prices_at(self, position: int, field: str = 'Close') -> Dict[str, float]:
+        """
+        As-of prices for every symbol that has a bar on or before a position.
+
+        Args:
+            position (int): Column position
+            field (str): Price field
+
+        Returns:
+            Dict[str, float]: Symbol -> price
+        """
+        if position < 0:
+            return {}
+
+        bars = np.minimum(position, self.last_bar)
+        values = self.fields[field][np.arange(len(self.symbols)), np.maximum(bars, 0)]
+        has_bar = self.first_bar <= position
+
+        return {symbol: values[row] for row, symbol in enumerate(self.symbols) if has_bar[row]}
+
+    def date_positions(self, target_dates) -> np.ndarray:
+        """
+        Vectorized date_position for many dates in one searchsorted call.
+
+        Args:
+            target_dates: Sequence of dates, or an int64 epoch-ns array
+
+        Returns:
+            np.ndarray: Column positions (-1 where a date precedes every date)
+        """
+        target_dates = np.asarray(target_dates) if not isinstance(target_dates, pd.Series) else target_dates
+        if isinstance(target_dates, np.ndarray) and target_dates.dtype == np.int64:
+            target_ns = target_dates
+        else:
+            target_ns = to_epoch_ns(target_dates)
+        return np.searchsorted(self.dates, target_ns, side='right') - 1
+
+    def bar_positions(self, symbol: str, positions: np.ndarray) -> np.ndarray:
+        """
+        Vectorized bar_position for one symbol.
+
+        Args:
+            symbol (str): ETF symbol
+            positions (np.ndarray): Column positions
+
+        Returns:
+            np.ndarray: Column of the last bar on or before each position (-1 if none)
+        """
+        row = self.symbol_index[symbol]
+        positions = np.asarray(positions)
+        bars = np.where(positions < self.first_bar[row], -1, np.minimum(positions, self.last_bar[row]))
+        if self.has_gaps[row]:
+            ordinals = self.bar_ordinals[row, np.maximum(bars, 0)]
+            bars = np.where(bars >= 0, self.bar_columns(symbol)[np.maximum(ordinals, 0)], -1)
+        return bars
+
+    def prices_asof(self, symbol: str, target_dates, field: str = 'Close') -> np.ndarray:
+        """
+        Resolve as-of prices for a whole vector of dates for one symbol.
+
+        Args:
+            symbol (str): ETF symbol
+            target_dates: Sequence of dates, or an int64 epoch-ns array
+            field (str): Price field
+
+        Returns:
+            np.ndarray: Price at the last bar on or before each date (NaN if none)
+        """
+        return self.prices_at_positions(symbol, self.date_positions(target_dates), field)
+
+    def prices_at_positions(self, symbol: str, positions: np.ndarray, field: str = 'Close') -> np.ndarray:
+        """
+        As-of prices for one symbol at many column positions.
+
+        Args:
+            symbol (str): ETF symbol
+            positions (np.ndarray): Column positions
+            field (str): Price field
+
+        Returns:
+            np.ndarray: Price at the last bar on or before each position (NaN if none)
+        """
+        row = self.symbol_index[symbol]
+        positions = np.asarray(positions)
+        bars = np.where(positions < self.first_bar[row], -1, np.minimum(positions, self.last_bar[row]))
+        values = self.fields[field][row][np.maximum(bars, 0)]
+        return np.where(bars >= 0, values, np.nan)
+
+    def price_matrix(self, target_dates, field: str = 'Close') -> np.ndarray:
+        """
+        As-of prices for every symbol at every target date.
+
+        Args:
+            target_dates: Sequence of dates, or an int64 epoch-ns array
+            field (str): Price field
+
+        Returns:
+            np.ndarray: symbols x dates array (NaN where a symbol has no bar yet)
+        """
+        positions = self.date_positions(target_dates)
+        bars = np.minimum(positions[None, :], self.last_bar[:, None])
+        valid = (positions[None, :] >= self.first_bar[:, None]) & (positions[None, :] >= 0)
+        values = np.take_along_axis(self.fields[field], np.maximum(bars, 0), axis=1)
+        return np.where(valid, values, np.nan)
+
+    def memory_bytes(self) -> int:
+        """Total bytes held by the panel arrays."""
+        return self.dates.nbytes + self.bar_ordinals.nbytes + sum(array.nbytes for array in self.fields.values())
+
+
+class PanelSnapshot:
+    """
+    Read-only view of a PricePanel as of a cutoff column.
+
+    Holds only a cutoff column; every history it returns is a read-only
+    array of the symbol's bars on or before the cutoff, so later bars cannot
+    be reached through it.
+    """
+
+    def __init__(self, panel: PricePanel, position: int):
+        """
+        Initialize a snapshot.
+
+        Args:
+            panel (PricePanel): Source panel
+            position (int): Cutoff column position (inclusive, -1 for none)
+        """
+        self._panel = panel
+        self.position = position
+        self.symbols = panel.symbols
+        self.first_bar = panel.first_bar
+
+    def _check_position(self, position: Optional[int]) -> int:
+        if position is None:
+            return self.position
+        if position > self.position:
+            raise LookAheadError(f"Column {position} is after snapshot cutoff {self.position}")
+        return position
+
+    @property
+    def cutoff_date(self) -> Optional[pd.Timestamp]:
+        """Timestamp of the cutoff column."""
+        return self._panel.timestamp(self.position) if self.position >= 0 else None
+
+    def bar_count(self, symbol: str) -> int:
+        """Number of visible bars for a symbol."""
+        return self._panel.bar_count(symbol, self.position) if self.position >= 0 else 0
+
+    def bar_timestamp(self, symbol: str) -> Optional[pd.Timestamp]:
+        """Timestamp of a symbol's last visible bar."""
+        if self.bar_count(symbol) == 0:
+            return None
+        return self._panel.timestamp(self._panel.bar_position(symbol, self.position))
+
+    def history(self, symbol: str, field: str = 'Close', position: Optional[int] = None) -> np.ndarray:
+        """
+        Visible price history for a symbol.
+
+        Args:
+            symbol (str): ETF symbol
+            field (str): Price field
+            position (int): Earlier cutoff column (must not exceed the snapshot's)
+
+        Returns:
+            np.ndarray: Read-only view of the history
+        """
+        return self._panel.history(symbol, self._check_position(position), field)
+
+    def price(self, symbol: str, field: str = 'Close') -> Optional[float]:
+        """Latest visible price for a symbol, or None."""
+        return self._panel.price_asof(symbol, self.position, field)
+
+    def prices(self, field: str = 'Close') -> Dict[str, float]:
+        """Latest visible price for every symbol that has one."""
+        return self._panel.prices_at(self.position, field)
+
+
+def frame_prefix(data: pd.DataFrame, target_date) -> pd.DataFrame:
+    """
+    Rows of a frame up to and including target_date without copying.
+
+    Date-sorted frames are cut with a binary search and a positional slice;
+    unsorted frames fall back to a boolean mask. The result shares memory
+    with the source frame and must be treated as read-only.
+
+    Args:
+        data (pd.DataFrame): ETF data with a Date column
+        target_date (pd.Timestamp): Cutoff date (inclusive)
+
+    Returns:
+        pd.DataFrame: Prefix of the frame
+    """
+    dates = data['Date']
+    if dates.is_monotonic_increasing:
+        return data.iloc[:dates.searchsorted(target_date, side='right')]
+    return data[dates <= target_date]
+
+
+def test_price_panel():
+    """Test function to verify the price panel matches DataFrame lookups."""
+
+    print("Testing Price Panel...")
+
+    dates = pd.date_range('2024-01-01', periods=200, freq='B', tz='UTC')
+    spy = pd.DataFrame({'Date': dates, 'Close': np.linspace(100, 150, len(dates))})
+    # QQQ starts later and misses a few bars inside its history
+    qqq = pd.DataFrame({'Date': dates[20:], 'Close': np.linspace(200, 260, len(dates) - 20)}).drop([50, 51])
+
+    panel = PricePanel.from_frames({'SPY': spy, 'QQQ': qqq})
+    print(f"Panel shape: {panel.closes.shape}, {panel.memory_bytes()} bytes")
+
+    checks = []
+    for target in [dates[5], dates[71], dates[-1] + pd.Timedelta(days=3)]:
+        position = panel.date_position(target)
+        prices = panel.prices_at(position)
+        for symbol, data in [('SPY', spy), ('QQQ', qqq)]:
+            available = data[data['Date'] <= target]
+            expected = available['Close'].iloc[-1] if len(available) else None
+            actual = prices.get(symbol)
+            checks.append(expected == actual)
+            print(f"  {target.date()} {symbol}: expected {expected}, panel {actual}")
+
+    # Vectorized lookups agree with scalar ones
+    targets = dates[::7]
+    matrix = panel.price_matrix(targets)
+    for row, symbol in enumerate(panel.symbols):
+        scalar = [panel.price_asof(symbol, panel.date_position(t)) for t in targets]
+        scalar = np.array([np.nan if v is None else v for v in scalar])
+        vector = panel.prices_asof(symbol, targets)
+        checks.append(np.allclose(scalar, vector, equal_nan=True) and np.allclose(scalar, matrix[row], equal_nan=True))
+    print(f"Vectorized lookups match scalar: {all(checks[-2:])}")
+
+    history = panel.history('QQQ', panel.date_position(dates[-1]))
+    print(f"QQQ history length: {len(history)} (view: {history.base is not None})")
+
+    # Snapshots hand out read-only views and refuse later columns
+    snapshot = panel.snapshot(panel.date_position(dates[100]))
+    try:
+        snapshot.history('SPY', position=snapshot.position + 1)
+        checks.append(False)
+    except LookAheadError as e:
+        print(f"Look-ahead blocked: {e}")
+    checks.append(not snapshot.history('SPY').flags.writeable and snapshot.bar_count('SPY') == 101)
+
+    # Lookbacks over QQQ's gap count its own bars, like the DataFrame path
+    sys.path.append('strategies/scenario_based')
+    from momentum_calculator import MomentumCalculator
+
+    calculator = MomentumCalculator(periods=[5, 20, 60], weights=[0.5, 0.3, 0.2])
+    matrix = calculator.calculate_panel_momentum_matrix(panel)
+    for target in [dates[10], dates[72], dates[100], dates[-1]]:
+        position = panel.date_position(target)
+        frames = {symbol: frame_prefix(data, target) for symbol, data in [('SPY', spy), ('QQQ', qqq)]}
+        expected = calculator.calculate_multi_etf_momentum(frames)['momentum_scores']
+        panel_scores = calculator.calculate_panel_momentum(panel, position)['momentum_scores']
+        for row, symbol in enumerate(panel.symbols):
+            scalar = expected.get(symbol)
+            vector = None if np.isnan(matrix[position, row]) else matrix[position, row]
+            same_history = np.array_equal(panel.history(symbol, position), frames[symbol]['Close'].to_numpy())
+            checks.append(same_history and panel_scores.get(symbol) == scalar and vector == scalar)
+    print(f"Gapped lookbacks match DataFrame path: {all(checks[-8:])}")
+
+    return all(checks)
+
+
+if __name__ == "__main__":
+    # Run test when script is executed directly
+    test_price_panel()
@@ -0,0 +1,405 @@
+"""
+Rolling Metrics Module
+
+Rolling-window Sharpe ratio, volatility, Sortino ratio and drawdowns of a
+daily return series, updated every day in O(n) total work. Batch mode
+computes whole arrays from cumulative sums and block-wise running
+maxima/minima; streaming mode updates the same metrics one return at a
+time with running sums and a sliding-window queue of (max, min, max
+drawdown) summaries. Definitions follow
+PerformanceComparator.calculate_performance_metrics applied to each
+window. Independent module that can be tested separately.
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+
+ROLLING_WINDOWS = (21, 63, 252)
+TRADING_DAYS_PER_YEAR = 252
+
+METRIC_NAMES = ('annualized_volatility', 'annualized_sharpe', 'annualized_sortino',
+                'max_drawdown_pct', 'drawdown_pct')
+
+
+def _variance(sum_values, sum_squares, count):
+    """Sample variance from sums; rounding residue of a constant window is treated as zero."""
+    variance = (sum_squares - sum_values ** 2 / count) / (count - 1)
+    threshold = 1e-12 * sum_squares / count
+    if np.ndim(variance) == 0:
+        return variance if variance > threshold else 0.0
+    return np.where(variance > threshold, variance, 0.0)
+
+
+def _blocks(values: np.ndarray, window: int) -> np.ndarray:
+    """Reshape values into rows of window length (last row padded with its last value)."""
+    pad = (-len(values)) % window
+    return np.concatenate([values, np.repeat(values[-1:], pad)]).reshape(-1, window)
+
+
+def _windows(prefix: np.ndarray, suffix: np.ndarray, n: int, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Suffix values at each window start and prefix values at each window end."""
+    return suffix.ravel()[:n - window + 1], prefix.ravel()[window - 1:n]
+
+
+def rolling_max(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Maximum of every trailing window in O(n) (van Herk/Gil-Werman).
+
+    Args:
+        values (np.ndarray): Series
+        window (int): Window length
+
+    Returns:
+        np.ndarray: Window maxima (NaN until the first full window)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    result = np.full(len(values), np.nan)
+    if len(values) < window:
+        return result
+
+    blocks = _blocks(values, window)
+    prefix = np.maximum.accumulate(blocks, axis=1)
+    suffix = np.maximum.accumulate(blocks[:, ::-1], axis=1)[:, ::-1]
+    starts, ends = _windows(prefix, suffix, len(values), window)
+    result[window - 1:] = np.maximum(starts, ends)
+
+    return result
+
+
+def rolling_max_drawdown(equity: np.ndarray, window: int) -> np.ndarray:
+    """
+    Maximum drawdown inside every trailing window in O(n).
+
+    Each window spans the end of one block and the start of the next, so
+    its drawdown is the worse of the drawdown inside the block suffix, the
+    drawdown inside the block prefix, and the fall from the suffix's peak
+    to the prefix's trough.
+
+    Args:
+        equity (np.ndarray): Positive equity (or cumulative return) values
+        window (int): Window length
+
+    Returns:
+        np.ndarray: Max drawdown as a (negative) fraction, NaN until the first full window
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    n = len(equity)
+    result = np.full(n, np.nan)
+    if n < window:
+        return result
+
+    blocks = _blocks(equity, window)
+    prefix_max = np.maximum.accumulate(blocks, axis=1)
+    prefix_min = np.minimum.accumulate(blocks, axis=1)
+    prefix_drawdown = np.minimum.accumulate(blocks / prefix_max - 1, axis=1)
+
+    reverse = blocks[:, ::-1]
+    suffix_max = np.maximum.accumulate(reverse, axis=1)[:, ::-1]
+    suffix_min = np.minimum.accumulate(reverse, axis=1)[:, ::-1]
+    suffix_drawdown = np.minimum.accumulate((suffix_min / blocks - 1)[:, ::-1], axis=1)[:, ::-1]
+
+    start_drawdown, end_drawdown = _windows(prefix_drawdown, suffix_drawdown, n, window)
+    start_max, end_min = _windows(prefix_min, suffix_max, n, window)
+
+    combined = np.minimum(np.minimum(start_drawdown, end_drawdown), end_min / start_max - 1)
+    aligned = np.arange(n - window + 1) % window == 0  # Window is exactly one block
+    result[window - 1:] = np.where(aligned, start_drawdown, combined)
+
+    return result
+
+
+def rolling_window_metrics(returns: np.ndarray, window: int,
+                           annualization: int = TRADING_DAYS_PER_YEAR) -> Dict[str, np.ndarray]:
+    """
+    Rolling metrics of one window length over a return series.
+
+    Args:
+        returns (np.ndarray): Daily returns (non-finite values count as 0)
+        window (int): Window length in days
+        annualization (int): Periods per year
+
+    Returns:
+        Dict: Arrays named as METRIC_NAMES, NaN until the first full window
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    returns = np.where(np.isfinite(returns), returns, 0.0)
+    n = len(returns)
+    metrics = {name: np.full(n, np.nan) for name in METRIC_NAMES}
+    if n < window or window < 2:
+        return metrics
+
+    def window_sums(values):
+        cumulative = np.concatenate(([0.0], np.cumsum(values)))
+        return cumulative[window:] - cumulative[:-window]
+
+    # Moments of shifted returns keep the cumulative sums well conditioned
+    shift = returns.mean()
+    shifted = returns - shift
+    sum_shifted = window_sums(shifted)
+    mean = sum_shifted / window + shift
+    volatility = np.sqrt(_variance(sum_shifted, window_sums(shifted * shifted), window))
+
+    negative = returns < 0
+    losses = np.where(negative, returns, 0.0)
+    n_negative = window_sums(negative.astype(np.float64))
+    sum_losses = window_sums(losses)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        downside_variance = _variance(sum_losses, window_sums(losses * losses), n_negative)
+        downside_volatility = np.where(n_negative > 1, np.sqrt(downside_variance), 0.0)
+        sharpe = np.where(volatility > 0, mean / volatility, 0.0)
+        sortino = np.where(downside_volatility > 0, mean / downside_volatility, 0.0)
+
+    equity = np.cumprod(1 + returns)
+    scale = np.sqrt(annualization)
+
+    metrics['annualized_volatility'][window - 1:] = volatility * scale
+    metrics['annualized_sharpe'][window - 1:] = sharpe * scale
+    metrics['annualized_sortino'][window - 1:] = sortino * scale
+    metrics['max_drawdown_pct'] = rolling_max_drawdown(equity, window) * 100
+    metrics['drawdown_pct'] = (equity / rolling_max(equity, window) - 1) * 100
+
+    return metrics
+
+
+def compute_rolling_metrics(returns: np.ndarray, windows: Sequence[int] = ROLLING_WINDOWS,
+                            dates: Optional[Iterable] = None,
+                            annualization: int = TRADING_DAYS_PER_YEAR) -> pd.DataFrame:
+    """
+    Rolling metrics for several window lengths (batch mode).
+
+    Args:
+        returns (np.ndarray): Daily returns
+        windows (Sequence[int]): Window lengths in days
+        dates (Iterable): Index for the result (default: row number)
+        annualization (int): Periods per year
+
+    Returns:
+        pd.DataFrame: One row per day, columns '<metric>_<window>d'
+    """
+    columns = {}
+    for window in windows:
+        for name, values in rolling_window_metrics(returns, window, annualization).items():
+            columns[f"{name}_{window}d"] = values
+
+    return pd.DataFrame(columns, index=dates)
+
+
+class StreamingRollingMetrics:
+    """
+    Rolling metrics of one window length updated one return at a time.
+
+    Sums over the window are updated in O(1) per push and recomputed from
+    the ring buffer once per window to stop rounding drift. Drawdowns use a
+    two-stack sliding-window queue of (max, min, max drawdown) summaries,
+    which generalizes the monotonic-deque running max: each equity value is
+    moved between the stacks once, so a push is amortized O(1).
+    """
+
+    def __init__(self, window: int, annualization: int = TRADING_DAYS_PER_YEAR):
+        """
+        Initialize an empty window.
+
+        Args:
+            window (int): Window length in days (at least 2)
+            annualization (int): Periods per year
+        """
+        self.window = max(int(window), 2)
+        self.scale = np.sqrt(annualization)
+        self.buffer = np.zeros(self.window)
+        self.count = 0
+        self.equity = 1.0
+
+        self.sum = 0.0
+        self.sum_squares = 0.0
+        self.loss_count = 0
+        self.loss_sum = 0.0
+        self.loss_squares = 0.0
+
+        self._back = []            # Newest equity values
+        self._back_summary = None  # Summary of all of _back
+        self._front = []           # (value, summary of value..newest in _front), oldest last
+
+    @staticmethod
+    def _combine(older: Tuple[float, float, float], newer: Tuple[float, float, float]) -> Tuple[float, float, float]:
+        """Summary of two adjacent segments: (max, min, max drawdown)."""
+        return (max(older[0], newer[0]), min(older[1], newer[1]),
+                min(older[2], newer[2], newer[1] / older[0] - 1))
+
+    def _add(self, value: float, sign: int):
+        """Add (sign=1) or remove (sign=-1) a return from the running sums."""
+        self.sum += sign * value
+        self.sum_squares += sign * value * value
+        if value < 0:
+            self.loss_count += sign
+            self.loss_sum += sign * value
+            self.loss_squares += sign * value * value
+
+    def _resync(self):
+        """Recompute the running sums from the buffer."""
+        values = self.buffer
+        losses = values[values < 0]
+        self.sum = float(values.sum())
+        self.sum_squares = float(values @ values)
+        self.loss_count = len(losses)
+        self.loss_sum = float(losses.sum())
+        self.loss_squares = float(losses @ losses)
+
+    def _push_equity(self, value: float):
+        leaf = (value, value, 0.0)
+        self._back.append(value)
+        self._back_summary = leaf if self._back_summary is None else self._combine(self._back_summary, leaf)
+
+    def _pop_equity(self):
+        if not self._front:
+            summary = None
+            for value in reversed(self._back):
+                leaf = (value, value, 0.0)
+                summary = leaf if summary is None else self._combine(leaf, summary)
+                self._front.append(summary)
+            self._back = []
+            self._back_summary = None
+        self._front.pop()
+
+    def _window_summary(self) -> Tuple[float, float, float]:
+        if not self._front:
+            return self._back_summary
+        if self._back_summary is None:
+            return self._front[-1]
+        return self._combine(self._front[-1], self._back_summary)
+
+    def push(self, daily_return: float) -> Dict[str, float]:
+        """
+        Add the next daily return.
+
+        Args:
+            daily_return (float): Return of the day (non-finite counts as 0)
+
+        Returns:
+            Dict: Current metrics named as METRIC_NAMES (NaN until the window is full)
+        """
+        value = float(daily_return) if np.isfinite(daily_return) else 0.0
+        slot = self.count % self.window
+
+        if self.count >= self.window:
+            self._add(self.buffer[slot], -1)
+            self._pop_equity()
+        self.buffer[slot] = value
+        self._add(value, 1)
+        self.count += 1
+        if self.count % self.window == 0:
+            self._resync()
+
+        self.equity *= 1 + value
+        self._push_equity(self.equity)
+
+        return self.current()
+
+    def current(self) -> Dict[str, float]:
+        """
+        Metrics of the current window.
+
+        Returns:
+            Dict: Metrics named as METRIC_NAMES (NaN until the window is full)
+        """
+        if self.count < self.window:
+            return {name: np.nan for name in METRIC_NAMES}
+
+        window = self.window
+        mean = self.sum / window
+        volatility = np.sqrt(_variance(self.sum, self.sum_squares, window))
+
+        downside_volatility = 0.0
+        if self.loss_count > 1:
+            downside_volatility = np.sqrt(_variance(self.loss_sum, self.loss_squares, self.loss_count))
+
+        peak, _, max_drawdown = self._window_summary()
+
+        return {
+            'annualized_volatility': volatility * self.scale,
+            'annualized_sharpe': mean / volatility * self.scale if volatility > 0 else 0.0,
+            'annualized_sortino': mean / downside_volatility * self.scale if downside_volatility > 0 else 0.0,
+            'max_drawdown_pct': max_drawdown * 100,
+            'drawdown_pct': (self.equity / peak - 1) * 100
+        }
+
+
+class RollingMetricsTracker:
+    """Streaming rolling metrics for several window lengths."""
+
+    def __init__(self, windows: Sequence[int] = ROLLING_WINDOWS,
+                 annualization: int = TRADING_DAYS_PER_YEAR):
+        """
+        Initialize the tracker.
+
+        Args:
+            windows (Sequence[int]): Window lengths in days
+            annualization (int): Periods per year
+        """
+        self.windows = {window: StreamingRollingMetrics(window, annualization) for window in windows}
+
+    def push(self, daily_return: float) -> Dict[str, float]:
+        """
+        Add the next daily return to every window.
+
+        Args:
+            daily_return (float): Return of the day
+
+        Returns:
+            Dict: Current metrics, keys '<metric>_<window>d' as in compute_rolling_metrics
+        """
+        metrics = {}
+        for window, tracker in self.windows.items():
+            for name, value in tracker.push(daily_return).items():
+                metrics[f"{name}_{window}d"] = value
+        return metrics
+
+
+def test_rolling_metrics():
+    """Test function to verify rolling metrics work correctly."""
+
+    print("Testing Rolling Metrics...")
+
+    import sys
+    import time
+    sys.path.append('utils')
+    from performance_comparator import PerformanceComparator
+
+    rng = np.random.default_rng(42)
+    returns = rng.normal(0.0004, 0.012, 2520)
+
+    start = time.perf_counter()
+    batch = compute_rolling_metrics(returns)
+    batch_seconds = time.perf_counter() - start
+    print(f"Batch: {len(batch):,} days x {len(batch.columns)} columns in {batch_seconds * 1000:.1f} ms")
+
+    # Batch windows against whole-period metrics of the same slice
+    comparator = PerformanceComparator()
+    checks = []
+    for window in ROLLING_WINDOWS:
+        for end in [window - 1, window + 7, len(returns) - 1]:
+            metrics = comparator.calculate_performance_metrics(returns[end - window + 1:end + 1].tolist())
+            checks.append(np.isclose(batch[f'annualized_sharpe_{window}d'][end], metrics['annualized_sharpe']))
+            checks.append(np.isclose(batch[f'annualized_volatility_{window}d'][end], metrics['annualized_volatility']))
+            checks.append(np.isclose(batch[f'annualized_sortino_{window}d'][end],
+                                     metrics['sortino_ratio'] * np.sqrt(TRADING_DAYS_PER_YEAR)))
+            checks.append(np.isclose(batch[f'max_drawdown_pct_{window}d'][end], metrics['max_drawdown_pct']))
+    print(f"Matches PerformanceComparator on window slices: {all(checks)}")
+
+    # Streaming push mode reproduces the batch arrays
+    tracker = RollingMetricsTracker()
+    start = time.perf_counter()
+    streamed = pd.DataFrame([tracker.push(value) for value in returns])
+    stream_seconds = time.perf_counter() - start
+    same = np.allclose(streamed.to_numpy(), batch.to_numpy(), equal_nan=True)
+    print(f"Streaming: {stream_seconds / len(returns) * 1e6:.1f} us per push, matches batch: {same}")
+
+    print(f"\nLast day: {batch.iloc[-1].round(2).to_dict()}")
+
+    return all(checks) and same
+
+
+if __name__ == "__main__":
+    # Run test when script is executed directly
+    test_rolling_metrics()
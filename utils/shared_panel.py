@@ -0,0 +1,139 @@
+"""
+Shared Panel Module
+
+Places a PricePanel's arrays in multiprocessing shared memory so worker
+processes attach to one read-only copy instead of each receiving pickled
+DataFrames. Independent module that can be tested separately.
+"""
+
+import sys
+from multiprocessing import shared_memory
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+sys.path.append('utils')
+
+from price_panel import PricePanel
+
+
+class SharedPricePanel:
+    """
+    Owner of the shared-memory blocks backing a PricePanel.
+
+    The creating process keeps this object alive for as long as workers
+    need the panel and calls close() (or uses it as a context manager) to
+    release the blocks. Workers only receive the small, picklable
+    descriptor and rebuild the panel with attach_price_panel.
+    """
+
+    def __init__(self, panel: PricePanel):
+        """
+        Copy a panel's arrays into shared memory.
+
+        Args:
+            panel (PricePanel): Panel to share
+        """
+        arrays = {'dates': panel.dates, 'first_bar': panel.first_bar, 'last_bar': panel.last_bar,
+                  'bar_ordinals': panel.bar_ordinals}
+        arrays.update({f'field:{name}': values for name, values in panel.fields.items()})
+
+        self._blocks = []
+        specs = {}
+        for key, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+            self._blocks.append(block)
+            specs[key] = (block.name, array.shape, array.dtype.str)
+
+        self.descriptor = {'symbols': list(panel.symbols), 'arrays': specs}
+        self.nbytes = sum(block.size for block in self._blocks)
+
+    def close(self):
+        """Release and unlink every shared-memory block."""
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self) -> 'SharedPricePanel':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def attach_price_panel(descriptor: Dict) -> Tuple[PricePanel, List[shared_memory.SharedMemory]]:
+    """
+    Rebuild a read-only PricePanel on top of shared-memory blocks.
+
+    Args:
+        descriptor (Dict): SharedPricePanel.descriptor from the owning process
+
+    Returns:
+        Tuple[PricePanel, List]: The panel and the attached blocks, which must
+            stay referenced for as long as the panel is used
+    """
+    blocks = []
+    arrays = {}
+
+    for key, (name, shape, dtype) in descriptor['arrays'].items():
+        block = shared_memory.SharedMemory(name=name)
+        array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+        array.flags.writeable = False
+        blocks.append(block)
+        arrays[key] = array
+
+    fields = {key.split(':', 1)[1]: array for key, array in arrays.items() if key.startswith('field:')}
+    panel = PricePanel(descriptor['symbols'], arrays['dates'], fields,
+                       arrays['first_bar'], arrays['last_bar'], arrays['bar_ordinals'])
+
+    return panel, blocks
+
+
+def _shared_close_sum(descriptor: Dict) -> float:
+    """Sum of all closes seen from a worker process (used by the test)."""
+    panel, blocks = attach_price_panel(descriptor)
+    total = float(np.nansum(panel.closes))
+    del panel
+    for block in blocks:
+        block.close()
+    return total
+
+
+def test_shared_panel():
+    """Test function to verify shared panels attach correctly in worker processes."""
+
+    print("Testing Shared Panel...")
+
+    import pandas as pd
+    from concurrent.futures import ProcessPoolExecutor
+
+    dates = pd.date_range('2024-01-01', periods=250, freq='B', tz='UTC')
+    rng = np.random.default_rng(0)
+    etf_data = {symbol: pd.DataFrame({'Date': dates, 'Close': 100 + rng.normal(0, 1, len(dates)).cumsum()})
+                for symbol in ['SPY', 'QQQ', 'IWM']}
+    panel = PricePanel.from_frames(etf_data)
+
+    with SharedPricePanel(panel) as shared:
+        print(f"Shared {shared.nbytes:,} bytes in {len(shared.descriptor['arrays'])} blocks")
+
+        attached, blocks = attach_price_panel(shared.descriptor)
+        same = np.array_equal(attached.closes, panel.closes) and attached.symbols == panel.symbols
+        print(f"Attached panel matches: {same}")
+        print(f"Attached arrays read-only: {not attached.closes.flags.writeable}")
+        del attached
+        for block in blocks:
+            block.close()
+
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            worker_sum = executor.submit(_shared_close_sum, shared.descriptor).result()
+        print(f"Worker sees same data: {worker_sum == float(np.nansum(panel.closes))}")
+
+    return same
+
+
+if __name__ == "__main__":
+    # Run test when script is executed directly
+    test_shared_panel()
@@ -0,0 +1,366 @@
+"""
+Significance Tests Module
+
+Statistical tests for comparing return series: exact Student-t p-values
+(regularized incomplete beta function, no SciPy), a two-sample
+Kolmogorov-Smirnov distribution test, bootstrap confidence intervals for
+the Sharpe ratio and a permutation test for the difference in mean
+returns. Resamples are drawn as one index matrix per chunk and reduced
+with array operations; chunks can be fanned out over a process pool for
+very large resample counts. Independent module that can be tested
+separately.
+"""
+
+import math
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Optional, Sequence
+
+
+TRADING_DAYS_PER_YEAR = 252
+
+
+def _clean(returns: Sequence[float]) -> np.ndarray:
+    """Finite values of a return series as a float array."""
+    returns = np.asarray(returns, dtype=np.float64)
+    return returns[np.isfinite(returns)]
+
+
+def _continued_fraction(a: float, b: float, x: float, max_iterations: int = 300,
+                        tolerance: float = 1e-15) -> float:
+    """Continued fraction of the incomplete beta function (modified Lentz method)."""
+    tiny = 1e-300
+    c = 1.0
+    d = 1.0 - (a + b) * x / (a + 1)
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    result = d
+
+    for m in range(1, max_iterations + 1):
+        m2 = 2 * m
+        for numerator in (m * (b - m) * x / ((a + m2 - 1) * (a + m2)),
+                          -(a + m) * (a + b + m) * x / ((a + m2) * (a + m2 + 1))):
+            d = 1.0 + numerator * d
+            d = 1.0 / (d if abs(d) > tiny else tiny)
+            c = 1.0 + numerator / c
+            c = c if abs(c) > tiny else tiny
+            result *= d * c
+        if abs(d * c - 1.0) < tolerance:
+            break
+
+    return result
+
+
+def regularized_incomplete_beta(x: float, a: float, b: float) -> float:
+    """
+    Regularized incomplete beta function I_x(a, b).
+
+    Args:
+        x (float): Upper limit in [0, 1]
+        a (float): First shape parameter (> 0)
+        b (float): Second shape parameter (> 0)
+
+    Returns:
+        float: I_x(a, b)
+    """
+    if x <= 0:
+        return 0.0
+    if x >= 1:
+        return 1.0
+
+    log_front = (math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b)
+                 + a * math.log(x) + b * math.log1p(-x))
+    if x < (a + 1) / (a + b + 2):
+        return math.exp(log_front) * _continued_fraction(a, b, x) / a
+    return 1.0 - math.exp(log_front) * _continued_fraction(b, a, 1 - x) / b
+
+
+def t_test_p_value(t_statistic: float, degrees_of_freedom: float) -> float:
+    """
+    Exact two-sided p-value of a Student-t statistic.
+
+    Args:
+        t_statistic (float): t statistic
+        degrees_of_freedom (float): Degrees of freedom (> 0, may be fractional)
+
+    Returns:
+        float: P(|T| >= |t|)
+    """
+    if not np.isfinite(t_statistic):
+        return 0.0
+    return regularized_incomplete_beta(degrees_of_freedom / (degrees_of_freedom + t_statistic ** 2),
+                                       degrees_of_freedom / 2, 0.5)
+
+
+def welch_t_test(returns1: Sequence[float], returns2: Sequence[float]) -> Dict:
+    """
+    Welch t-test for a difference in mean returns.
+
+    Args:
+        returns1 (Sequence[float]): First return series
+        returns2 (Sequence[float]): Second return series
+
+    Returns:
+        Dict: Means, difference, t statistic, Welch-Satterthwaite degrees of
+            freedom and exact two-sided p-value
+    """
+    returns1, returns2 = _clean(returns1), _clean(returns2)
+    n1, n2 = len(returns1), len(returns2)
+    if n1 < 2 or n2 < 2:
+        return {'error': 'Insufficient data for t-test'}
+
+    mean1, mean2 = returns1.mean(), returns2.mean()
+    se1, se2 = returns1.var(ddof=1) / n1, returns2.var(ddof=1) / n2
+    standard_error = np.sqrt(se1 + se2)
+
+    if standard_error > 0:
+        t_statistic = (mean1 - mean2) / standard_error
+        degrees_of_freedom = (se1 + se2) ** 2 / (se1 ** 2 / (n1 - 1) + se2 ** 2 / (n2 - 1))
+        p_value = t_test_p_value(t_statistic, degrees_of_freedom)
+    else:
+        t_statistic = 0
+        degrees_of_freedom = n1 + n2 - 2
+        p_value = 1
+
+    return {
+        'mean_1': mean1,
+        'mean_2': mean2,
+        'difference': mean1 - mean2,
+        't_statistic': t_statistic,
+        'degrees_of_freedom': degrees_of_freedom,
+        'p_value': p_value,
+        'significant_at_5pct': p_value < 0.05
+    }
+
+
+def kolmogorov_survival(statistic: float) -> float:
+    """
+    Survival function of the Kolmogorov distribution, P(K > statistic).
+
+    Args:
+        statistic (float): Scaled KS statistic
+
+    Returns:
+        float: Asymptotic p-value
+    """
+    if statistic < 0.2:
+        return 1.0
+
+    total = 0.0
+    for j in range(1, 101):
+        term = 2 * (-1) ** (j - 1) * math.exp(-2 * j * j * statistic * statistic)
+        total += term
+        if abs(term) < 1e-12 * max(abs(total), 1e-300):
+            break
+
+    return min(max(total, 0.0), 1.0)
+
+
+def ks_test(returns1: Sequence[float], returns2: Sequence[float]) -> Dict:
+    """
+    Two-sample Kolmogorov-Smirnov test of whether two return series share a distribution.
+
+    Args:
+        returns1 (Sequence[float]): First return series
+        returns2 (Sequence[float]): Second return series
+
+    Returns:
+        Dict: KS statistic (largest gap between the empirical CDFs) and
+            asymptotic p-value with the Stephens small-sample correction
+    """
+    returns1, returns2 = np.sort(_clean(returns1)), np.sort(_clean(returns2))
+    n1, n2 = len(returns1), len(returns2)
+    if n1 == 0 or n2 == 0:
+        return {'error': 'Insufficient data for KS test'}
+
+    points = np.concatenate([returns1, returns2])
+    cdf1 = np.searchsorted(returns1, points, side='right') / n1
+    cdf2 = np.searchsorted(returns2, points, side='right') / n2
+    statistic = float(np.max(np.abs(cdf1 - cdf2)))
+
+    effective_n = np.sqrt(n1 * n2 / (n1 + n2))
+    p_value = kolmogorov_survival((effective_n + 0.12 + 0.11 / effective_n) * statistic)
+
+    return {
+        'ks_statistic': statistic,
+        'p_value': p_value,
+        'significant_at_5pct': p_value < 0.05
+    }
+
+
+def _bootstrap_sharpe_chunk(returns: np.ndarray, annualization: int, n_resamples: int,
+                            seed: np.random.SeedSequence) -> np.ndarray:
+    """Annualized Sharpe ratios of n_resamples bootstrap samples."""
+    rng = np.random.default_rng(seed)
+    samples = returns[rng.integers(0, len(returns), (n_resamples, len(returns)))]
+    mean = samples.mean(axis=1)
+    std = samples.std(axis=1, ddof=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(std > 0, mean / std, 0.0) * np.sqrt(annualization)
+
+
+def _permutation_chunk(combined: np.ndarray, n1: int, n_resamples: int,
+                       seed: np.random.SeedSequence) -> np.ndarray:
+    """Mean differences of n_resamples random relabelings of the pooled returns."""
+    rng = np.random.default_rng(seed)
+    shuffled = rng.permuted(np.tile(combined, (n_resamples, 1)), axis=1)
+    first_sum = shuffled[:, :n1].sum(axis=1)
+    return first_sum / n1 - (combined.sum() - first_sum) / (len(combined) - n1)
+
+
+def resample(kernel: Callable, args: tuple, n_resamples: int, row_length: int, seed: Optional[int] = 42,
+             max_workers: int = 1, max_chunk_bytes: int = 64 * 1024 ** 2) -> np.ndarray:
+    """
+    Run a resampling kernel in memory-bounded chunks, optionally on a process pool.
+
+    Every chunk gets its own child seed, so results depend on the seed and
+    chunk size only, never on the number of workers.
+
+    Args:
+        kernel (Callable): Module-level function kernel(*args, n_resamples, seed) -> array
+        args (tuple): Leading kernel arguments
+        n_resamples (int): Total resamples
+        row_length (int): Values drawn per resample (sizes the chunks)
+        seed (int): Random seed
+        max_workers (int): Worker processes (1 runs in-process)
+        max_chunk_bytes (int): Memory budget for one chunk's resample matrix
+
+    Returns:
+        np.ndarray: Statistic of every resample
+    """
+    chunk_size = max(1, min(n_resamples, int(max_chunk_bytes // (8 * max(row_length, 1)))))
+    sizes = [min(chunk_size, n_resamples - start) for start in range(0, n_resamples, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    if max_workers <= 1 or len(sizes) == 1:
+        return np.concatenate([kernel(*args, size, chunk_seed) for size, chunk_seed in zip(sizes, seeds)])
+
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(sizes))) as executor:
+        futures = [executor.submit(kernel, *args, size, chunk_seed) for size, chunk_seed in zip(sizes, seeds)]
+        return np.concatenate([future.result() for future in futures])
+
+
+def bootstrap_sharpe_ci(returns: Sequence[float], n_resamples: int = 10000, confidence: float = 0.95,
+                        annualization: int = TRADING_DAYS_PER_YEAR, seed: Optional[int] = 42,
+                        max_workers: int = 1, max_chunk_bytes: int = 64 * 1024 ** 2) -> Dict:
+    """
+    Percentile bootstrap confidence interval for the annualized Sharpe ratio.
+
+    Args:
+        returns (Sequence[float]): Daily returns
+        n_resamples (int): Bootstrap samples
+        confidence (float): Confidence level of the interval
+        annualization (int): Periods per year
+        seed (int): Random seed
+        max_workers (int): Worker processes (1 runs in-process)
+        max_chunk_bytes (int): Memory budget for one chunk of resamples
+
+    Returns:
+        Dict: Sample Sharpe, interval bounds and bootstrap standard error
+    """
+    returns = _clean(returns)
+    if len(returns) < 2:
+        return {'error': 'Insufficient data for bootstrap'}
+
+    std = returns.std(ddof=1)
+    sharpe = returns.mean() / std * np.sqrt(annualization) if std > 0 else 0.0
+    sharpes = resample(_bootstrap_sharpe_chunk, (returns, annualization), n_resamples, len(returns),
+                       seed, max_workers, max_chunk_bytes)
+    tail = (1 - confidence) / 2 * 100
+    lower, upper = np.percentile(sharpes, [tail, 100 - tail])
+
+    return {
+        'sharpe': sharpe,
+        'ci_lower': float(lower),
+        'ci_upper': float(upper),
+        'confidence': confidence,
+        'standard_error': float(sharpes.std(ddof=1)),
+        'n_resamples': n_resamples
+    }
+
+
+def permutation_test(returns1: Sequence[float], returns2: Sequence[float], n_permutations: int = 10000,
+                     seed: Optional[int] = 42, max_workers: int = 1,
+                     max_chunk_bytes: int = 64 * 1024 ** 2) -> Dict:
+    """
+    Permutation test for a difference in mean returns (for example in-sample vs out-of-sample).
+
+    Args:
+        returns1 (Sequence[float]): First return series
+        returns2 (Sequence[float]): Second return series
+        n_permutations (int): Random relabelings of the pooled returns
+        seed (int): Random seed
+        max_workers (int): Worker processes (1 runs in-process)
+        max_chunk_bytes (int): Memory budget for one chunk of permutations
+
+    Returns:
+        Dict: Observed difference and two-sided permutation p-value
+    """
+    returns1, returns2 = _clean(returns1), _clean(returns2)
+    if len(returns1) < 1 or len(returns2) < 1:
+        return {'error': 'Insufficient data for permutation test'}
+
+    combined = np.concatenate([returns1, returns2])
+    difference = returns1.mean() - returns2.mean()
+    differences = resample(_permutation_chunk, (combined, len(returns1)), n_permutations, len(combined),
+                           seed, max_workers, max_chunk_bytes)
+
+    # Count relabelings at least as extreme, with a small tolerance for rounding
+    extreme = np.count_nonzero(np.abs(differences) >= abs(difference) * (1 - 1e-12))
+    p_value = (extreme + 1) / (n_permutations + 1)
+
+    return {
+        'difference': difference,
+        'p_value': p_value,
+        'significant_at_5pct': p_value < 0.05,
+        'n_permutations': n_permutations
+    }
+
+
+def test_significance_tests():
+    """Test function to verify significance tests work correctly."""
+
+    print("Testing Significance Tests...")
+
+    import time
+
+    # Exact t p-values against reference table values
+    references = [(2.0, 10, 0.0733880), (2.228139, 10, 0.05), (1.959964, 1e7, 0.05), (0.5, 3, 0.6514)]
+    exact = all(abs(t_test_p_value(t, df) - p) < 1e-4 for t, df, p in references)
+    print(f"t-test p-values match reference values: {exact}")
+
+    rng = np.random.default_rng(42)
+    is_returns = rng.normal(0.002, 0.015, 150)
+    oos_returns = rng.normal(0.0, 0.02, 75)
+
+    welch = welch_t_test(is_returns, oos_returns)
+    print(f"Welch t-test: t={welch['t_statistic']:.3f}, df={welch['degrees_of_freedom']:.1f}, "
+          f"p={welch['p_value']:.4f}")
+
+    same = ks_test(is_returns, rng.normal(0.002, 0.015, 150))
+    shifted = ks_test(is_returns, rng.normal(0.004, 0.03, 150))
+    print(f"KS same distribution: D={same['ks_statistic']:.3f}, p={same['p_value']:.3f}; "
+          f"different: D={shifted['ks_statistic']:.3f}, p={shifted['p_value']:.4f}")
+
+    start = time.perf_counter()
+    permutation = permutation_test(is_returns, oos_returns)
+    print(f"Permutation test (10,000): p={permutation['p_value']:.4f} "
+          f"in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    start = time.perf_counter()
+    interval = bootstrap_sharpe_ci(is_returns)
+    serial_seconds = time.perf_counter() - start
+    print(f"Bootstrap Sharpe {interval['sharpe']:.2f}, 95% CI [{interval['ci_lower']:.2f}, "
+          f"{interval['ci_upper']:.2f}] in {serial_seconds * 1000:.0f} ms")
+
+    # Chunked process-pool run reproduces the in-process chunks exactly
+    budget = 8 * len(is_returns) * 2500
+    serial = bootstrap_sharpe_ci(is_returns, max_chunk_bytes=budget)
+    parallel = bootstrap_sharpe_ci(is_returns, max_chunk_bytes=budget, max_workers=2)
+    print(f"Process pool matches in-process: {serial == parallel}")
+
+    return exact and serial == parallel
+
+
+if __name__ == "__main__":
+    # Run test when script is executed directly
+    test_significance_tests()
@@ -0,0 +1,225 @@
+"""
+Structured Logging Module
+
+Logging for the backtest engines under the 'momentum' logger hierarchy.
+Console output stays plain text on stdout (the format the engines always
+printed); configure_logging adds a queued JSON-lines file handler so file
+I/O happens on a background thread, and a quiet mode that raises the
+level for sweeps. Callers guard per-event formatting with isEnabledFor so
+filtered messages cost nothing. Independent module that can be tested
+separately.
+"""
+
+import atexit
+import contextlib
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from datetime import datetime
+from typing import Optional, Union
+
+
+LOGGER_NAME = 'momentum'
+
+# Attributes every LogRecord has; anything else came in through extra=
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'taskName'}
+
+_listener = None
+_default_handler = None
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Formats a record as one JSON object per line, including its extra fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'timestamp': datetime.fromtimestamp(record.created).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage().strip()
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """StreamHandler writing to the current sys.stdout (so redirect_stdout captures it)."""
+
+    def __init__(self):
+        super().__init__(sys.stdout)
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+def _console_handler(level: int) -> logging.Handler:
+    handler = _StdoutHandler()
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    handler.setLevel(level)
+    return handler
+
+
+def get_logger(name: Optional[str] = None) -> logging.Logger:
+    """
+    Get a logger below 'momentum'.
+
+    Until configure_logging is called, INFO messages go to stdout as plain
+    text, matching the engines' former print output.
+
+    Args:
+        name (str): Child logger name (default: the 'momentum' logger itself)
+
+    Returns:
+        logging.Logger: Logger
+    """
+    global _default_handler
+    root = logging.getLogger(LOGGER_NAME)
+    if _default_handler is None and not root.handlers:
+        _default_handler = _console_handler(logging.NOTSET)
+        root.addHandler(_default_handler)
+        root.setLevel(logging.INFO)
+        root.propagate = False
+
+    return root.getChild(name) if name else root
+
+
+def shutdown_logging():
+    """Flush the queued file handler and remove every handler from 'momentum'."""
+    global _listener, _default_handler
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+    root = logging.getLogger(LOGGER_NAME)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    _default_handler = None
+
+
+def configure_logging(level: Union[int, str] = logging.INFO, log_dir: Optional[str] = 'logs',
+                      console: bool = True, quiet: bool = False,
+                      filename: Optional[str] = None) -> Optional[str]:
+    """
+    Configure the 'momentum' loggers.
+
+    Args:
+        level: Minimum level logged (e.g. 'DEBUG' adds full ranking listings)
+        log_dir (str): Directory of the JSON-lines file (None disables the file)
+        console (bool): Print messages to stdout
+        quiet (bool): Log only warnings and errors (for sweeps and batch runs)
+        filename (str): JSON-lines file name (default: momentum_<timestamp>.jsonl)
+
+    Returns:
+        str: Path of the JSON-lines file, or None
+    """
+    global _listener
+    shutdown_logging()
+
+    level = logging.WARNING if quiet else logging.getLevelName(level) if isinstance(level, str) else level
+    root = logging.getLogger(LOGGER_NAME)
+    root.setLevel(level)
+    root.propagate = False
+
+    # Console stays synchronous so it interleaves correctly with other output
+    if console:
+        root.addHandler(_console_handler(level))
+
+    path = None
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+        path = os.path.join(log_dir, filename or f"momentum_{datetime.now().strftime('%Y%m%d-%H%M%S')}.jsonl")
+        file_handler = logging.FileHandler(path)
+        file_handler.setFormatter(JsonLinesFormatter())
+
+        # Records are queued; a background thread formats and writes them
+        records = queue.SimpleQueue()
+        root.addHandler(logging.handlers.QueueHandler(records))
+        _listener = logging.handlers.QueueListener(records, file_handler)
+        _listener.start()
+
+    return path
+
+
+@contextlib.contextmanager
+def quiet_logging(level: int = logging.WARNING):
+    """
+    Temporarily raise the 'momentum' level (e.g. around a parameter sweep).
+
+    Args:
+        level (int): Level while inside the block
+    """
+    root = get_logger()
+    previous = root.level
+    root.setLevel(level)
+    try:
+        yield root
+    finally:
+        root.setLevel(previous)
+
+
+atexit.register(shutdown_logging)
+
+
+def test_structured_logging():
+    """Test function to verify structured logging works correctly."""
+
+    print("Testing Structured Logging...")
+
+    import tempfile
+    import time
+
+    logger = get_logger('test')
+    logger.info("Default console output (plain text)")
+
+    class Counting:
+        calls = 0
+
+        def __str__(self):
+            Counting.calls += 1
+            return 'formatted'
+
+    with tempfile.TemporaryDirectory() as log_dir:
+        path = configure_logging('DEBUG', log_dir=log_dir, console=False)
+        logger.info("Rebalance %d: %s", 1, 'SPY', extra={'event': 'rebalance', 'symbol': 'SPY', 'score': 0.12})
+        logger.debug("ranking detail", extra={'event': 'rankings'})
+
+        with quiet_logging():
+            logger.info("%s", Counting())
+        shutdown_logging()
+
+        with open(path) as f:
+            entries = [json.loads(line) for line in f]
+    print(f"JSON lines: {entries}")
+
+    structured = entries[0]['event'] == 'rebalance' and entries[0]['message'] == 'Rebalance 1: SPY'
+    print(f"Extra fields recorded: {structured}, filtered message never formatted: {Counting.calls == 0}")
+
+    configure_logging(quiet=True, log_dir=None)
+    calls = 100000
+    started = time.perf_counter()
+    for i in range(calls):
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(f"  Portfolio value: ${i:,.2f}")
+    print(f"Filtered message cost: {(time.perf_counter() - started) / calls * 1e9:.0f} ns")
+    shutdown_logging()
+
+    return structured and len(entries) == 2 and Counting.calls == 0
+
+
+if __name__ == "__main__":
+    # Run test when script is executed directly
+    test_structured_logging()